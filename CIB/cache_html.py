@@ -0,0 +1,220 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from coletor import ResultadoBusca
+
+# Cache em disco das respostas brutas do portal
+# O HTML é gravado comprimido (zlib) com o nome igual ao SHA-256 do conteúdo, então páginas
+# idênticas ocupam um único arquivo. Um índice SQLite liga cada URL ao conteúdo, ao status
+# HTTP e à data da busca. Entradas mais velhas que o TTL deixam de valer e, quando o cache
+# passa do tamanho máximo, as menos acessadas são apagadas.
+
+DIRETORIO_CACHE = "cache_html"
+TTL_PADRAO_DIAS = 30
+TAMANHO_MAXIMO_PADRAO_MB = 1024
+NIVEL_COMPRESSAO = 6
+
+# Só respostas definitivas vão para o cache (falhas de conexão e 5xx são buscadas de novo)
+STATUS_CACHEAVEIS = {200, 404, 410}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respostas (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    gravado_em REAL NOT NULL,
+    acessado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_respostas_hash ON respostas (hash);
+CREATE INDEX IF NOT EXISTS idx_respostas_acessado ON respostas (acessado_em);
+CREATE TABLE IF NOT EXISTS objetos (
+    hash TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL
+);
+"""
+
+class CacheHtml:
+    def __init__(self, diretorio=DIRETORIO_CACHE, ttl_dias=TTL_PADRAO_DIAS, tamanho_maximo_mb=TAMANHO_MAXIMO_PADRAO_MB):
+        self.diretorio = diretorio
+        self.ttl = ttl_dias * 86400 if ttl_dias is not None else None
+        self.tamanho_maximo = tamanho_maximo_mb * 1024 * 1024 if tamanho_maximo_mb else None
+        os.makedirs(os.path.join(diretorio, "objetos"), exist_ok=True)
+        # A coleta usa o cache de outra thread (a do laço de eventos)
+        self._trava = threading.Lock()
+        self.conexao = sqlite3.connect(os.path.join(diretorio, "indice.db"), check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+        self.tamanho_total = self.conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM objetos").fetchone()[0]
+        self.acertos = 0
+        self.faltas = 0
+
+    def fechar(self):
+        with self._trava:
+            self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def _caminho(self, hash_conteudo):
+        return os.path.join(self.diretorio, "objetos", hash_conteudo[:2], hash_conteudo + ".zz")
+
+    def _ler_objeto(self, hash_conteudo):
+        try:
+            with open(self._caminho(hash_conteudo), "rb") as arquivo:
+                return zlib.decompress(arquivo.read()).decode("utf-8")
+        except (OSError, zlib.error):
+            return None
+
+    # Devolve (status, html) da URL, ou None se não estiver no cache ou tiver expirado
+    def obter(self, url, aceitar_expirado=False):
+        with self._trava:
+            linha = self.conexao.execute(
+                "SELECT hash, status, gravado_em FROM respostas WHERE url = ?", (url,)
+            ).fetchone()
+            if linha is None or (not aceitar_expirado and self.ttl is not None and time.time() - linha[2] > self.ttl):
+                self.faltas += 1
+                return None
+            html = self._ler_objeto(linha[0])
+            if html is None:
+                # Arquivo sumiu ou corrompeu: a URL volta a ser buscada
+                self.conexao.execute("DELETE FROM respostas WHERE url = ?", (url,))
+                self.conexao.commit()
+                self.faltas += 1
+                return None
+            self.conexao.execute("UPDATE respostas SET acessado_em = ? WHERE url = ?", (time.time(), url))
+            self.conexao.commit()
+            self.acertos += 1
+            return linha[1], html
+
+    # Grava a resposta da URL; o conteúdo só é escrito em disco se ainda não existir
+    def gravar(self, url, status, html):
+        if status not in STATUS_CACHEAVEIS:
+            return
+        conteudo = (html or "").encode("utf-8")
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+        agora = time.time()
+        with self._trava:
+            existe = self.conexao.execute("SELECT 1 FROM objetos WHERE hash = ?", (hash_conteudo,)).fetchone()
+            if not existe:
+                caminho = self._caminho(hash_conteudo)
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                comprimido = zlib.compress(conteudo, NIVEL_COMPRESSAO)
+                # Grava em um arquivo temporário e renomeia, para nunca deixar um objeto pela metade
+                temporario = caminho + ".tmp"
+                with open(temporario, "wb") as arquivo:
+                    arquivo.write(comprimido)
+                os.replace(temporario, caminho)
+                self.conexao.execute("INSERT INTO objetos (hash, tamanho) VALUES (?, ?)", (hash_conteudo, len(comprimido)))
+                self.tamanho_total += len(comprimido)
+            self.conexao.execute(
+                """
+                INSERT INTO respostas (url, hash, status, gravado_em, acessado_em) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    hash = excluded.hash, status = excluded.status,
+                    gravado_em = excluded.gravado_em, acessado_em = excluded.acessado_em
+                """,
+                (url, hash_conteudo, status, agora, agora),
+            )
+            self.conexao.commit()
+            if self.tamanho_maximo is not None and self.tamanho_total > self.tamanho_maximo:
+                self._despejar()
+
+    # Apaga as entradas acessadas há mais tempo, uma a uma, até o cache ficar em 90% do tamanho máximo
+    # (um conteúdo só sai do disco quando nenhuma URL usa mais)
+    def _despejar(self):
+        alvo = self.tamanho_maximo * 0.9
+        removidas = 0
+        while self.tamanho_total > alvo:
+            linhas = self.conexao.execute("SELECT url, hash FROM respostas ORDER BY acessado_em LIMIT 100").fetchall()
+            if not linhas:
+                break
+            for url, hash_conteudo in linhas:
+                if self.tamanho_total <= alvo:
+                    break
+                self.conexao.execute("DELETE FROM respostas WHERE url = ?", (url,))
+                removidas += 1
+                self._apagar_orfaos([hash_conteudo])
+        self.conexao.commit()
+        print(f"Cache acima de {self.tamanho_maximo // (1024 * 1024)} MB: {removidas} respostas antigas removidas")
+
+    # Apaga os conteúdos que nenhuma URL usa mais (só entre `hashes`, se informados)
+    def _apagar_orfaos(self, hashes=None):
+        sql = "SELECT hash, tamanho FROM objetos WHERE hash NOT IN (SELECT hash FROM respostas)"
+        if hashes is None:
+            orfaos = self.conexao.execute(sql).fetchall()
+        else:
+            orfaos = [orfao for hash_conteudo in hashes
+                      for orfao in self.conexao.execute(sql + " AND hash = ?", (hash_conteudo,))]
+        for hash_conteudo, tamanho in orfaos:
+            try:
+                os.remove(self._caminho(hash_conteudo))
+            except FileNotFoundError:
+                pass
+            self.tamanho_total -= tamanho
+        self.conexao.executemany("DELETE FROM objetos WHERE hash = ?", [(hash_conteudo,) for hash_conteudo, _ in orfaos])
+
+    # Remove as entradas expiradas (e os conteúdos que ficaram sem uso)
+    def limpar_expirados(self):
+        if self.ttl is None:
+            return 0
+        with self._trava:
+            cursor = self.conexao.execute("DELETE FROM respostas WHERE gravado_em < ?", (time.time() - self.ttl,))
+            self._apagar_orfaos()
+            self.conexao.commit()
+            return cursor.rowcount
+
+    # Percorre todas as respostas cacheadas das URLs que começam com `url_base`, como ResultadoBusca,
+    # em ordem de id (usado no modo --replay; o TTL não vale aqui)
+    def resultados(self, url_base):
+        with self._trava:
+            linhas = self.conexao.execute(
+                "SELECT url, hash, status FROM respostas WHERE substr(url, 1, ?) = ?", (len(url_base), url_base)
+            ).fetchall()
+        ordenadas = sorted(
+            (int(url[len(url_base):]), hash_conteudo, status)
+            for url, hash_conteudo, status in linhas
+            if url[len(url_base):].isdigit()
+        )
+        for empresa_id, hash_conteudo, status in ordenadas:
+            html = self._ler_objeto(hash_conteudo)
+            if html is not None:
+                yield ResultadoBusca(empresa_id, status, html, None)
+
+    def resumo(self):
+        with self._trava:
+            respostas = self.conexao.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+            objetos = self.conexao.execute("SELECT COUNT(*) FROM objetos").fetchone()[0]
+        return {
+            "respostas": respostas,
+            "objetos": objetos,
+            "mb": round(self.tamanho_total / (1024 * 1024), 1),
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+        }
+
+# Adiciona as opções do cache a um ArgumentParser
+def adicionar_argumentos_cache(parser):
+    parser.add_argument("--cache", default=DIRETORIO_CACHE,
+                        help=f"Diretório do cache de HTML (padrão: {DIRETORIO_CACHE})")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Não lê nem grava o cache de HTML")
+    parser.add_argument("--cache-ttl", type=float, default=TTL_PADRAO_DIAS,
+                        help=f"Dias até uma página cacheada ser buscada de novo (padrão: {TTL_PADRAO_DIAS})")
+    parser.add_argument("--cache-max-mb", type=int, default=TAMANHO_MAXIMO_PADRAO_MB,
+                        help=f"Tamanho máximo do cache em MB (padrão: {TAMANHO_MAXIMO_PADRAO_MB})")
+    parser.add_argument("--replay", action="store_true",
+                        help="Reprocessa as páginas do cache sem acessar o portal")
+
+# Abre o cache conforme os argumentos (None com --sem-cache)
+def abrir_cache(args):
+    if args.sem_cache:
+        return None
+    return CacheHtml(args.cache, args.cache_ttl, args.cache_max_mb)
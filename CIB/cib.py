@@ -1,8 +1,13 @@
-import requests
 from bs4 import BeautifulSoup
 import time
-import csv
+import argparse
+from itertools import islice
 from datetime import datetime, timedelta
+from coletor import coletar_detalhes, adicionar_argumentos_coleta, opcoes_coleta
+from listagem import coletar_ids
+from delta import (Delta, DigitaisEmpresas, aplicar_delta_csv, aplicar_delta_registros, aplicar_delta_sqlite,
+                   arquivo_vazio, destino_arquivo)
+from saidas import abrir_saida, adicionar_argumento_formato, formato_do_caminho
 
 # URLs base
 URL_PESQUISA_COMPLETA = "https://cib.dpr.gov.br/Home/PesquisaCompleta"
@@ -23,37 +28,13 @@ HEADERS_GET = {
 }
 
 # Função para verificar novos CNPJs
-def verificar_novos_cnpjs(referencia_cnpjs):
+# Percorre todas as páginas da pesquisa (em paralelo, com o maior tamanho de página aceito)
+def verificar_novos_cnpjs(referencia_cnpjs, opcoes):
     print("Verificando novos CNPJs...")
     novos_cnpjs = []
-    payload_post = {
-        "PaginaAtual": 1,
-        "TamanhoPagina": 10,
-        "CodigoProduto": "",
-        "RazaoSocial": "",
-        "CNPJ": "",
-        "CodigoSubdivisaoPais": "",
-        "CodigoPais": "",
-        "CodigoFaixaImportacao": "",
-    }
-    while True:
-        response = requests.post(URL_PESQUISA_COMPLETA, headers=HEADERS_POST, data=payload_post)
-        if response.status_code != 200:
-            print(f"Erro ao acessar página {payload_post['PaginaAtual']}: {response.status_code}")
-            break
-        soup = BeautifulSoup(response.text, 'html.parser')
-        empresas = soup.find_all("div", class_="item-lista")
-        if not empresas:
-            break
-        for empresa in empresas:
-            razao_social = empresa.find("h4").get_text(strip=True)
-            cnpj_id = empresa["data-codigo-empresa"]
-            if cnpj_id not in referencia_cnpjs:
-                novos_cnpjs.append(cnpj_id)
-        # Atualiza a página
-        payload_post["PaginaAtual"] += 1
-        if payload_post["PaginaAtual"] > 10:  # Limita a 10 páginas
-            break
+    for cnpj_id in coletar_ids(URL_PESQUISA_COMPLETA, HEADERS_POST, **opcoes):
+        if str(cnpj_id) not in referencia_cnpjs:
+            novos_cnpjs.append(str(cnpj_id))
     return novos_cnpjs
 
 # Função para extrair dados de uma empresa
@@ -92,43 +73,64 @@ def extrair_dados_empresa(html):
     return dados
 
 # Função para processar todas as empresas
-def processar_empresas(n_empresas):
-    print(f"Processando {n_empresas} empresas...")
-    with open("empresas.csv", "w", newline="", encoding="utf-8") as arquivo_csv:
-        campos = ["Razão Social", "CNPJ", "E-mail", "Website", "Tomador de Decisões", "Faixa de Importação", "Bairro", "Cidade-Estado", "CEP", "Telefone"]
-        escritor = csv.DictWriter(arquivo_csv, fieldnames=campos)
-        escritor.writeheader()
-
-        for empresa_id in range(1, n_empresas + 1):
-            print(f"Processando empresa {empresa_id}...")
-            response = requests.get(URL_DETALHE_EMPRESA + str(empresa_id), headers=HEADERS_GET)
-            if response.status_code == 200:
-                dados = extrair_dados_empresa(response.text)
-                escritor.writerow(dados)
-                print(f"Dados extraídos: {dados}")
-            else:
-                print(f"Erro ao acessar empresa {empresa_id}: {response.status_code}")
-            
-            # Aguarda 1 minuto antes de processar a próxima empresa
-            print("Aguardando 1 minuto para a próxima requisição...")
-            time.sleep(60)
+# Recebe os ids da listagem da pesquisa e compara cada empresa com a coleta anterior: só o que
+# mudou é gravado no arquivo, em qualquer formato
+def processar_empresas(ids, opcoes, caminho="empresas.csv", formato=None):
+    print("Processando as empresas da pesquisa...")
+    formato = formato or formato_do_caminho(caminho)
+    delta = Delta()
+    # Os hashes são os deste script neste arquivo; com o arquivo apagado ou vazio, tudo é gravado de novo
+    with DigitaisEmpresas(destino_arquivo(__file__, caminho)) as digitais:
+        if arquivo_vazio(caminho, formato):
+            digitais.esquecer()
+        for resultado in coletar_detalhes(ids, URL_DETALHE_EMPRESA, HEADERS_GET, **opcoes):
+            digitais.registrar(resultado, extrair_resultado(resultado), delta)
+
+        if formato == "sqlite":
+            aplicar_delta_sqlite(caminho, delta)
+        elif formato == "csv":
+            aplicar_delta_csv(caminho, delta)
+        else:
+            aplicar_delta_registros(caminho, delta, formato)
+        digitais.confirmar(delta)
+    print(f"Mudanças desde a última coleta: {delta.resumo()}")
+
+# Extrai os dados de um resultado da coleta (None quando a requisição falhou)
+def extrair_resultado(resultado):
+    print(f"Processando empresa {resultado.empresa_id}...")
+    if resultado.status != 200:
+        print(f"Erro ao acessar empresa {resultado.empresa_id}: {resultado.status or resultado.erro}")
+        return None
+    dados = extrair_dados_empresa(resultado.html)
+    print(f"Dados extraídos: {dados}")
+    return dados
 
 # Função principal
 def main():
+    parser = argparse.ArgumentParser(description="Extrai os dados das empresas do CIB para um arquivo (CSV, JSONL, Parquet ou SQLite)")
+    adicionar_argumentos_coleta(parser)
+    parser.add_argument("--saida", default="empresas.csv", help="Arquivo de saída (padrão: empresas.csv)")
+    adicionar_argumento_formato(parser)
+    parser.add_argument("--limite", type=int, default=None,
+                        help="Processa no máximo este número de empresas da listagem")
+    args = parser.parse_args()
+    opcoes = opcoes_coleta(args)
+
     referencia_cnpjs = set()
     ultima_verificacao = datetime.now()
 
     while True:
         # Verifica novos CNPJs a cada 7 dias
         if datetime.now() >= ultima_verificacao + timedelta(days=7):
-            novos_cnpjs = verificar_novos_cnpjs(referencia_cnpjs)
+            novos_cnpjs = verificar_novos_cnpjs(referencia_cnpjs, opcoes)
             if novos_cnpjs:
                 print(f"Novos CNPJs encontrados: {novos_cnpjs}")
                 referencia_cnpjs.update(novos_cnpjs)
             ultima_verificacao = datetime.now()
 
-        # Processa todas as empresas
-        processar_empresas(10)
+        # Processa todas as empresas da pesquisa (ou as primeiras `--limite`)
+        ids = islice(coletar_ids(URL_PESQUISA_COMPLETA, HEADERS_POST, **opcoes), args.limite)
+        processar_empresas(ids, opcoes, args.saida, args.formato)
 
         # Aguarda 7 dias antes de verificar novamente
         print("Aguardando 7 dias para a próxima verificação...")
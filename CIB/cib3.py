@@ -1,9 +1,14 @@
-import requests
 import gspread
 import time
 from bs4 import BeautifulSoup
+import argparse
+from itertools import islice
 from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime, timedelta
+from coletor import coletar_detalhes, adicionar_argumentos_coleta, opcoes_coleta
+from listagem import coletar_ids
+from sheets import abrir_destino_gspread
+from delta import Delta, DigitaisEmpresas, aplicar_delta_planilha, destino_planilha, planilha_vazia
 
 # URLs base
 URL_PESQUISA_COMPLETA = "https://cib.dpr.gov.br/Home/PesquisaCompleta"
@@ -30,29 +35,6 @@ def autenticacao_google_sheets():
     client = gspread.authorize(creds)
     return client
 
-# Função para escrever dados no Google Sheets
-def escrever_no_sheets(client, dados, spreadsheet_url):
-    # Abre a planilha pelo URL
-    spreadsheet = client.open_by_url(spreadsheet_url)
-    # Seleciona a primeira aba (sheet)
-    sheet = spreadsheet.sheet1
-
-    # Preenche os dados na próxima linha disponível (supondo que a linha 1 tenha os cabeçalhos)
-    sheet.append_row([
-        dados["Razão Social"],
-        dados["CNPJ"],
-        dados["E-mail"],
-        dados["Website"],
-        dados["Tomador de Decisões"],
-        dados["Faixa de Importação"],
-        dados["Bairro"],
-        dados["Cidade-Estado"],
-        dados["CEP"],
-        dados["Telefone"]
-    ])
-
-    print(f"Dados extraídos com sucesso para a empresa: {dados['Razão Social']}")
-
 # Função para extrair dados de uma empresa
 def extrair_dados_empresa(html):
     soup = BeautifulSoup(html, 'html.parser')
@@ -88,57 +70,51 @@ def extrair_dados_empresa(html):
     return dados
 
 # Função para verificar novos CNPJs
-def verificar_novos_cnpjs(referencia_cnpjs):
+# Percorre todas as páginas da pesquisa (em paralelo, com o maior tamanho de página aceito)
+def verificar_novos_cnpjs(referencia_cnpjs, opcoes):
     print("Verificando novos CNPJs...")
     novos_cnpjs = []
-    payload_post = {
-        "PaginaAtual": 1,
-        "TamanhoPagina": 10,
-        "CodigoProduto": "",
-        "RazaoSocial": "",
-        "CNPJ": "",
-        "CodigoSubdivisaoPais": "",
-        "CodigoPais": "",
-        "CodigoFaixaImportacao": "",
-    }
-    while True:
-        response = requests.post(URL_PESQUISA_COMPLETA, headers=HEADERS_POST, data=payload_post)
-        if response.status_code != 200:
-            print(f"Erro ao acessar página {payload_post['PaginaAtual']}: {response.status_code}")
-            break
-        soup = BeautifulSoup(response.text, 'html.parser')
-        empresas = soup.find_all("div", class_="item-lista")
-        if not empresas:
-            break
-        for empresa in empresas:
-            cnpj_id = empresa["data-codigo-empresa"]
-            if cnpj_id not in referencia_cnpjs:
-                novos_cnpjs.append(cnpj_id)
-        # Atualiza a página
-        payload_post["PaginaAtual"] += 1
-        if payload_post["PaginaAtual"] > 10:  # Limita a 10 páginas
-            break
+    for cnpj_id in coletar_ids(URL_PESQUISA_COMPLETA, HEADERS_POST, **opcoes):
+        if str(cnpj_id) not in referencia_cnpjs:
+            novos_cnpjs.append(str(cnpj_id))
     return novos_cnpjs
 
 # Função para processar as empresas e preencher no Sheets
-def processar_empresas(n_empresas, client, spreadsheet_url):
-    print(f"Processando {n_empresas} empresas...")
-
-    for empresa_id in range(1, n_empresas + 1):
-        print(f"Processando empresa {empresa_id}...")
-        response = requests.get(URL_DETALHE_EMPRESA + str(empresa_id), headers=HEADERS_GET)
-        if response.status_code == 200:
-            dados = extrair_dados_empresa(response.text)
-            escrever_no_sheets(client, dados, spreadsheet_url)
-        else:
-            print(f"Erro ao acessar empresa {empresa_id}: {response.status_code}")
-        
-        # Aguarda 1 minuto antes de processar a próxima empresa
-        print("Aguardando 1 minuto para a próxima requisição...")
-        time.sleep(60)
+# Compara cada empresa com a coleta anterior e só envia para a planilha as linhas que mudaram
+def processar_empresas(ids, client, spreadsheet_url, opcoes):
+    print("Processando as empresas da pesquisa...")
+
+    # Abre a planilha uma única vez para toda a execução
+    destino = abrir_destino_gspread(client, spreadsheet_url)
+    delta = Delta()
+    # Os hashes são os deste script nesta planilha; com a planilha vazia, tudo é enviado de novo
+    with DigitaisEmpresas(destino_planilha(__file__, spreadsheet_url)) as digitais:
+        if planilha_vazia(destino):
+            digitais.esquecer()
+        for resultado in coletar_detalhes(ids, URL_DETALHE_EMPRESA, HEADERS_GET, **opcoes):
+            empresa_id = resultado.empresa_id
+            print(f"Processando empresa {empresa_id}...")
+            dados = None
+            if resultado.status == 200:
+                dados = extrair_dados_empresa(resultado.html)
+                print(f"Dados extraídos com sucesso para a empresa: {dados['Razão Social']}")
+            else:
+                print(f"Erro ao acessar empresa {empresa_id}: {resultado.status or resultado.erro}")
+            digitais.registrar(resultado, dados, delta)
+
+        aplicar_delta_planilha(destino, delta)
+        digitais.confirmar(delta)
+    print(f"Mudanças desde a última coleta: {delta.resumo()}")
 
 # Função principal
 def main():
+    parser = argparse.ArgumentParser(description="Extrai os dados das empresas do CIB para o Google Sheets")
+    adicionar_argumentos_coleta(parser)
+    parser.add_argument("--limite", type=int, default=None,
+                        help="Processa no máximo este número de empresas da listagem")
+    args = parser.parse_args()
+    opcoes = opcoes_coleta(args)
+
     # Realiza a autenticação no Google Sheets
     client = autenticacao_google_sheets()
     
@@ -152,14 +128,15 @@ def main():
     while True:
         # Verifica novos CNPJs a cada 7 dias
         if datetime.now() >= ultima_verificacao + timedelta(days=7):
-            novos_cnpjs = verificar_novos_cnpjs(referencia_cnpjs)
+            novos_cnpjs = verificar_novos_cnpjs(referencia_cnpjs, opcoes)
             if novos_cnpjs:
                 print(f"Novos CNPJs encontrados: {novos_cnpjs}")
                 referencia_cnpjs.update(novos_cnpjs)
             ultima_verificacao = datetime.now()
 
         # Processa as empresas
-        processar_empresas(10, client, spreadsheet_url)
+        ids = islice(coletar_ids(URL_PESQUISA_COMPLETA, HEADERS_POST, **opcoes), args.limite)
+        processar_empresas(ids, client, spreadsheet_url, opcoes)
 
         # Aguarda 7 dias antes de verificar novamente
         print("Aguardando 7 dias para a próxima verificação...")
@@ -1,8 +1,19 @@
-import requests
 import gspread
-import time
+import argparse
+from contextlib import closing
+from itertools import islice
 from bs4 import BeautifulSoup
 from oauth2client.service_account import ServiceAccountCredentials
+from coletor import coletar_detalhes, adicionar_argumentos_coleta, opcoes_coleta
+from sheets import EscritorSheets, abrir_destino_gspread, linha_empresa
+from extracao import extrair_dados_empresa_rapido
+from pipeline import extrair_resultados, adicionar_argumentos_pipeline
+from indice_cnpj import IndiceCnpj, normalizar_cnpj, remover_duplicadas
+from listagem import coletar_ids
+from estado import EstadoCrawl, ARQUIVO_ESTADO, STATUS_OK, STATUS_DUPLICADA, STATUS_ERRO, STATUS_VAZIA
+from cache_html import adicionar_argumentos_cache, abrir_cache
+from saidas import abrir_saida, adicionar_argumento_formato
+from espaco_ids import VarreduraEsparsa, criar_sondador, encontrar_maior_id, dados_vazios, STATUS_HTTP_VAZIOS
 
 # URLs base
 URL_PESQUISA_COMPLETA = "https://cib.dpr.gov.br/Home/PesquisaCompleta"
@@ -30,26 +41,9 @@ def autenticacao_google_sheets():
     return client
 
 # Função para escrever dados no Google Sheets
-def escrever_no_sheets(client, dados, spreadsheet_url):
-    # Abre a planilha pelo URL
-    spreadsheet = client.open_by_url(spreadsheet_url)
-    # Seleciona a primeira aba (sheet)
-    sheet = spreadsheet.sheet1
-
-    # Preenche os dados na próxima linha disponível (supondo que a linha 1 tenha os cabeçalhos)
-    sheet.append_row([ 
-        dados["Razão Social"],
-        dados["CNPJ"],
-        dados["E-mail"],
-        dados["Website"],
-        dados["Tomador de Decisões"],
-        dados["Faixa de Importação"],
-        dados["Bairro"],
-        dados["Cidade-Estado"],
-        dados["CEP"],
-        dados["Telefone"]
-    ])
-
+# A linha vai para o buffer do escritor e é enviada junto com o lote
+def escrever_no_sheets(escritor, dados, marcador=None):
+    escritor.adicionar(linha_empresa(dados), marcador)
     print(f"Dados extraídos com sucesso para a empresa: {dados['Razão Social']}")
 
 # Função para extrair dados de uma empresa
@@ -86,110 +80,157 @@ def extrair_dados_empresa(html):
 
     return dados
 
-# Função para verificar novos CNPJs
-def verificar_novos_cnpjs():
-    print("Verificando novos CNPJs...")
-    novos_cnpjs = []
-    
-    # Faz a requisição para verificar o número de empresas
-    payload_post = {
-        "PaginaAtual": 1,
-        "TamanhoPagina": 10,
-        "CodigoProduto": "",
-        "RazaoSocial": "",
-        "CNPJ": "",
-        "CodigoSubdivisaoPais": "",
-        "CodigoPais": "",
-        "CodigoFaixaImportacao": "",
-    }
-    
-    response = requests.post(URL_PESQUISA_COMPLETA, headers=HEADERS_POST, data=payload_post)
-    if response.status_code != 200:
-        print(f"Erro ao acessar página de pesquisa: {response.status_code}")
-        return [], 0
-
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    # Extrair o número total de empresas encontradas
-    total_empresas = soup.find("h4", string=lambda text: text and "empresas encontradas" in text)
-    if total_empresas:
-        total_empresas = int(total_empresas.get_text().split()[0])
-        print(f"Total de empresas encontradas: {total_empresas}")
-
-    # Processar até 10 empresas da primeira página
-    empresas = soup.find_all("div", class_="item-lista")
-    for empresa in empresas[:10]:  # Limita a verificação para até 10 empresas
-        cnpj_id = empresa["data-codigo-empresa"]
-        novos_cnpjs.append(cnpj_id)
-
-    return novos_cnpjs, total_empresas
-
-# Função para remover CNPJ da planilha
-def remover_cnpj_da_planilha(client, cnpj):
-    spreadsheet = client.open_by_url('https://docs.google.com/spreadsheets/d/1ckiMKo0NRFyDFC99pSiO5rMqD5UDeemQ6IGXKTmiRF4/edit?gid=0#gid=0')
-    sheet = spreadsheet.sheet1
-    cell = sheet.find(cnpj)
-    
-    if cell:
-        row = cell.row
-        sheet.delete_row(row)
-        print(f"CNPJ {cnpj} encontrado e removido da planilha.")
+# Modos de extração: "bs4" é o original, "rapido" percorre o HTML uma única vez (mesmo resultado)
+EXTRATORES = {
+    "bs4": extrair_dados_empresa,
+    "rapido": extrair_dados_empresa_rapido,
+}
+
+# Função para listar os ids de todas as empresas da pesquisa
+# Os ids saem conforme as páginas chegam, então a coleta dos detalhes começa antes de a listagem terminar
+def verificar_novos_cnpjs(opcoes, info=None):
+    print("Listando as empresas da pesquisa...")
+    return coletar_ids(URL_PESQUISA_COMPLETA, HEADERS_POST, info=info, **opcoes)
+
+# Função para varrer o espaço de ids do DetalheEmpresaPartial sem depender da listagem
+# Descobre o maior id válido e devolve um gerador que pula as faixas sem empresa;
+# os ids já concluídos no estado (inclusive os vazios) não são buscados de novo
+def varrer_ids(estado, opcoes, max_tentativas=None):
+    print("Procurando o maior id de empresa...")
+    maior = encontrar_maior_id(criar_sondador(URL_DETALHE_EMPRESA, HEADERS_GET, estado, **opcoes))
+    if maior is None:
+        print("Nenhuma empresa encontrada no início do espaço de ids.")
+        return VarreduraEsparsa(0)
+    return VarreduraEsparsa(maior, conhecidos=estado.concluidos(max_tentativas=max_tentativas))
+
+# Função para remover da planilha as linhas com CNPJ repetido
+# Usa o índice local para achar as linhas e apaga todas em um único batchUpdate
+def remover_duplicadas_da_planilha(worksheet, indice):
+    removidas = remover_duplicadas(worksheet, indice)
+    if removidas:
+        print(f"{removidas} linhas com CNPJ repetido removidas da planilha.")
     else:
-        print(f"CNPJ {cnpj} não encontrado na planilha.")
+        print("Nenhum CNPJ repetido na planilha.")
 
 # Função para processar as empresas e preencher no Sheets
-def processar_empresas(n_empresas, client, spreadsheet_url, cnpjs_processados):
-    print(f"Processando {n_empresas} empresas...")
-
-    for empresa_id in range(1, min(n_empresas, 10) + 1):  # Limita para processar até 10 empresas
-        print(f"Processando empresa {empresa_id}...")
-        response = requests.get(URL_DETALHE_EMPRESA + str(empresa_id), headers=HEADERS_GET)
-        if response.status_code == 200:
-            dados = extrair_dados_empresa(response.text)
-            # Verifica se o CNPJ já foi processado
-            cnpj_extraido = dados["CNPJ"].replace("CNPJ", "").strip()
-            if cnpj_extraido not in cnpjs_processados:
-                escrever_no_sheets(client, dados, spreadsheet_url)
-                cnpjs_processados.add(cnpj_extraido)
-                # Salva o CNPJ no arquivo de texto
-                with open("cnpjs_extraidos.txt", "a") as file:
-                    file.write(cnpj_extraido + "\n")
+# Só busca os ids que ainda não foram concluídos no estado, então uma execução
+# interrompida continua de onde parou
+def processar_empresas(ids, client, spreadsheet_url, estado, args, cache=None):
+    opcoes = opcoes_coleta(args)
+    extrator = EXTRATORES[args.parser]
+
+    # Abre a planilha uma única vez para toda a execução e monta o índice de CNPJs com uma leitura só
+    destino = abrir_destino_gspread(client, spreadsheet_url)
+    indice = IndiceCnpj.carregar(destino.worksheet)
+    if args.limpar_duplicadas:
+        remover_duplicadas_da_planilha(destino.worksheet, indice)
+    cnpjs_processados = {normalizar_cnpj(cnpj) for cnpj in estado.cnpjs_processados()}
+
+    if isinstance(ids, VarreduraEsparsa):
+        # A varredura já pula os ids concluídos e precisa ver cada resultado para decidir os saltos
+        varredura = ids
+        resultados = varredura.acompanhar(
+            coletar_detalhes(islice(varredura, args.limite), URL_DETALHE_EMPRESA, HEADERS_GET, cache=cache, **opcoes))
+    else:
+        ids = estado.pendentes(islice(ids, args.limite), max_tentativas=args.max_tentativas)
+        resultados = coletar_detalhes(ids, URL_DETALHE_EMPRESA, HEADERS_GET, cache=cache, **opcoes)
+    # A empresa só é marcada como concluída no estado depois que o lote com a linha dela foi gravado
+    # O closing encerra a coleta (e a varredura) mesmo se o laço sair no meio por um erro ou Ctrl-C
+    with closing(resultados), EscritorSheets(destino, ao_gravar=estado.registrar_varios) as escritor:
+        for resultado, dados in extrair_resultados(resultados, extrator, args.processos):
+            empresa_id = resultado.empresa_id
+            print(f"Processando empresa {empresa_id}...")
+            if resultado.status in STATUS_HTTP_VAZIOS or (dados is not None and dados_vazios(dados)):
+                # Id sem empresa: fica marcado para não ser buscado de novo
+                estado.registrar(empresa_id, STATUS_VAZIA, resultado.status)
+            elif dados is not None:
+                # Verifica se o CNPJ já está na planilha ou no estado antes de escrever
+                cnpj_extraido = dados["CNPJ"].replace("CNPJ", "").strip()
+                cnpj = normalizar_cnpj(cnpj_extraido)
+                if not cnpj or (cnpj not in indice and cnpj not in cnpjs_processados):
+                    escrever_no_sheets(escritor, dados, (empresa_id, STATUS_OK, resultado.status, cnpj_extraido))
+                    indice.registrar_anexada(cnpj)
+                    cnpjs_processados.add(cnpj)
+                else:
+                    print(f"CNPJ já encontrado na planilha/estado, ignorando: {cnpj_extraido}")
+                    estado.registrar(empresa_id, STATUS_DUPLICADA, resultado.status, cnpj_extraido)
             else:
-                print(f"CNPJ já encontrado na planilha/txt, removendo: {cnpj_extraido}")
-                # Remove o CNPJ duplicado da planilha
-                remover_cnpj_da_planilha(client, cnpj_extraido)
-        else:
-            print(f"Erro ao acessar empresa {empresa_id}: {response.status_code}")
-        
-        # Aguarda 1 minuto antes de processar a próxima empresa
-        print("Aguardando 1 minuto para a próxima requisição...")
-        time.sleep(60)
+                print(f"Erro ao acessar empresa {empresa_id}: {resultado.erro or resultado.status}")
+                estado.registrar(empresa_id, STATUS_ERRO, resultado.status)
+
+    print(f"Situação da coleta: {estado.resumo()}")
+
+# Função para reprocessar todas as páginas do cache sem acessar o portal nem o Sheets
+# Útil depois de mudar a extração ou as colunas: grava o resultado em um arquivo (CSV, JSONL, Parquet ou SQLite)
+def reprocessar_cache(cache, args):
+    extrator = EXTRATORES[args.parser]
+    print(f"Reprocessando as páginas do cache em {args.cache}...")
+    with abrir_saida(args.saida_replay, args.formato) as saida:
+        for resultado, dados in extrair_resultados(cache.resultados(URL_DETALHE_EMPRESA), extrator, args.processos):
+            if resultado.status == 200 and dados is not None and not dados_vazios(dados):
+                saida.gravar(dados)
+    print(f"{saida.gravados} empresas gravadas em {args.saida_replay}")
 
 # Função principal
 def main():
+    parser = argparse.ArgumentParser(description="Extrai os dados das empresas do CIB para o Google Sheets")
+    adicionar_argumentos_coleta(parser)
+    adicionar_argumentos_pipeline(parser)
+    adicionar_argumentos_cache(parser)
+    parser.add_argument("--parser", choices=EXTRATORES, default="rapido",
+                        help="Modo de extração do HTML (padrão: rapido)")
+    parser.add_argument("--estado", default=ARQUIVO_ESTADO,
+                        help=f"Banco SQLite com o estado da coleta (padrão: {ARQUIVO_ESTADO})")
+    parser.add_argument("--max-tentativas", type=int, default=3,
+                        help="Tentativas por empresa antes de desistir dela (padrão: 3)")
+    parser.add_argument("--limpar-duplicadas", action="store_true",
+                        help="Remove da planilha as linhas com CNPJ repetido antes de começar")
+    parser.add_argument("--limite", type=int, default=None,
+                        help="Processa no máximo este número de empresas da listagem")
+    parser.add_argument("--fonte-ids", choices=["listagem", "varredura"], default="listagem",
+                        help="De onde vêm os ids: a listagem da pesquisa ou a varredura esparsa "
+                             "do DetalheEmpresaPartial (padrão: listagem)")
+    parser.add_argument("--saida-replay", default="empresas_replay.csv",
+                        help="Arquivo gerado pelo modo --replay (padrão: empresas_replay.csv)")
+    adicionar_argumento_formato(parser)
+    args = parser.parse_args()
+
+    cache = abrir_cache(args)
+    if args.replay:
+        if cache is None:
+            parser.error("--replay precisa do cache (não use --sem-cache)")
+        reprocessar_cache(cache, args)
+        cache.fechar()
+        return
+
     # Realiza a autenticação no Google Sheets
     client = autenticacao_google_sheets()
 
     # URL da planilha
     spreadsheet_url = 'https://docs.google.com/spreadsheets/d/1ckiMKo0NRFyDFC99pSiO5rMqD5UDeemQ6IGXKTmiRF4/edit?gid=0#gid=0'
 
-    # Carrega os CNPJs já processados do arquivo
-    cnpjs_processados = set()
-    try:
-        with open("cnpjs_extraidos.txt", "r") as file:
-            cnpjs_processados = set(file.read().splitlines())
-    except FileNotFoundError:
-        print("Arquivo de CNPJs não encontrado, criando novo arquivo...")
-
-    # Verifica se há novos CNPJs
-    novos_cnpjs, total_empresas = verificar_novos_cnpjs()
-    
-    if total_empresas > 7467:  # Número de empresas aumentou, há novos CNPJs
-        processar_empresas(total_empresas, client, spreadsheet_url, cnpjs_processados)
+    # Abre o estado da coleta e importa os CNPJs do antigo cnpjs_extraidos.txt, se existir
+    estado = EstadoCrawl(args.estado)
+    importados = estado.importar_cnpjs_txt("cnpjs_extraidos.txt")
+    if importados:
+        print(f"{importados} CNPJs importados de cnpjs_extraidos.txt")
+
+    # Lista todas as empresas da pesquisa (ou varre o espaço de ids) e envia os ids direto para a coleta dos detalhes
+    info = {}
+    if args.fonte_ids == "varredura":
+        ids = varrer_ids(estado, opcoes_coleta(args), args.max_tentativas)
     else:
-        print("Nenhum novo CNPJ encontrado.")
-        input("Se deseja processar as 7467 empresas existentes, aperte Enter...")
-        processar_empresas(7467, client, spreadsheet_url, cnpjs_processados)
+        ids = verificar_novos_cnpjs(opcoes_coleta(args), info)
+    processar_empresas(ids, client, spreadsheet_url, estado, args, cache)
+    if isinstance(ids, VarreduraEsparsa):
+        print(f"Ids pulados na varredura: {ids.pulados}")
+    if info.get("paginas_com_erro"):
+        print(f"Páginas da pesquisa que falharam: {info['paginas_com_erro']}")
+
+    if cache is not None:
+        print(f"Cache de HTML: {cache.resumo()}")
+        cache.fechar()
+    estado.fechar()
 
 # Executa a função principal
 if __name__ == "__main__":
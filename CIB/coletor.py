@@ -0,0 +1,216 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import aiohttp
+
+from resiliencia import (ControleAdaptativo, Disjuntor, STATUS_REPETIVEIS, TENTATIVAS_PADRAO,
+                         espera_backoff, ler_retry_after)
+
+# Valores padrão da coleta (podem ser alterados a cada execução pela linha de comando)
+TAXA_PADRAO = 0.5  # requisições por segundo
+RAJADA_PADRAO = 2  # requisições que podem sair de uma vez antes de a taxa valer
+CONCORRENCIA_PADRAO = 4  # requisições em andamento ao mesmo tempo
+TIMEOUT_PADRAO = 30  # segundos
+FATOR_TAXA_MAXIMA = 2  # até quanto acima de --taxa o ajuste automático pode subir (sem --taxa-maxima)
+FATOR_TAXA_MINIMA = 16  # até quanto abaixo de --taxa o ajuste automático pode descer
+
+# Resultado de uma requisição de detalhe (status e html ficam None quando a conexão falha)
+ResultadoBusca = namedtuple("ResultadoBusca", ["empresa_id", "status", "html", "erro"])
+
+# Limitador de taxa no formato "token bucket": o balde começa cheio com `rajada` fichas
+# e é reabastecido com `taxa` fichas por segundo; cada requisição consome uma ficha
+class LimitadorTaxa:
+    def __init__(self, taxa, rajada=1):
+        if taxa <= 0:
+            raise ValueError("A taxa de requisições deve ser maior que zero")
+        self.taxa = taxa
+        self.rajada = max(1, int(rajada))
+        self._fichas = float(self.rajada)
+        self._ultima_reposicao = time.monotonic()
+        self._trava = asyncio.Lock()
+
+    def _repor(self):
+        agora = time.monotonic()
+        decorrido = agora - self._ultima_reposicao
+        self._fichas = min(self.rajada, self._fichas + decorrido * self.taxa)
+        self._ultima_reposicao = agora
+
+    # Aguarda até haver uma ficha disponível (as requisições são atendidas em ordem de chegada)
+    async def adquirir(self):
+        async with self._trava:
+            self._repor()
+            if self._fichas < 1:
+                await asyncio.sleep((1 - self._fichas) / self.taxa)
+                self._repor()
+            self._fichas -= 1
+
+# Função para buscar os detalhes das empresas de forma assíncrona
+# Mantém no máximo `concorrencia` requisições em andamento e devolve os resultados conforme chegam.
+# `ids` pode ser qualquer iterável, inclusive um gerador síncrono que bloqueia esperando
+# novos ids (ex.: a listagem da pesquisa); ele é consumido fora do laço de eventos.
+# Com `cache` (cache_html.CacheHtml), as páginas cacheadas não passam pela rede nem pelo limitador.
+# Respostas 429/5xx e falhas de conexão são repetidas até `tentativas` vezes (resiliencia.py);
+# `controle` ajusta a taxa do limitador e `disjuntor` pausa tudo quando o portal cai.
+async def buscar_detalhes(ids, url_base, headers, limitador, concorrencia=CONCORRENCIA_PADRAO, timeout=TIMEOUT_PADRAO,
+                          cache=None, tentativas=TENTATIVAS_PADRAO, controle=None, disjuntor=None):
+    ids = iter(ids)
+    fim_ids = object()
+    trava_ids = asyncio.Lock()
+    saida = asyncio.Queue(maxsize=concorrencia)
+    conector = aiohttp.TCPConnector(limit=concorrencia)
+    tempo_limite = aiohttp.ClientTimeout(total=timeout)
+
+    async def proximo_id():
+        async with trava_ids:
+            return await asyncio.to_thread(next, ids, fim_ids)
+
+    async with aiohttp.ClientSession(headers=headers, connector=conector, timeout=tempo_limite) as sessao:
+        async def buscar_com_repeticao(empresa_id, url):
+            for tentativa in range(1, tentativas + 1):
+                teste = disjuntor is not None and await disjuntor.aguardar()
+                try:
+                    await limitador.adquirir()
+                    inicio = time.monotonic()
+                    retry_after = None
+                    try:
+                        async with sessao.get(url) as resposta:
+                            html = await resposta.text()
+                            retry_after = ler_retry_after(resposta.headers.get("Retry-After"))
+                            resultado = ResultadoBusca(empresa_id, resposta.status, html, None)
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as erro:
+                        resultado = ResultadoBusca(empresa_id, None, None, erro)
+
+                    if resultado.status is not None and resultado.status not in STATUS_REPETIVEIS:
+                        if controle is not None:
+                            controle.sucesso(time.monotonic() - inicio)
+                        if disjuntor is not None:
+                            await disjuntor.sucesso()
+                        return resultado
+
+                    if controle is not None:
+                        controle.sobrecarga(f"HTTP {resultado.status}" if resultado.status else type(resultado.erro).__name__)
+                    if disjuntor is not None:
+                        await disjuntor.falha()
+                finally:
+                    if teste:
+                        await disjuntor.encerrar_teste()
+                if tentativa < tentativas:
+                    await asyncio.sleep(retry_after if retry_after is not None else espera_backoff(tentativa))
+            return resultado
+
+        async def trabalhador():
+            while (empresa_id := await proximo_id()) is not fim_ids:
+                url = url_base + str(empresa_id)
+                if cache is not None and (guardado := await asyncio.to_thread(cache.obter, url)) is not None:
+                    await saida.put(ResultadoBusca(empresa_id, guardado[0], guardado[1], None))
+                    continue
+                resultado = await buscar_com_repeticao(empresa_id, url)
+                if cache is not None and resultado.status is not None:
+                    await asyncio.to_thread(cache.gravar, url, resultado.status, resultado.html)
+                await saida.put(resultado)
+
+        async def encerrar():
+            try:
+                await asyncio.gather(*tarefas)
+            finally:
+                await saida.put(None)
+
+        tarefas = [asyncio.create_task(trabalhador()) for _ in range(concorrencia)]
+        finalizador = asyncio.create_task(encerrar())
+        try:
+            while True:
+                resultado = await saida.get()
+                if resultado is None:
+                    break
+                yield resultado
+            # Propaga erros inesperados dos trabalhadores
+            await finalizador
+        finally:
+            for tarefa in tarefas + [finalizador]:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, finalizador, return_exceptions=True)
+
+# Coloca um item na fila síncrona sem travar para sempre se o consumidor desistir
+def _entregar(fila, item, parar):
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+# Consome um gerador assíncrono a partir de código síncrono
+# O laço de eventos roda em uma thread separada e a fila limitada segura o gerador
+# quando quem consome os itens está mais lento
+def iterar_em_thread(criar_gerador, tamanho_fila, nome="coletor-cib"):
+    fila = queue.Queue(maxsize=tamanho_fila)
+    parar = threading.Event()
+    fim = object()
+    erros = []
+
+    async def produzir():
+        async for item in criar_gerador():
+            if not await asyncio.to_thread(_entregar, fila, item, parar):
+                break
+
+    def rodar():
+        try:
+            asyncio.run(produzir())
+        except Exception as erro:
+            erros.append(erro)
+        finally:
+            _entregar(fila, fim, parar)
+
+    thread = threading.Thread(target=rodar, name=nome, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = fila.get()
+            if item is fim:
+                break
+            yield item
+        if erros:
+            raise erros[0]
+    finally:
+        parar.set()
+        thread.join()
+
+# Cria o limitador com o ajuste automático de taxa e o disjuntor de uma coleta
+# (precisa ser chamada dentro do laço de eventos que vai usá-los)
+def criar_controles(taxa, rajada, taxa_maxima=None):
+    limitador = LimitadorTaxa(taxa, rajada)
+    controle = ControleAdaptativo(limitador, taxa / FATOR_TAXA_MINIMA, taxa_maxima or taxa * FATOR_TAXA_MAXIMA)
+    return limitador, controle, Disjuntor()
+
+# Versão síncrona de buscar_detalhes, para ser usada nos laços dos scripts
+def coletar_detalhes(ids, url_base, headers, taxa=TAXA_PADRAO, rajada=RAJADA_PADRAO,
+                     concorrencia=CONCORRENCIA_PADRAO, timeout=TIMEOUT_PADRAO, cache=None,
+                     taxa_maxima=None, tentativas=TENTATIVAS_PADRAO):
+    def criar_gerador():
+        limitador, controle, disjuntor = criar_controles(taxa, rajada, taxa_maxima)
+        return buscar_detalhes(ids, url_base, headers, limitador, concorrencia, timeout, cache,
+                               tentativas, controle, disjuntor)
+
+    return iterar_em_thread(criar_gerador, concorrencia * 2)
+
+# Adiciona as opções de coleta a um ArgumentParser
+def adicionar_argumentos_coleta(parser):
+    parser.add_argument("--taxa", type=float, default=TAXA_PADRAO,
+                        help=f"Requisições por segundo (padrão: {TAXA_PADRAO})")
+    parser.add_argument("--rajada", type=int, default=RAJADA_PADRAO,
+                        help=f"Requisições permitidas de uma vez (padrão: {RAJADA_PADRAO})")
+    parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA_PADRAO,
+                        help=f"Requisições em andamento ao mesmo tempo (padrão: {CONCORRENCIA_PADRAO})")
+    parser.add_argument("--taxa-maxima", type=float, default=None,
+                        help=f"Taxa máxima do ajuste automático, em req/s (padrão: {FATOR_TAXA_MAXIMA}x --taxa)")
+    parser.add_argument("--tentativas", type=int, default=TENTATIVAS_PADRAO,
+                        help=f"Tentativas por requisição em caso de 429/5xx ou falha de conexão (padrão: {TENTATIVAS_PADRAO})")
+
+# Monta o dicionário de opções para coletar_detalhes a partir dos argumentos
+def opcoes_coleta(args):
+    return {"taxa": args.taxa, "rajada": args.rajada, "concorrencia": args.concorrencia,
+            "taxa_maxima": args.taxa_maxima, "tentativas": args.tentativas}
@@ -0,0 +1,272 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+from extracao import CAMPOS
+from espaco_ids import STATUS_HTTP_VAZIOS, dados_vazios
+from indice_cnpj import LINHAS_CABECALHO, IndiceCnpj, normalizar_cnpj
+from saidas import SaidaJsonl, SaidaSqlite, abrir_saida, ler_registros
+from sheets import EscritorSheets, INTERVALOS_POR_CHAMADA, chamar_com_repeticao, linha_empresa
+
+# Detecção de mudanças entre coletas do CIB
+# Cada empresa_id guarda um hash por campo do último registro gravado. Uma nova coleta
+# compara os registros com esses hashes e monta um delta (inserções, atualizações e
+# remoções); só o delta é aplicado no destino, linha a linha, e os hashes são atualizados
+# depois que o destino aceitou as mudanças.
+# Os hashes são guardados por destino (script + planilha ou arquivo): o mesmo banco serve aos
+# scripts cib*.py, e uma troca de arquivo, de formato ou de planilha começa sem hashes, com
+# todas as empresas como inserções (as que já estão no destino viram reescrita da linha).
+
+ARQUIVO_DIGITAIS = "cib_digitais.db"
+
+# A tabela `digitais` antiga (sem destino) não é mais lida
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS digitais_destino (
+    destino TEXT NOT NULL,
+    empresa_id INTEGER NOT NULL,
+    cnpj TEXT,
+    campos TEXT NOT NULL,
+    atualizado_em TEXT,
+    PRIMARY KEY (destino, empresa_id)
+);
+"""
+
+# Destino de um arquivo de saída ("cib.py", "empresas.csv" -> "cib.py|arquivo:/caminho/empresas.csv")
+def destino_arquivo(script, caminho):
+    return f"{os.path.basename(script)}|arquivo:{os.path.abspath(caminho)}"
+
+# Destino de uma planilha; aceita a URL ou o id (com ou sem "/edit..." no fim) e a aba, se houver
+def destino_planilha(script, planilha, aba=None):
+    encontrado = re.search(r"/d/([\w-]+)", planilha)
+    identificador = encontrado.group(1) if encontrado else re.match(r"[\w-]*", planilha).group(0)
+    return f"{os.path.basename(script)}|planilha:{identificador}" + (f"!{aba}" if aba else "")
+
+# O arquivo de saída ainda não tem empresa nenhuma (não existe, está vazio ou só tem o cabeçalho)
+def arquivo_vazio(caminho, formato="csv"):
+    if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+        return True
+    if formato == "sqlite":
+        conexao = sqlite3.connect(caminho)
+        try:
+            return conexao.execute('SELECT 1 FROM "empresas" LIMIT 1').fetchone() is None
+        except sqlite3.OperationalError:
+            return True
+        finally:
+            conexao.close()
+    if formato in ("jsonl", "parquet"):
+        return not ler_registros(caminho, formato)
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        leitor = csv.reader(arquivo)
+        next(leitor, None)
+        return next(leitor, None) is None
+
+# A planilha (destino de sheets.py) não tem nenhuma empresa abaixo do cabeçalho
+def planilha_vazia(destino):
+    return not any(chamar_com_repeticao(destino.ler_cnpjs)[LINHAS_CABECALHO:])
+
+# Hash curto de cada campo do registro
+def digitais_campos(dados):
+    return {campo: hashlib.blake2b(dados[campo].encode("utf-8"), digest_size=8).hexdigest() for campo in CAMPOS}
+
+# Mudanças de uma coleta em relação à anterior
+# insercoes: (empresa_id, dados); atualizacoes: (empresa_id, dados, campos alterados, cnpj anterior);
+# remocoes: (empresa_id, cnpj anterior)
+class Delta:
+    def __init__(self):
+        self.insercoes = []
+        self.atualizacoes = []
+        self.remocoes = []
+        self.iguais = 0
+
+    def vazio(self):
+        return not (self.insercoes or self.atualizacoes or self.remocoes)
+
+    def resumo(self):
+        return {
+            "inseridas": len(self.insercoes),
+            "atualizadas": len(self.atualizacoes),
+            "removidas": len(self.remocoes),
+            "iguais": self.iguais,
+        }
+
+class DigitaisEmpresas:
+    def __init__(self, destino, caminho=ARQUIVO_DIGITAIS):
+        self.destino = destino
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # Apaga os hashes deste destino; para quando o destino foi apagado ou recriado vazio,
+    # senão as empresas iguais à coleta anterior nunca voltariam para ele
+    def esquecer(self):
+        with self.conexao:
+            apagadas = self.conexao.execute("DELETE FROM digitais_destino WHERE destino = ?", (self.destino,)).rowcount
+        if apagadas:
+            print(f"Destino vazio: {apagadas} empresas serão gravadas de novo")
+
+    def _anterior(self, empresa_id):
+        linha = self.conexao.execute(
+            "SELECT cnpj, campos FROM digitais_destino WHERE destino = ? AND empresa_id = ?", (self.destino, empresa_id)
+        ).fetchone()
+        return (linha[0], json.loads(linha[1])) if linha else None
+
+    # Compara o resultado de uma busca com o registro anterior e anota a diferença no delta
+    # (falhas de conexão e erros HTTP não mudam nada; 404 ou página sem dados contam como remoção)
+    def registrar(self, resultado, dados, delta):
+        empresa_id = resultado.empresa_id
+        anterior = self._anterior(empresa_id)
+        if resultado.status in STATUS_HTTP_VAZIOS or (dados is not None and dados_vazios(dados)):
+            if anterior is not None:
+                print(f"Empresa {empresa_id} não existe mais no portal")
+                delta.remocoes.append((empresa_id, anterior[0]))
+            return
+        if dados is None:
+            return
+        if anterior is None:
+            delta.insercoes.append((empresa_id, dados))
+            return
+        atuais = digitais_campos(dados)
+        alterados = [campo for campo in CAMPOS if atuais[campo] != anterior[1].get(campo)]
+        if alterados:
+            print(f"Empresa {empresa_id} alterada: {', '.join(alterados)}")
+            delta.atualizacoes.append((empresa_id, dados, alterados, anterior[0]))
+        else:
+            delta.iguais += 1
+
+    # Grava os hashes do delta já aplicado no destino
+    def confirmar(self, delta):
+        agora = datetime.now().isoformat(timespec="seconds")
+        gravar = [(empresa_id, dados) for empresa_id, dados in delta.insercoes]
+        gravar += [(empresa_id, dados) for empresa_id, dados, _, _ in delta.atualizacoes]
+        with self.conexao:
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO digitais_destino (destino, empresa_id, cnpj, campos, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(self.destino, empresa_id, dados["CNPJ"], json.dumps(digitais_campos(dados)), agora)
+                 for empresa_id, dados in gravar],
+            )
+            self.conexao.executemany(
+                "DELETE FROM digitais_destino WHERE destino = ? AND empresa_id = ?",
+                [(self.destino, empresa_id) for empresa_id, _ in delta.remocoes],
+            )
+
+# Separa o delta em linhas a reescrever ({numero: dados}), linhas a apagar e registros novos,
+# localizando as linhas pelo CNPJ. Uma inserção cujo CNPJ já está no destino (ex.: primeira
+# coleta com hashes vazios) vira atualização da linha existente, sem duplicar.
+def _localizar(delta, indice):
+    reescrever = {}
+    novos = []
+    for empresa_id, dados in delta.insercoes:
+        numero = indice.linha(dados["CNPJ"]) if normalizar_cnpj(dados["CNPJ"]) else None
+        if numero is None:
+            novos.append(dados)
+        else:
+            reescrever[numero] = dados
+    for empresa_id, dados, _, cnpj_anterior in delta.atualizacoes:
+        numero = indice.linha(cnpj_anterior or "") or indice.linha(dados["CNPJ"])
+        if numero is None:
+            novos.append(dados)
+        else:
+            reescrever[numero] = dados
+    apagar = []
+    for empresa_id, cnpj_anterior in delta.remocoes:
+        apagar.extend(indice.linhas.get(normalizar_cnpj(cnpj_anterior), []))
+    return reescrever, apagar, novos
+
+# Aplica o delta em uma planilha (destinos de sheets.py): reescreve só as linhas alteradas,
+# apaga as removidas em um batchUpdate e anexa as novas em lote
+def aplicar_delta_planilha(destino, delta):
+    if delta.vazio():
+        print("Nenhuma mudança para gravar na planilha.")
+        return
+    indice = IndiceCnpj(chamar_com_repeticao(destino.ler_cnpjs))
+    reescrever, apagar, novos = _localizar(delta, indice)
+
+    linhas = sorted(reescrever.items())
+    for inicio in range(0, len(linhas), INTERVALOS_POR_CHAMADA):
+        lote = {numero: linha_empresa(dados) for numero, dados in linhas[inicio:inicio + INTERVALOS_POR_CHAMADA]}
+        chamar_com_repeticao(lambda: destino.atualizar(lote))
+    if apagar:
+        chamar_com_repeticao(lambda: destino.remover(apagar))
+    with EscritorSheets(destino) as escritor:
+        for dados in novos:
+            escritor.adicionar(linha_empresa(dados))
+    print(f"Planilha: {len(reescrever)} linhas reescritas, {len(apagar)} apagadas, {len(novos)} anexadas")
+
+# Aplica o delta em um CSV: só inserções são anexadas ao fim; com atualizações ou
+# remoções o arquivo é reescrito de uma vez (em um temporário, trocado no final)
+def aplicar_delta_csv(caminho, delta):
+    if delta.vazio():
+        print(f"Nenhuma mudança para gravar em {caminho}.")
+        return
+    linhas = []
+    if os.path.exists(caminho):
+        with open(caminho, newline="", encoding="utf-8") as arquivo:
+            linhas = list(csv.DictReader(arquivo))
+    # Índice no mesmo formato da planilha: a linha 1 é o cabeçalho
+    indice = IndiceCnpj(["CNPJ"] + [linha.get("CNPJ", "") for linha in linhas])
+    reescrever, apagar, novos = _localizar(delta, indice)
+
+    if not reescrever and not apagar and os.path.exists(caminho):
+        with open(caminho, "a", newline="", encoding="utf-8") as arquivo:
+            csv.DictWriter(arquivo, fieldnames=CAMPOS).writerows(novos)
+    else:
+        for numero, dados in reescrever.items():
+            linhas[numero - 2] = dados
+        apagadas = set(apagar)
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=CAMPOS, extrasaction="ignore")
+            escritor.writeheader()
+            escritor.writerows(linha for numero, linha in enumerate(linhas, start=2) if numero not in apagadas)
+            escritor.writerows(novos)
+        os.replace(temporario, caminho)
+    print(f"{caminho}: {len(reescrever)} linhas reescritas, {len(apagar)} apagadas, {len(novos)} anexadas")
+
+# Aplica o delta em um arquivo JSONL ou Parquet: em JSONL, só inserções são anexadas ao fim;
+# nos outros casos (e sempre em Parquet, que não aceita anexar) o arquivo é reescrito de uma vez
+def aplicar_delta_registros(caminho, delta, formato):
+    if delta.vazio():
+        print(f"Nenhuma mudança para gravar em {caminho}.")
+        return
+    registros = ler_registros(caminho, formato)
+    indice = IndiceCnpj(["CNPJ"] + [dados.get("CNPJ", "") for dados in registros])
+    reescrever, apagar, novos = _localizar(delta, indice)
+
+    if formato == "jsonl" and not reescrever and not apagar:
+        with SaidaJsonl(caminho, anexar=True) as saida:
+            saida.gravar_varios(novos)
+    else:
+        for numero, dados in reescrever.items():
+            registros[numero - 2] = dados
+        apagados = set(apagar)
+        temporario = caminho + ".tmp"
+        with abrir_saida(temporario, formato) as saida:
+            saida.gravar_varios(dados for numero, dados in enumerate(registros, start=2) if numero not in apagados)
+            saida.gravar_varios(novos)
+        os.replace(temporario, caminho)
+    print(f"{caminho}: {len(reescrever)} linhas reescritas, {len(apagar)} apagadas, {len(novos)} anexadas")
+
+# Aplica o delta em um banco SQLite de saidas.py: upsert das novas e alteradas, delete das removidas
+def aplicar_delta_sqlite(caminho, delta):
+    if delta.vazio():
+        print(f"Nenhuma mudança para gravar em {caminho}.")
+        return
+    with SaidaSqlite(caminho) as saida:
+        saida.gravar_varios(dados for _, dados in delta.insercoes)
+        saida.gravar_varios(dados for _, dados, _, _ in delta.atualizacoes)
+        saida.remover(cnpj for _, cnpj in delta.remocoes if cnpj)
+    print(f"{caminho}: {len(delta.insercoes) + len(delta.atualizacoes)} empresas gravadas, {len(delta.remocoes)} removidas")
@@ -0,0 +1,231 @@
+import re
+import threading
+
+from coletor import coletar_detalhes
+from estado import STATUS_VAZIA
+from extracao import SEM_INFORMACAO
+
+# Varredura esparsa dos ids de DetalheEmpresaPartial
+# Os ids não são densos: há faixas longas sem empresa. Em vez de buscar todos de 1 a n,
+# a varredura descobre o maior id válido por sondagem exponencial + busca binária e,
+# durante a coleta, pula sequências longas de ids vazios. Os ids vazios ficam gravados
+# no estado (status "vazia") e não são sondados de novo nas próximas execuções.
+
+JANELA_PADRAO = 8  # ids consecutivos sondados em cada ponto (tolera buracos pequenos)
+DOBRAS_EXTRAS = 3  # pontos vazios seguidos na sondagem exponencial antes de concluir que acabou
+LIMITE_VAZIOS_PADRAO = 50  # vazios seguidos antes de começar a pular
+SALTO_INICIAL = 16
+SALTO_MAXIMO = 4096
+ESPERA_RESPOSTA = 1.0  # segundos entre conferências do aviso de parada enquanto espera a resposta de uma sonda
+
+# Respostas que indicam que o id não tem empresa
+STATUS_HTTP_VAZIOS = {404, 410}
+PADRAO_VALOR = re.compile(r"""class\s*=\s*["'][^"']*\bvalor\b""")
+
+# Verifica, pela resposta bruta, se o id não tem empresa (falhas de conexão e 5xx não contam)
+def resposta_vazia(resultado):
+    if resultado.status in STATUS_HTTP_VAZIOS:
+        return True
+    if resultado.status == 200:
+        return not PADRAO_VALOR.search(resultado.html or "")
+    return False
+
+# Verifica se os dados extraídos estão todos sem informação
+def dados_vazios(dados):
+    return all(valor == SEM_INFORMACAO for valor in dados.values())
+
+# Cria a função de sondagem usada por encontrar_maior_id: busca os ids informados
+# (em paralelo, respeitando a taxa) e devolve o conjunto dos que têm empresa
+def criar_sondador(url_base, headers, estado=None, **opcoes):
+    def sondar(ids):
+        ocupados = set()
+        for resultado in coletar_detalhes(ids, url_base, headers, **opcoes):
+            if resposta_vazia(resultado):
+                if estado is not None:
+                    estado.registrar(resultado.empresa_id, STATUS_VAZIA, resultado.status)
+            elif resultado.status == 200:
+                ocupados.add(resultado.empresa_id)
+        return ocupados
+
+    return sondar
+
+# Função para encontrar o maior id com empresa
+# Dobra o id enquanto a janela sondada tiver alguma empresa (tolerando `dobras_extras` pontos
+# vazios seguidos, para atravessar faixas mortas) e depois faz busca binária entre o último
+# ponto ocupado e o primeiro vazio
+def encontrar_maior_id(sondar, inicio=1, janela=JANELA_PADRAO, dobras_extras=DOBRAS_EXTRAS):
+    def maior_na_janela(empresa_id):
+        return max(sondar(range(empresa_id, empresa_id + janela)), default=None)
+
+    maior = maior_na_janela(inicio)
+    if maior is None:
+        return None
+
+    baixo, alto = inicio, max(inicio * 2, inicio + janela)
+    vazios = 0
+    while vazios <= dobras_extras:
+        achado = maior_na_janela(alto)
+        if achado is not None:
+            maior = max(maior, achado)
+            print(f"Id {achado} existe, sondando {alto * 2}...")
+            baixo, vazios = alto, 0
+        else:
+            vazios += 1
+        alto *= 2
+    # O primeiro ponto vazio depois do último ocupado
+    alto = max(baixo * 2, baixo + janela)
+
+    while alto - baixo > janela:
+        meio = (baixo + alto) // 2
+        achado = maior_na_janela(meio)
+        if achado is not None:
+            maior = max(maior, achado)
+            baixo = meio
+        else:
+            alto = meio
+
+    print(f"Maior id encontrado: {maior}")
+    return maior
+
+# Gerador de ids que aprende, com os resultados da própria coleta, onde estão as faixas vazias
+# Os resultados precisam passar por acompanhar() para a varredura enxergá-los.
+# `conhecidos` é o dicionário id -> status do estado (EstadoCrawl.concluidos): esses ids não
+# são buscados, mas contam para decidir os saltos.
+# Os resultados chegam fora de ordem (várias requisições em andamento), então a sequência de
+# vazios é contada em ordem de id, a partir da `fronteira`: o primeiro id ainda sem resultado.
+# Quem para de consumir os resultados antes do fim precisa fechar o gerador de acompanhar()
+# (ou chamar parar()): senão a thread que pede o próximo id fica presa esperando uma sonda.
+class VarreduraEsparsa:
+    def __init__(self, fim, inicio=1, conhecidos=None, limite_vazios=LIMITE_VAZIOS_PADRAO,
+                 salto_inicial=SALTO_INICIAL, salto_maximo=SALTO_MAXIMO):
+        self.inicio = inicio
+        self.fim = fim
+        self.conhecidos = {empresa_id: status == STATUS_VAZIA for empresa_id, status in (conhecidos or {}).items()}
+        self.limite_vazios = limite_vazios
+        self.salto_inicial = salto_inicial
+        self.salto_maximo = salto_maximo
+        self.vazios_seguidos = 0
+        self.pulados = 0
+        self.fronteira = inicio
+        self._condicao = threading.Condition()
+        self._aguardando = set()
+        self._respostas = {}
+        self._resultados = {}  # id >= fronteira -> vazio, esperando os ids anteriores
+        self._emitidos = set()
+        self._parar = False
+
+    # Repassa os resultados da coleta, anotando quais ids estavam vazios
+    def acompanhar(self, resultados):
+        try:
+            for resultado in resultados:
+                self.registrar(resultado.empresa_id, resposta_vazia(resultado))
+                yield resultado
+        finally:
+            # Libera a thread presa em uma sonda antes de encerrar a coleta, que espera por ela
+            self.parar()
+            if hasattr(resultados, "close"):
+                resultados.close()
+
+    # Encerra a varredura: quem espera uma sonda desiste e o gerador de ids termina
+    def parar(self):
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify_all()
+
+    def registrar(self, empresa_id, vazio):
+        with self._condicao:
+            if empresa_id >= self.fronteira:
+                self._resultados[empresa_id] = vazio
+                self._avancar()
+            if empresa_id in self._aguardando:
+                self._aguardando.discard(empresa_id)
+                self._respostas[empresa_id] = vazio
+                self._condicao.notify_all()
+
+    # Anda com a fronteira pelos ids que já têm resultado (chamada com a trava)
+    def _avancar(self):
+        while True:
+            if self.fronteira in self._resultados:
+                vazio = self._resultados.pop(self.fronteira)
+            elif self.fronteira in self.conhecidos:
+                vazio = self.conhecidos[self.fronteira]
+            else:
+                return
+            self.vazios_seguidos = self.vazios_seguidos + 1 if vazio else 0
+            self.fronteira += 1
+
+    # Recomeça a contagem em `empresa_id`, depois de um salto (chamada com a trava)
+    def _saltar_para(self, empresa_id):
+        self.fronteira = empresa_id
+        self.vazios_seguidos = 0
+        self._resultados = {chave: vazio for chave, vazio in self._resultados.items() if chave >= empresa_id}
+        self._avancar()
+
+    # Emite um id e espera o resultado dele antes de decidir o próximo passo
+    # Devolve None se a varredura foi parada enquanto esperava
+    def _sondar(self, empresa_id):
+        if empresa_id in self.conhecidos:
+            return self.conhecidos[empresa_id]
+        with self._condicao:
+            self._aguardando.add(empresa_id)
+        self._emitidos.add(empresa_id)
+        yield empresa_id
+        with self._condicao:
+            while not self._condicao.wait_for(lambda: empresa_id in self._respostas or self._parar, ESPERA_RESPOSTA):
+                pass
+            if empresa_id not in self._respostas:
+                return None
+            return self._respostas.pop(empresa_id)
+
+    def __iter__(self):
+        atual = self.inicio
+        while atual <= self.fim:
+            with self._condicao:
+                if self._parar:
+                    return
+                self._avancar()
+                pular = self.vazios_seguidos >= self.limite_vazios
+            if atual in self.conhecidos:
+                atual += 1
+                continue
+            if not pular:
+                if atual not in self._emitidos:
+                    self._emitidos.add(atual)
+                    yield atual
+                atual += 1
+                continue
+
+            # Muitos vazios seguidos: sonda à frente com saltos que dobram a cada vazio
+            ultimo_vazio = atual - 1
+            salto = self.salto_inicial
+            while True:
+                sonda = ultimo_vazio + salto
+                if sonda > self.fim:
+                    self.pulados += self.fim - ultimo_vazio
+                    return
+                vazio = yield from self._sondar(sonda)
+                if vazio is None:
+                    return
+                if vazio:
+                    ultimo_vazio = sonda
+                    salto = min(salto * 2, self.salto_maximo)
+                else:
+                    break
+
+            # Achou empresa: busca binária do começo da faixa ocupada entre o último vazio e a sonda
+            esquerda, direita = ultimo_vazio, sonda
+            while direita - esquerda > 1:
+                meio = (esquerda + direita) // 2
+                vazio = yield from self._sondar(meio)
+                if vazio is None:
+                    return
+                if vazio:
+                    esquerda = meio
+                else:
+                    direita = meio
+
+            self.pulados += sum(1 for empresa_id in range(atual, direita)
+                                if empresa_id not in self._emitidos and empresa_id not in self.conhecidos)
+            with self._condicao:
+                self._saltar_para(direita)
+            atual = direita
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+from datetime import datetime
+
+# Estado da coleta do CIB em um banco SQLite local
+# Cada empresa_id tem uma linha com o resultado da última tentativa, o que permite
+# retomar uma coleta interrompida e repetir só as falhas.
+
+ARQUIVO_ESTADO = "cib_estado.db"
+
+# Situações possíveis de uma empresa_id
+STATUS_OK = "ok"  # dados extraídos e gravados
+STATUS_DUPLICADA = "duplicada"  # CNPJ já estava gravado
+STATUS_ERRO = "erro"  # resposta diferente de 200, falha de conexão ou erro na extração do HTML
+STATUS_VAZIA = "vazia"  # id sem empresa (404 ou página sem dados); não é buscado de novo
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS empresas (
+    empresa_id INTEGER PRIMARY KEY,
+    status TEXT NOT NULL,
+    http_status INTEGER,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    ultima_busca TEXT,
+    cnpj TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_empresas_status ON empresas (status);
+CREATE INDEX IF NOT EXISTS idx_empresas_cnpj ON empresas (cnpj);
+CREATE TABLE IF NOT EXISTS cnpjs_legados (
+    cnpj TEXT PRIMARY KEY
+);
+"""
+
+# Grava o resultado de uma tentativa, somando uma tentativa se o id já existe
+SQL_REGISTRAR = """
+INSERT INTO empresas (empresa_id, status, http_status, tentativas, ultima_busca, cnpj)
+VALUES (?, ?, ?, 1, ?, ?)
+ON CONFLICT (empresa_id) DO UPDATE SET
+    status = excluded.status,
+    http_status = excluded.http_status,
+    tentativas = empresas.tentativas + 1,
+    ultima_busca = excluded.ultima_busca,
+    cnpj = COALESCE(excluded.cnpj, empresas.cnpj)
+"""
+
+class EstadoCrawl:
+    def __init__(self, caminho=ARQUIVO_ESTADO):
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    # Registra o resultado de uma tentativa; cada chamada é gravada na hora,
+    # então uma queda do processo perde no máximo a empresa em andamento
+    def registrar(self, empresa_id, status, http_status=None, cnpj=None):
+        self.registrar_varios([(empresa_id, status, http_status, cnpj)])
+
+    # Registra vários resultados de uma vez, em uma única transação: cada item é
+    # (empresa_id, status, http_status, cnpj)
+    def registrar_varios(self, registros):
+        agora = datetime.now().isoformat(timespec="seconds")
+        with self.conexao:
+            self.conexao.executemany(
+                SQL_REGISTRAR,
+                [(empresa_id, status, http_status, agora, cnpj) for empresa_id, status, http_status, cnpj in registros],
+            )
+
+    # Ids que não precisam mais ser buscados -> status: tudo que não é falha, mais as
+    # falhas que já esgotaram `max_tentativas` (ou todas, sem reprocessar_falhas)
+    def concluidos(self, reprocessar_falhas=True, max_tentativas=None):
+        concluidos = {}
+        for empresa_id, status, tentativas in self.conexao.execute(
+            "SELECT empresa_id, status, tentativas FROM empresas"
+        ):
+            if status != STATUS_ERRO:
+                concluidos[empresa_id] = status
+            elif not reprocessar_falhas or (max_tentativas is not None and tentativas >= max_tentativas):
+                concluidos[empresa_id] = status
+        return concluidos
+
+    # Devolve, na ordem original, os ids que ainda precisam ser buscados:
+    # os nunca tentados e as falhas com menos de `max_tentativas` tentativas
+    def pendentes(self, ids, reprocessar_falhas=True, max_tentativas=None):
+        concluidos = self.concluidos(reprocessar_falhas, max_tentativas)
+        return (empresa_id for empresa_id in ids if empresa_id not in concluidos)
+
+    # CNPJs já gravados (inclui os importados do antigo cnpjs_extraidos.txt)
+    def cnpjs_processados(self):
+        cursor = self.conexao.execute(
+            "SELECT cnpj FROM empresas WHERE status = ? AND cnpj IS NOT NULL UNION SELECT cnpj FROM cnpjs_legados",
+            (STATUS_OK,),
+        )
+        return {cnpj for (cnpj,) in cursor}
+
+    # Quantidade de empresa_ids em cada situação
+    def resumo(self):
+        return dict(self.conexao.execute("SELECT status, COUNT(*) FROM empresas GROUP BY status"))
+
+    # Importa os CNPJs de um cnpjs_extraidos.txt antigo (pode ser chamada mais de uma vez)
+    def importar_cnpjs_txt(self, caminho):
+        if not os.path.exists(caminho):
+            return 0
+        with open(caminho, "r") as file:
+            cnpjs = [(linha.strip(),) for linha in file if linha.strip()]
+        with self.conexao:
+            antes = self.conexao.total_changes
+            self.conexao.executemany("INSERT OR IGNORE INTO cnpjs_legados (cnpj) VALUES (?)", cnpjs)
+            return self.conexao.total_changes - antes
@@ -0,0 +1,322 @@
+import sys
+from collections import namedtuple
+from html.parser import HTMLParser
+
+# Extração rápida dos dados de uma empresa a partir do fragmento DetalheEmpresaPartial
+# Em vez de procurar cada rótulo na árvore (duas buscas por campo), o fragmento é percorrido
+# uma única vez montando um mapa rótulo -> valor. Devolve um registro Empresa com os mesmos
+# valores (e as mesmas chaves) do dicionário de extrair_dados_empresa dos scripts cib*.py.
+
+SEM_INFORMACAO = "Sem informação!"
+
+# Colunas de saída, na ordem usada pela planilha e pelo CSV
+CAMPOS = ["Razão Social", "CNPJ", "E-mail", "Website", "Tomador de Decisões", "Faixa de Importação", "Bairro", "Cidade-Estado", "CEP", "Telefone"]
+
+# Rótulo exibido na página -> coluna de saída
+ROTULOS = {
+    "e-mail": "E-mail",
+    "Website": "Website",
+    "Contato": "Tomador de Decisões",
+    "Faixa de importação anual": "Faixa de Importação",
+    "Bairro": "Bairro",
+    "Cidade/Estado": "Cidade-Estado",
+    "CEP": "CEP",
+    "Telefone": "Telefone",
+}
+
+# Colunas com poucos valores distintos: o texto é internado para ser compartilhado entre os registros
+CAMPOS_INTERNADOS = {"Faixa de Importação", "Cidade-Estado", "Bairro"}
+
+POSICOES = {campo: posicao for posicao, campo in enumerate(CAMPOS)}
+_INTERNAR = [campo in CAMPOS_INTERNADOS for campo in CAMPOS]
+_CHAVES = dict.fromkeys(CAMPOS).keys()
+
+# Registro compacto de uma empresa: uma tupla (sem __dict__) com os valores na ordem de CAMPOS
+# Continua se comportando como o dicionário antigo (dados["CNPJ"], "CNPJ" in dados, iteração
+# pelas chaves, dict(dados), .get, .keys, .values, .items), além de dados.cnpj e dados[1].
+# O "Sem informação!" é sempre o mesmo objeto, inclusive depois de passar por pickle entre processos.
+class Empresa(namedtuple("Empresa", ["razao_social", "cnpj", "email", "website", "tomador_decisoes",
+                                     "faixa_importacao", "bairro", "cidade_estado", "cep", "telefone"])):
+    __slots__ = ()
+
+    def __new__(cls, *valores):
+        return super().__new__(cls, *(
+            SEM_INFORMACAO if valor == SEM_INFORMACAO else sys.intern(valor) if internar else valor
+            for valor, internar in zip(valores, _INTERNAR)
+        ))
+
+    # Monta o registro a partir do dicionário com as colunas de CAMPOS
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(*(dados.get(campo, SEM_INFORMACAO) for campo in CAMPOS))
+
+    def __getitem__(self, chave):
+        if isinstance(chave, str):
+            return tuple.__getitem__(self, POSICOES[chave])
+        return tuple.__getitem__(self, chave)
+
+    # `in` e a iteração valem para as chaves, como no dicionário; os valores vêm de values()
+    def __contains__(self, campo):
+        return campo in POSICOES
+
+    def __iter__(self):
+        return iter(CAMPOS)
+
+    # pickle, _asdict e _replace do namedtuple percorrem a tupla com iter(self)
+    def __getnewargs__(self):
+        return tuple(self.values())
+
+    def _asdict(self):
+        return dict(zip(self._fields, self.values()))
+
+    def _replace(self, **valores):
+        return type(self)(*(valores.pop(nome, valor) for nome, valor in zip(self._fields, self.values())))
+
+    def get(self, campo, padrao=None):
+        posicao = POSICOES.get(campo)
+        return padrao if posicao is None else tuple.__getitem__(self, posicao)
+
+    def keys(self):
+        return _CHAVES
+
+    def values(self):
+        return tuple.__iter__(self)
+
+    def items(self):
+        return zip(CAMPOS, self.values())
+
+    def como_dict(self):
+        return dict(self.items())
+
+CLASSE_RAZAO_SOCIAL = "campo-detalhe full"
+CLASSE_VALOR = "valor"
+
+# Elementos HTML sem tag de fechamento
+ELEMENTOS_VAZIOS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+# Backends opcionais, do mais rápido para o mais lento; html.parser (biblioteca padrão) é sempre possível
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:
+    lxml = None
+
+if LexborHTMLParser is not None:
+    BACKEND_PADRAO = "selectolax"
+elif lxml is not None:
+    BACKEND_PADRAO = "lxml"
+else:
+    BACKEND_PADRAO = "html.parser"
+
+# Separa o texto "RAZÃO SOCIAL CNPJ 00.000.000/0000-00" nas duas colunas
+def _separar_razao_cnpj(texto):
+    partes = texto.split("CNPJ")
+    razao_social = partes[0].strip() if len(partes) > 0 else SEM_INFORMACAO
+    cnpj = "CNPJ " + partes[1].strip() if len(partes) > 1 else SEM_INFORMACAO
+    return razao_social, cnpj
+
+# Rótulos na ordem das colunas de CAMPOS que vêm depois da razão social e do CNPJ
+_ROTULOS_EM_ORDEM = [rotulo for campo in CAMPOS[2:] for rotulo, destino in ROTULOS.items() if destino == campo]
+
+# Monta o registro final a partir do texto da razão social e do mapa rótulo -> valor
+def _montar_dados(texto_razao, valores):
+    razao_social, cnpj = SEM_INFORMACAO, SEM_INFORMACAO
+    if texto_razao is not None:
+        razao_social, cnpj = _separar_razao_cnpj(texto_razao)
+    return Empresa(razao_social, cnpj, *(valores.get(rotulo, SEM_INFORMACAO) for rotulo in _ROTULOS_EM_ORDEM))
+
+# Percorre os eventos (tipo, conteúdo) em ordem de documento e associa cada rótulo
+# ao próximo span.valor, como o find_next do BeautifulSoup
+def _indexar(eventos):
+    valores = {}
+    vistos = set()
+    pendentes = []
+    for tipo, conteudo in eventos:
+        if tipo == "rotulo":
+            if conteudo in ROTULOS and conteudo not in vistos:
+                vistos.add(conteudo)
+                pendentes.append(conteudo)
+        elif pendentes:
+            texto = conteudo()
+            for rotulo in pendentes:
+                valores[rotulo] = texto
+            pendentes = []
+    return valores
+
+# Backend selectolax (lexbor): uma única seleção CSS devolve os nós de interesse em ordem de documento
+def _extrair_selectolax(html):
+    arvore = LexborHTMLParser(html)
+    texto_razao = None
+    nos = arvore.css("div.campo-detalhe, label, span.valor")
+
+    def _texto_unico(no):
+        filhos = list(no.iter(include_text=True))
+        if len(filhos) != 1:
+            return None
+        if filhos[0].tag == "-text":
+            return filhos[0].text_content
+        if filhos[0].tag.startswith("-"):
+            return None
+        return _texto_unico(filhos[0])
+
+    def eventos():
+        nonlocal texto_razao
+        for no in nos:
+            if no.tag == "div":
+                if texto_razao is None and " ".join(no.attributes.get("class", "").split()) == CLASSE_RAZAO_SOCIAL:
+                    valor = no.css_first("span.valor")
+                    if valor is not None:
+                        texto_razao = valor.text(deep=True, separator="", strip=True)
+            elif no.tag == "label":
+                yield "rotulo", _texto_unico(no)
+            else:
+                yield "valor", lambda no=no: no.text(deep=True, separator="", strip=True)
+
+    valores = _indexar(eventos())
+    return _montar_dados(texto_razao, valores)
+
+# Backend lxml: iteração em C filtrada pelas tags de interesse
+def _extrair_lxml(html):
+    try:
+        raiz = lxml.html.fromstring(html)
+    except lxml.etree.ParserError:
+        # Corpo vazio (ou só espaços e comentários): o lxml não monta árvore nenhuma
+        return _montar_dados(None, {})
+    texto_razao = None
+
+    def _texto(elemento):
+        return "".join(parte.strip() for parte in elemento.itertext())
+
+    def _classes(elemento):
+        return elemento.get("class", "").split()
+
+    def _texto_unico(elemento):
+        if len(elemento) == 0:
+            return elemento.text
+        if len(elemento) == 1 and not elemento.text and not elemento[0].tail and isinstance(elemento[0].tag, str):
+            return _texto_unico(elemento[0])
+        return None
+
+    def eventos():
+        nonlocal texto_razao
+        for elemento in raiz.iter("div", "label", "span"):
+            if elemento.tag == "div":
+                if texto_razao is None and " ".join(_classes(elemento)) == CLASSE_RAZAO_SOCIAL:
+                    for span in elemento.iter("span"):
+                        if CLASSE_VALOR in _classes(span):
+                            texto_razao = _texto(span)
+                            break
+            elif elemento.tag == "label":
+                yield "rotulo", _texto_unico(elemento)
+            elif CLASSE_VALOR in _classes(elemento):
+                yield "valor", lambda elemento=elemento: _texto(elemento)
+
+    valores = _indexar(eventos())
+    return _montar_dados(texto_razao, valores)
+
+# Backend html.parser: um HTMLParser enxuto que não constrói árvore nenhuma
+class _IndiceRotulos(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.abertos = []
+        # Capturas em andamento: [profundidade, tipo, partes de texto, filhos diretos, tem netos, posição do evento, texto direto]
+        self.capturas = []
+        # Os eventos ficam na ordem de abertura das tags e são preenchidos quando a tag fecha
+        self.eventos = []
+        self.texto_razao = None
+        self.dentro_razao = None
+
+    def handle_starttag(self, tag, attrs):
+        for captura in self.capturas:
+            if captura[1] == "rotulo":
+                if len(self.abertos) == captura[0] + 1:
+                    captura[3] += 1
+                else:
+                    captura[4] = True
+
+        if tag in ELEMENTOS_VAZIOS:
+            return
+        self.abertos.append(tag)
+        profundidade = len(self.abertos) - 1
+        classes = (dict(attrs).get("class") or "").split()
+
+        if tag == "label":
+            self._capturar(profundidade, "rotulo")
+        elif tag == "span" and CLASSE_VALOR in classes:
+            tipo = "razao" if self.dentro_razao is not None and self.texto_razao is None else "valor"
+            self._capturar(profundidade, tipo)
+        elif tag == "div" and self.dentro_razao is None and self.texto_razao is None and " ".join(classes) == CLASSE_RAZAO_SOCIAL:
+            self.dentro_razao = profundidade
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in ELEMENTOS_VAZIOS:
+            self.handle_endtag(tag)
+
+    def handle_data(self, data):
+        for captura in self.capturas:
+            captura[2].append(data)
+            if len(self.abertos) == captura[0] + 1:
+                captura[6] = True
+
+    def handle_endtag(self, tag):
+        if tag not in self.abertos:
+            return
+        while self.abertos:
+            fechada = self.abertos.pop()
+            profundidade = len(self.abertos)
+            while self.capturas and self.capturas[-1][0] >= profundidade:
+                self._finalizar(self.capturas.pop())
+            if self.dentro_razao is not None and self.dentro_razao >= profundidade:
+                self.dentro_razao = None
+            if fechada == tag:
+                break
+
+    def close(self):
+        super().close()
+        while self.capturas:
+            self._finalizar(self.capturas.pop())
+
+    def _capturar(self, profundidade, tipo):
+        self.capturas.append([profundidade, tipo, [], 0, False, len(self.eventos), False])
+        self.eventos.append(None)
+
+    def _finalizar(self, captura):
+        _, tipo, partes, filhos, tem_netos, posicao, texto_direto = captura
+        if tipo == "rotulo":
+            # Equivale ao .string do BeautifulSoup: só texto, ou um único filho que só tem texto
+            so_texto = filhos == 0 or (filhos == 1 and not texto_direto and not tem_netos)
+            texto = "".join(partes) if partes and so_texto else None
+            self.eventos[posicao] = ("rotulo", texto)
+        else:
+            texto = "".join(parte.strip() for parte in partes)
+            if tipo == "razao":
+                self.texto_razao = texto
+            self.eventos[posicao] = ("valor", lambda texto=texto: texto)
+
+def _extrair_html_parser(html):
+    indice = _IndiceRotulos()
+    indice.feed(html)
+    indice.close()
+    valores = _indexar(indice.eventos)
+    return _montar_dados(indice.texto_razao, valores)
+
+BACKENDS = {
+    "selectolax": _extrair_selectolax,
+    "lxml": _extrair_lxml,
+    "html.parser": _extrair_html_parser,
+}
+
+# Função para extrair os dados de uma empresa em uma única passada pelo HTML
+def extrair_dados_empresa_rapido(html, backend=None):
+    backend = backend or BACKEND_PADRAO
+    if backend == "selectolax" and LexborHTMLParser is None:
+        raise ImportError("O backend selectolax precisa do pacote selectolax instalado")
+    if backend == "lxml" and lxml is None:
+        raise ImportError("O backend lxml precisa do pacote lxml instalado")
+    return BACKENDS[backend](html)
@@ -0,0 +1,106 @@
+import re
+from bisect import bisect_left
+
+# Índice local CNPJ normalizado -> linhas da planilha
+# É montado com uma única leitura da coluna de CNPJ e atualizado conforme as linhas são
+# anexadas, então a deduplicação não precisa de um sheet.find (varredura remota) por CNPJ.
+
+COLUNA_CNPJ = 2  # coluna B, na ordem de extracao.CAMPOS
+LINHAS_CABECALHO = 1
+
+# Deixa só os dígitos do CNPJ ("CNPJ 12.345.678/0001-90" -> "12345678000190")
+def normalizar_cnpj(texto):
+    return re.sub(r"\D", "", texto or "")
+
+class IndiceCnpj:
+    def __init__(self, valores=(), linhas_cabecalho=LINHAS_CABECALHO):
+        self.linhas_cabecalho = linhas_cabecalho
+        self.linhas = {}
+        self.total_linhas = 0
+        for numero, valor in enumerate(valores, start=1):
+            self.total_linhas = numero
+            if numero > linhas_cabecalho:
+                self._adicionar(normalizar_cnpj(valor), numero)
+
+    # Monta o índice a partir da planilha com uma única leitura da área usada
+    # (a coluna de CNPJ sozinha vem sem as linhas do fim que têm o CNPJ em branco, e aí
+    # os números das linhas anexadas depois sairiam errados)
+    @classmethod
+    def carregar(cls, worksheet, coluna=COLUNA_CNPJ, linhas_cabecalho=LINHAS_CABECALHO):
+        linhas = worksheet.get_values()
+        return cls([linha[coluna - 1] if len(linha) >= coluna else "" for linha in linhas], linhas_cabecalho)
+
+    def _adicionar(self, cnpj, numero):
+        if cnpj:
+            self.linhas.setdefault(cnpj, []).append(numero)
+
+    def __contains__(self, cnpj):
+        return normalizar_cnpj(cnpj) in self.linhas
+
+    def __len__(self):
+        return len(self.linhas)
+
+    # Linha da primeira ocorrência do CNPJ, ou None
+    def linha(self, cnpj):
+        linhas = self.linhas.get(normalizar_cnpj(cnpj))
+        return linhas[0] if linhas else None
+
+    # Registra uma linha anexada ao fim da planilha e devolve o número dela
+    def registrar_anexada(self, cnpj):
+        self.total_linhas += 1
+        self._adicionar(normalizar_cnpj(cnpj), self.total_linhas)
+        return self.total_linhas
+
+    # Linhas repetidas (todas as ocorrências depois da primeira), em ordem crescente
+    def linhas_duplicadas(self):
+        return sorted(numero for linhas in self.linhas.values() for numero in linhas[1:])
+
+    # Atualiza os números de linha depois que as linhas informadas foram apagadas
+    def descontar_removidas(self, removidas):
+        removidas = sorted(removidas)
+        if not removidas:
+            return
+
+        def nova_posicao(numero):
+            # Desconta as linhas removidas que estavam acima desta
+            return numero - bisect_left(removidas, numero)
+
+        apagadas = set(removidas)
+        for cnpj in list(self.linhas):
+            restantes = [nova_posicao(numero) for numero in self.linhas[cnpj] if numero not in apagadas]
+            if restantes:
+                self.linhas[cnpj] = restantes
+            else:
+                del self.linhas[cnpj]
+        self.total_linhas -= len(apagadas)
+
+# Agrupa linhas em intervalos contínuos [inicio, fim] (números de linha começando em 1)
+def _intervalos(linhas):
+    intervalos = []
+    for numero in sorted(set(linhas)):
+        if intervalos and intervalos[-1][1] == numero - 1:
+            intervalos[-1][1] = numero
+        else:
+            intervalos.append([numero, numero])
+    return intervalos
+
+# Monta as requisições deleteDimension de um batchUpdate; vão de baixo para cima
+# para que a remoção de uma faixa não desloque as seguintes
+def requisicoes_remocao(sheet_id, linhas):
+    requisicoes = []
+    for inicio, fim in reversed(_intervalos(linhas)):
+        requisicoes.append({
+            "deleteDimension": {
+                "range": {"sheetId": sheet_id, "dimension": "ROWS", "startIndex": inicio - 1, "endIndex": fim}
+            }
+        })
+    return requisicoes
+
+# Remove da planilha todas as linhas com CNPJ repetido (mantém a primeira) em um único batchUpdate
+def remover_duplicadas(worksheet, indice):
+    duplicadas = indice.linhas_duplicadas()
+    if not duplicadas:
+        return 0
+    worksheet.spreadsheet.batch_update({"requests": requisicoes_remocao(worksheet.id, duplicadas)})
+    indice.descontar_removidas(duplicadas)
+    return len(duplicadas)
@@ -0,0 +1,176 @@
+import asyncio
+import math
+import re
+import time
+
+import aiohttp
+
+from coletor import criar_controles, iterar_em_thread, TAXA_PADRAO, RAJADA_PADRAO, CONCORRENCIA_PADRAO, TIMEOUT_PADRAO
+from resiliencia import STATUS_REPETIVEIS, espera_backoff, ler_retry_after
+
+# Listagem completa da PesquisaCompleta
+# Lê o total de empresas na primeira página, descobre o maior tamanho de página que o
+# portal aceita e busca as demais páginas em paralelo, devolvendo cada data-codigo-empresa
+# assim que a página dele chega.
+
+# Tamanhos de página testados, do maior para o menor
+TAMANHOS_PAGINA = [1000, 500, 200, 100, 50, 20, 10]
+TENTATIVAS_POR_PAGINA = 3
+
+PADRAO_ID = re.compile(r"""data-codigo-empresa\s*=\s*["']?(\d+)""")
+PADRAO_TOTAL = re.compile(r"([\d.]+)\s+empresas encontradas")
+
+class ErroPagina(Exception):
+    pass
+
+# Monta o formulário da pesquisa; `filtros` sobrescreve os campos vazios (ex.: CodigoSubdivisaoPais)
+def payload_pesquisa(pagina, tamanho, filtros=None):
+    payload = {
+        "PaginaAtual": pagina,
+        "TamanhoPagina": tamanho,
+        "CodigoProduto": "",
+        "RazaoSocial": "",
+        "CNPJ": "",
+        "CodigoSubdivisaoPais": "",
+        "CodigoPais": "",
+        "CodigoFaixaImportacao": "",
+    }
+    payload.update(filtros or {})
+    return payload
+
+# Lê o "N empresas encontradas" da página (aceita separador de milhar)
+def ler_total(html):
+    encontrado = PADRAO_TOTAL.search(html)
+    if not encontrado:
+        return None
+    return int(encontrado.group(1).replace(".", ""))
+
+# Lê os data-codigo-empresa da página, na ordem em que aparecem
+def ler_ids(html):
+    return [int(codigo) for codigo in PADRAO_ID.findall(html)]
+
+# Faz um POST da pesquisa repetindo 429/5xx e falhas de conexão, e devolve o HTML
+# Levanta ErroPagina (com `descricao` na mensagem) quando todas as tentativas falham.
+async def buscar_pesquisa(sessao, url, payload, limitador, descricao, tentativas=TENTATIVAS_POR_PAGINA,
+                          controle=None, disjuntor=None):
+    for tentativa in range(1, tentativas + 1):
+        teste = disjuntor is not None and await disjuntor.aguardar()
+        try:
+            await limitador.adquirir()
+            inicio = time.monotonic()
+            retry_after = None
+            sobrecarga = True
+            try:
+                async with sessao.post(url, data=payload) as resposta:
+                    if resposta.status == 200:
+                        html = await resposta.text()
+                        if controle is not None:
+                            controle.sucesso(time.monotonic() - inicio)
+                        if disjuntor is not None:
+                            await disjuntor.sucesso()
+                        return html
+                    erro = ErroPagina(f"{descricao}: HTTP {resposta.status}")
+                    retry_after = ler_retry_after(resposta.headers.get("Retry-After"))
+                    sobrecarga = resposta.status in STATUS_REPETIVEIS
+            except (aiohttp.ClientError, asyncio.TimeoutError) as falha:
+                erro = ErroPagina(f"{descricao}: {falha!r}")
+            if sobrecarga:
+                if controle is not None:
+                    controle.sobrecarga(str(erro))
+                if disjuntor is not None:
+                    await disjuntor.falha()
+        finally:
+            if teste:
+                await disjuntor.encerrar_teste()
+        if tentativa < tentativas:
+            await asyncio.sleep(retry_after if retry_after is not None else espera_backoff(tentativa))
+    raise erro
+
+# Função para listar todos os ids de empresa da pesquisa de forma assíncrona
+# `info`, se informado, recebe o total, o tamanho de página usado e as páginas que falharam.
+# `controle` e `disjuntor` (resiliencia.py) são os mesmos da coleta dos detalhes.
+async def listar_ids(url, headers, limitador, filtros=None, concorrencia=CONCORRENCIA_PADRAO,
+                     timeout=TIMEOUT_PADRAO, tamanhos=TAMANHOS_PAGINA, info=None,
+                     tentativas=TENTATIVAS_POR_PAGINA, controle=None, disjuntor=None):
+    info = info if info is not None else {}
+    vistos = set()
+    tempo_limite = aiohttp.ClientTimeout(total=timeout)
+    conector = aiohttp.TCPConnector(limit=concorrencia)
+
+    async with aiohttp.ClientSession(headers=headers, connector=conector, timeout=tempo_limite) as sessao:
+        async def buscar_pagina(pagina, tamanho):
+            return await buscar_pesquisa(sessao, url, payload_pesquisa(pagina, tamanho, filtros), limitador,
+                                         f"página {pagina}", tentativas, controle, disjuntor)
+
+        # Primeira página com o maior tamanho aceito; se o portal recusar, tenta o próximo
+        for tamanho in tamanhos:
+            try:
+                html = await buscar_pagina(1, tamanho)
+            except ErroPagina as erro:
+                print(f"Tamanho de página {tamanho} recusado ({erro})")
+                continue
+            ids = ler_ids(html)
+            total = ler_total(html)
+            if ids or total == 0:
+                break
+        else:
+            raise ErroPagina("Não foi possível ler a primeira página da pesquisa")
+
+        if total is None:
+            total = len(ids)
+        # O portal pode cortar o tamanho da página sem avisar: vale o que realmente veio
+        if len(ids) < min(tamanho, total):
+            tamanho = len(ids)
+        n_paginas = math.ceil(total / tamanho) if tamanho else 1
+        info.update({"total": total, "tamanho_pagina": tamanho, "paginas": n_paginas, "paginas_com_erro": []})
+        print(f"Total de empresas encontradas: {total} ({n_paginas} páginas de {tamanho})")
+
+        for empresa_id in ids:
+            if empresa_id not in vistos:
+                vistos.add(empresa_id)
+                yield empresa_id
+
+        # Demais páginas em paralelo; cada uma é entregue assim que chega
+        paginas = iter(range(2, n_paginas + 1))
+        saida = asyncio.Queue(maxsize=concorrencia)
+
+        async def trabalhador():
+            for pagina in paginas:
+                try:
+                    await saida.put(ler_ids(await buscar_pagina(pagina, tamanho)))
+                except ErroPagina as erro:
+                    print(f"Erro ao acessar {erro}")
+                    info["paginas_com_erro"].append(pagina)
+
+        async def encerrar():
+            try:
+                await asyncio.gather(*tarefas)
+            finally:
+                await saida.put(None)
+
+        tarefas = [asyncio.create_task(trabalhador()) for _ in range(concorrencia)]
+        finalizador = asyncio.create_task(encerrar())
+        try:
+            while (ids := await saida.get()) is not None:
+                for empresa_id in ids:
+                    if empresa_id not in vistos:
+                        vistos.add(empresa_id)
+                        yield empresa_id
+            await finalizador
+        finally:
+            for tarefa in tarefas + [finalizador]:
+                tarefa.cancel()
+            await asyncio.gather(*tarefas, finalizador, return_exceptions=True)
+
+        info["ids"] = len(vistos)
+
+# Versão síncrona de listar_ids; os ids podem ir direto para coletar_detalhes
+def coletar_ids(url, headers, filtros=None, taxa=TAXA_PADRAO, rajada=RAJADA_PADRAO,
+                concorrencia=CONCORRENCIA_PADRAO, timeout=TIMEOUT_PADRAO, info=None,
+                taxa_maxima=None, tentativas=TENTATIVAS_POR_PAGINA):
+    def criar_gerador():
+        limitador, controle, disjuntor = criar_controles(taxa, rajada, taxa_maxima)
+        return listar_ids(url, headers, limitador, filtros, concorrencia, timeout, info=info,
+                          tentativas=tentativas, controle=controle, disjuntor=disjuntor)
+
+    return iterar_em_thread(criar_gerador, 1000, nome="listagem-cib")
@@ -0,0 +1,162 @@
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from extracao import CAMPOS, SEM_INFORMACAO
+from saidas import SAIDAS, adicionar_argumento_formato, formato_do_caminho
+
+# Limpeza em lote de uma base extraída do CIB
+# A base inteira é carregada em colunas (pandas/NumPy) e cada campo é normalizado com
+# operações vetorizadas, sem laço em Python por linha: CNPJ (com validação dos dígitos
+# verificadores), CEP, telefone, e-mail, site e cidade/UF. No fim, as empresas repetidas
+# são removidas de uma vez, mantendo o registro mais completo de cada uma.
+#
+# Uso:
+#   python CIB/normalizacao.py empresas.csv --saida empresas_limpas.parquet
+
+PESOS_DV1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_DV2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+PADRAO_EMAIL = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+PADRAO_CIDADE_UF = r"^\s*(?P<cidade>.*?)\s*[/\-]\s*(?P<uf>[A-Za-z]{2})\s*$"
+# Preposições que ficam em minúsculas no nome da cidade ("Rio de Janeiro")
+PADRAO_PREPOSICOES = r"(?<=\s)(D[aeo]s?|E)(?=\s)"
+
+# Lê uma base em qualquer formato de saidas.py, com todas as colunas como texto
+def carregar(caminho, formato=None):
+    formato = formato or formato_do_caminho(caminho)
+    if formato == "csv":
+        tabela = pd.read_csv(caminho, dtype=str, keep_default_na=False)
+    elif formato == "jsonl":
+        tabela = pd.read_json(caminho, lines=True, dtype=False)
+    elif formato == "parquet":
+        tabela = pd.read_parquet(caminho)
+    else:
+        with sqlite3.connect(caminho) as conexao:
+            tabela = pd.read_sql_query("SELECT * FROM empresas", conexao)
+    faltando = [campo for campo in CAMPOS if campo not in tabela.columns]
+    if faltando:
+        raise ValueError(f"{caminho} não tem as colunas {faltando}")
+    return tabela[CAMPOS].fillna("").astype(str)
+
+# Troca o "Sem informação!" por vazio e tira espaços das pontas
+def _texto(coluna):
+    coluna = coluna.str.strip()
+    return coluna.mask(coluna == SEM_INFORMACAO, "")
+
+# Só os dígitos ASCII: \D deixaria passar dígitos de outras escritas ("١٢"), que quebram o encode("ascii")
+def _digitos(coluna):
+    return coluna.str.replace(r"[^0-9]", "", regex=True)
+
+# Valida os dígitos verificadores de uma coluna de CNPJs com 14 dígitos (as demais são inválidas)
+def cnpjs_validos(digitos):
+    validos = np.zeros(len(digitos), dtype=bool)
+    completos = (digitos.str.len() == 14).to_numpy()
+    if not completos.any():
+        return validos
+    texto = "".join(digitos[completos].tolist()).encode("ascii")
+    matriz = (np.frombuffer(texto, dtype=np.uint8) - ord("0")).reshape(-1, 14).astype(np.int64)
+
+    def digito_verificador(parcial, pesos):
+        resto = (parcial * pesos).sum(axis=1) % 11
+        return np.where(resto < 2, 0, 11 - resto)
+
+    dv1 = digito_verificador(matriz[:, :12], PESOS_DV1)
+    dv2 = digito_verificador(matriz[:, :13], PESOS_DV2)
+    # Sequências repetidas (00000000000000, 11111111111111...) passam na conta mas não existem
+    repetidos = (matriz == matriz[:, :1]).all(axis=1)
+    validos[completos] = (matriz[:, 12] == dv1) & (matriz[:, 13] == dv2) & ~repetidos
+    return validos
+
+# Normaliza um telefone brasileiro para "(DD) NNNNN-NNNN" / "(DD) NNNN-NNNN";
+# o que não tiver 10 ou 11 dígitos (depois de tirar +55 e o 0 do DDD) fica só com os dígitos
+def _telefones(coluna):
+    digitos = _digitos(coluna)
+    digitos = digitos.mask(digitos.str.len().isin([12, 13]) & digitos.str.startswith("55"), digitos.str[2:])
+    digitos = digitos.mask(digitos.str.len().isin([11, 12]) & digitos.str.startswith("0"), digitos.str[1:])
+    tamanho = digitos.str.len()
+    fixo = "(" + digitos.str[:2] + ") " + digitos.str[2:6] + "-" + digitos.str[6:]
+    celular = "(" + digitos.str[:2] + ") " + digitos.str[2:7] + "-" + digitos.str[7:]
+    return digitos.mask(tamanho == 10, fixo).mask(tamanho == 11, celular)
+
+# Texto sem acentos, em minúsculas e com espaços simples (usado só para comparar)
+def _chave_texto(coluna):
+    return (coluna.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+            .str.casefold().str.replace(r"\s+", " ", regex=True).str.strip())
+
+# Normaliza todas as colunas; acrescenta "CNPJ válido", "Cidade" e "UF"
+def normalizar(tabela):
+    limpa = pd.DataFrame({campo: _texto(tabela[campo]) for campo in CAMPOS})
+    limpa["Razão Social"] = limpa["Razão Social"].str.replace(r"\s+", " ", regex=True)
+
+    cnpj = _digitos(limpa["CNPJ"])
+    limpa["CNPJ"] = cnpj
+    limpa["CNPJ válido"] = cnpjs_validos(cnpj)
+
+    cep = _digitos(limpa["CEP"])
+    limpa["CEP"] = (cep.str[:5] + "-" + cep.str[5:]).where(cep.str.len() == 8, "")
+
+    limpa["Telefone"] = _telefones(limpa["Telefone"])
+
+    email = limpa["E-mail"].str.lower().str.replace(r"^mailto:", "", regex=True)
+    limpa["E-mail"] = email.where(email.str.match(PADRAO_EMAIL), "")
+
+    site = limpa["Website"].str.lower().str.replace(r"^(https?://)?(www\.)?", "", regex=True).str.rstrip("/")
+    limpa["Website"] = site
+
+    partes = limpa["Cidade-Estado"].str.extract(PADRAO_CIDADE_UF)
+    cidade = partes["cidade"].fillna(limpa["Cidade-Estado"]).str.replace(r"\s+", " ", regex=True).str.title()
+    cidade = cidade.str.replace(PADRAO_PREPOSICOES, lambda encontrado: encontrado.group(0).lower(), regex=True)
+    uf = partes["uf"].fillna("").str.upper()
+    limpa["Cidade"] = cidade
+    limpa["UF"] = uf
+    limpa["Cidade-Estado"] = cidade.where(uf == "", cidade + "/" + uf)
+    return limpa
+
+# Remove as empresas repetidas em uma passada: a chave é o CNPJ (ou a razão social sem acentos,
+# quando não há CNPJ) e, entre as repetidas, fica a linha com mais campos preenchidos
+# Linhas sem CNPJ e sem razão social não têm chave e ficam todas
+def deduplicar(limpa):
+    razao = _chave_texto(limpa["Razão Social"])
+    chave = limpa["CNPJ"].where(limpa["CNPJ"] != "", "razao:" + razao)
+    sem_chave = ((limpa["CNPJ"] == "") & (razao == "")).to_numpy()
+    preenchidos = (limpa[CAMPOS] != "").sum(axis=1)
+    ordem = np.lexsort((-preenchidos.to_numpy(), chave.to_numpy()))
+    manter = ~chave.iloc[ordem].duplicated().to_numpy() | sem_chave[ordem]
+    return limpa.iloc[np.sort(ordem[manter])].reset_index(drop=True)
+
+# Grava a base limpa no formato pedido (o mesmo conjunto de formatos de saidas.py)
+def gravar(tabela, caminho, formato=None):
+    formato = formato or formato_do_caminho(caminho)
+    if formato == "csv":
+        tabela.to_csv(caminho, index=False)
+    elif formato == "jsonl":
+        tabela.to_json(caminho, orient="records", lines=True, force_ascii=False)
+    elif formato == "parquet":
+        tabela.to_parquet(caminho, index=False, compression="zstd")
+    else:
+        with sqlite3.connect(caminho) as conexao:
+            tabela.to_sql("empresas", conexao, if_exists="replace", index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Normaliza e remove duplicadas de uma base extraída do CIB")
+    parser.add_argument("entrada", help="Base extraída (.csv, .jsonl, .parquet ou .db)")
+    parser.add_argument("--saida", default="empresas_limpas.csv", help="Base limpa (padrão: empresas_limpas.csv)")
+    parser.add_argument("--formato-entrada", choices=SAIDAS, default=None,
+                        help="Formato da entrada (padrão: pela extensão do arquivo)")
+    adicionar_argumento_formato(parser)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tabela = carregar(args.entrada, args.formato_entrada)
+    limpa = normalizar(tabela)
+    unicas = deduplicar(limpa)
+    gravar(unicas, args.saida, args.formato)
+    print(f"{len(tabela)} linhas lidas, {len(unicas)} empresas únicas gravadas em {args.saida} "
+          f"({int((~limpa['CNPJ válido']).sum())} CNPJs inválidos) em {time.perf_counter() - inicio:.1f}s")
+
+if __name__ == "__main__":
+    main()
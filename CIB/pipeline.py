@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Etapa de extração do pipeline do CIB, separada da coleta
+#
+#   coletor (asyncio, thread própria) -> fila limitada -> pool de processos (extração) -> destino
+#
+# Cada etapa tem um limite de itens em andamento: quando a extração fica para trás, a fila
+# do coletor enche e ele para de fazer requisições, então a memória não cresce sem limite.
+
+# Quantos HTMLs cada processo pode ter na fila do pool antes de a coleta ser segurada
+PENDENTES_POR_PROCESSO = 4
+
+# Extrai um HTML; um erro da extração volta no campo `erro` do resultado, com dados None,
+# para que uma página estranha não derrube a coleta inteira
+def _extrair_um(resultado, extrair):
+    try:
+        return resultado._replace(html=None), extrair()
+    except Exception as erro:
+        return resultado._replace(html=None, erro=erro), None
+
+# Extrai os dados na própria thread, para quando o pool não é usado
+def _extrair_em_linha(resultados, extrator):
+    for resultado in resultados:
+        if resultado.status != 200:
+            yield resultado, None
+            continue
+        yield _extrair_um(resultado, lambda: extrator(resultado.html))
+
+# Extrai os dados em um ProcessPoolExecutor, com no máximo `limite` HTMLs aguardando no pool
+def _extrair_no_pool(resultados, extrator, processos, limite):
+    # "spawn" evita fazer fork de um processo que já tem a thread do coletor rodando
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+        pendentes = {}
+        for resultado in resultados:
+            if resultado.status != 200:
+                yield resultado, None
+                continue
+
+            while len(pendentes) >= limite:
+                concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    yield _extrair_um(pendentes.pop(futuro), futuro.result)
+
+            futuro = pool.submit(extrator, resultado.html)
+            # O HTML já foi enviado ao pool; guardar só o resto libera a memória mais cedo
+            pendentes[futuro] = resultado._replace(html=None)
+
+        while pendentes:
+            concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                yield _extrair_um(pendentes.pop(futuro), futuro.result)
+
+# Função para extrair os dados dos resultados da coleta
+# Devolve pares (resultado, dados); dados é None quando a requisição não retornou 200 ou quando
+# a extração falhou (nesse caso a exceção fica em resultado.erro e o status continua 200).
+# Com processos > 0 a extração roda em paralelo e os pares saem na ordem em que ficam prontos.
+def extrair_resultados(resultados, extrator, processos=0, limite_pendentes=None):
+    if processos <= 0:
+        return _extrair_em_linha(resultados, extrator)
+    limite = limite_pendentes or processos * PENDENTES_POR_PROCESSO
+    return _extrair_no_pool(resultados, extrator, processos, limite)
+
+# Adiciona a opção de processos de extração a um ArgumentParser
+def adicionar_argumentos_pipeline(parser):
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1,
+                        help="Processos de extração do HTML; 0 extrai na thread principal (padrão: número de núcleos)")
@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+# Reação do coletor a falhas do portal
+# - repetição com espera exponencial (com jitter) e respeito ao Retry-After;
+# - ajuste da taxa no estilo AIMD: sobe devagar enquanto o portal responde bem e cai pela
+#   metade quando aparece 429/5xx, timeout ou latência muito acima do normal;
+# - disjuntor: depois de muitas falhas seguidas a coleta inteira pausa e volta com uma
+#   única requisição de teste.
+
+TENTATIVAS_PADRAO = 4
+ESPERA_BASE = 2  # segundos
+ESPERA_MAXIMA = 120  # segundos
+RETRY_AFTER_MAXIMO = ESPERA_MAXIMA  # um Retry-After maior que isso é limitado a este valor
+
+# Respostas que indicam sobrecarga ou instabilidade passageira (vale repetir)
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+# Lê o cabeçalho Retry-After (segundos ou data HTTP) e devolve a espera em segundos, ou None
+# A espera fica limitada a `maxima`: um valor absurdo não pode travar a coleta por horas
+def ler_retry_after(valor, maxima=RETRY_AFTER_MAXIMO):
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return min(float(valor), maxima)
+    try:
+        return min(max(0.0, parsedate_to_datetime(valor).timestamp() - time.time()), maxima)
+    except (TypeError, ValueError):
+        return None
+
+# Espera exponencial com jitter completo para a tentativa informada (começa em 1)
+def espera_backoff(tentativa, base=ESPERA_BASE, maxima=ESPERA_MAXIMA):
+    return random.uniform(0, min(maxima, base * 2 ** tentativa))
+
+# Ajusta limitador.taxa entre `taxa_minima` e `taxa_maxima`
+# Soma `incremento` a cada `sucessos_para_subir` respostas boas seguidas e multiplica por `fator`
+# a cada sobrecarga (no máximo uma redução por `intervalo_reducao` segundos, para que várias
+# requisições falhando juntas não derrubem a taxa de uma vez)
+class ControleAdaptativo:
+    def __init__(self, limitador, taxa_minima, taxa_maxima, incremento=None, fator=0.5,
+                 sucessos_para_subir=10, intervalo_reducao=5, limite_latencia=3, latencia_minima=2):
+        self.limitador = limitador
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = max(taxa_maxima, limitador.taxa)
+        self.incremento = incremento or max(0.05, limitador.taxa * 0.1)
+        self.fator = fator
+        self.sucessos_para_subir = sucessos_para_subir
+        self.intervalo_reducao = intervalo_reducao
+        self.limite_latencia = limite_latencia
+        self.latencia_minima = latencia_minima  # segundos; abaixo disso a latência nunca conta como sobrecarga
+        self.latencia_media = None
+        self.sucessos = 0
+        self.ultima_reducao = 0.0
+
+    def sucesso(self, latencia):
+        # Latência muito acima da média também indica que o portal está sofrendo
+        if (self.latencia_media is not None and latencia > self.latencia_minima
+                and latencia > self.latencia_media * self.limite_latencia):
+            self.sobrecarga(f"latência de {latencia:.1f}s")
+            return
+        self.latencia_media = latencia if self.latencia_media is None else 0.9 * self.latencia_media + 0.1 * latencia
+        self.sucessos += 1
+        if self.sucessos >= self.sucessos_para_subir and self.limitador.taxa < self.taxa_maxima:
+            self.sucessos = 0
+            self.limitador.taxa = min(self.taxa_maxima, self.limitador.taxa + self.incremento)
+
+    def sobrecarga(self, motivo):
+        self.sucessos = 0
+        agora = time.monotonic()
+        if agora - self.ultima_reducao < self.intervalo_reducao:
+            return
+        self.ultima_reducao = agora
+        nova = max(self.taxa_minima, self.limitador.taxa * self.fator)
+        if nova < self.limitador.taxa:
+            print(f"Portal sobrecarregado ({motivo}): taxa reduzida para {nova:.2f} req/s")
+        self.limitador.taxa = nova
+
+# Disjuntor compartilhado pelos trabalhadores
+# Fechado: tudo passa. Aberto: todos esperam `pausa` segundos. Meio-aberto: só uma requisição
+# de teste passa; se ela funcionar o disjuntor fecha, se falhar abre de novo com pausa dobrada.
+# aguardar() devolve True para a requisição de teste; quem a recebe chama encerrar_teste() em um
+# finally, para que um teste cancelado ou com erro inesperado não deixe o disjuntor preso.
+class Disjuntor:
+    def __init__(self, limite_falhas=10, pausa=60, pausa_maxima=900):
+        self.limite_falhas = limite_falhas
+        self.pausa_inicial = pausa
+        self.pausa = pausa
+        self.pausa_maxima = pausa_maxima
+        self.falhas_seguidas = 0
+        self.aberto_ate = None
+        self.testando = False
+        self._condicao = asyncio.Condition()
+
+    async def aguardar(self):
+        async with self._condicao:
+            while True:
+                if self.aberto_ate is None:
+                    return False
+                espera = self.aberto_ate - time.monotonic()
+                if espera > 0:
+                    try:
+                        await asyncio.wait_for(self._condicao.wait(), espera)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                # Pausa encerrada: libera uma única requisição de teste
+                if not self.testando:
+                    self.testando = True
+                    return True
+                await self._condicao.wait()
+
+    async def sucesso(self):
+        async with self._condicao:
+            self.falhas_seguidas = 0
+            if self.aberto_ate is not None:
+                print("Portal respondendo de novo, retomando a coleta")
+            self.aberto_ate = None
+            self.testando = False
+            self.pausa = self.pausa_inicial
+            self._condicao.notify_all()
+
+    async def falha(self):
+        async with self._condicao:
+            self.falhas_seguidas += 1
+            if self.testando:
+                # A requisição de teste falhou: pausa de novo, por mais tempo
+                self.testando = False
+                self.pausa = min(self.pausa * 2, self.pausa_maxima)
+                self._abrir()
+            elif self.aberto_ate is None and self.falhas_seguidas >= self.limite_falhas:
+                self._abrir()
+
+    # Fim da requisição de teste: se ela não informou sucesso() nem falha(), outra pode testar
+    async def encerrar_teste(self):
+        async with self._condicao:
+            if self.testando:
+                self.testando = False
+                self._condicao.notify_all()
+
+    def _abrir(self):
+        self.aberto_ate = time.monotonic() + self.pausa
+        print(f"{self.falhas_seguidas} falhas seguidas: coleta pausada por {self.pausa:.0f}s")
+        self._condicao.notify_all()
@@ -0,0 +1,184 @@
+import csv
+import json
+import os
+import sqlite3
+
+from extracao import CAMPOS
+from indice_cnpj import normalizar_cnpj
+
+# Saídas em arquivo para os registros das empresas
+# Todas recebem os registros um a um (gravar) e escrevem em lotes com I/O bufferizado,
+# então servem tanto para uma coleta em andamento quanto para exportar tudo de uma vez.
+# Formatos: CSV, JSONL, Parquet (colunar, comprimido; precisa do pyarrow) e SQLite (upsert por CNPJ).
+
+TAMANHO_LOTE_PADRAO = 1000  # registros por escrita
+BUFFER_ARQUIVO = 1024 * 1024  # bytes
+COMPRESSAO_PARQUET = "zstd"
+
+# Parquet é opcional
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Classe base: acumula os registros e chama escrever(lote) a cada `tamanho_lote`
+class Saida:
+    def __init__(self, caminho, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.buffer = []
+        self.gravados = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def gravar(self, dados):
+        self.buffer.append(dados)
+        if len(self.buffer) >= self.tamanho_lote:
+            self.descarregar()
+
+    def gravar_varios(self, registros):
+        for dados in registros:
+            self.gravar(dados)
+
+    def descarregar(self):
+        if self.buffer:
+            self.escrever(self.buffer)
+            self.gravados += len(self.buffer)
+            self.buffer = []
+
+    def escrever(self, lote):
+        raise NotImplementedError
+
+    def fechar(self):
+        self.descarregar()
+
+class SaidaCsv(Saida):
+    def __init__(self, caminho, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        super().__init__(caminho, tamanho_lote)
+        self.arquivo = open(caminho, "w", newline="", encoding="utf-8", buffering=BUFFER_ARQUIVO)
+        self.escritor = csv.DictWriter(self.arquivo, fieldnames=CAMPOS, extrasaction="ignore")
+        self.escritor.writeheader()
+
+    def escrever(self, lote):
+        self.escritor.writerows(lote)
+
+    def fechar(self):
+        super().fechar()
+        self.arquivo.close()
+
+# Com `anexar`, os registros vão para o fim de um arquivo que já existe
+class SaidaJsonl(Saida):
+    def __init__(self, caminho, tamanho_lote=TAMANHO_LOTE_PADRAO, anexar=False):
+        super().__init__(caminho, tamanho_lote)
+        self.arquivo = open(caminho, "a" if anexar else "w", encoding="utf-8", buffering=BUFFER_ARQUIVO)
+
+    def escrever(self, lote):
+        self.arquivo.write("".join(json.dumps({campo: dados[campo] for campo in CAMPOS}, ensure_ascii=False) + "\n"
+                                   for dados in lote))
+
+    def fechar(self):
+        super().fechar()
+        self.arquivo.close()
+
+# Cada lote vira um row group do arquivo Parquet
+class SaidaParquet(Saida):
+    def __init__(self, caminho, tamanho_lote=TAMANHO_LOTE_PADRAO * 10, compressao=COMPRESSAO_PARQUET):
+        if pyarrow is None:
+            raise RuntimeError("A saída Parquet precisa do pyarrow (pip install pyarrow)")
+        super().__init__(caminho, tamanho_lote)
+        self.esquema = pyarrow.schema([(campo, pyarrow.string()) for campo in CAMPOS])
+        self.escritor = pyarrow.parquet.ParquetWriter(caminho, self.esquema, compression=compressao)
+
+    def escrever(self, lote):
+        colunas = {campo: [dados[campo] for dados in lote] for campo in CAMPOS}
+        self.escritor.write_table(pyarrow.Table.from_pydict(colunas, schema=self.esquema))
+
+    def fechar(self):
+        super().fechar()
+        self.escritor.close()
+
+# Tabela `empresas` com uma coluna por campo; a chave é o CNPJ só com dígitos
+# (ou a razão social, quando não há CNPJ), então gravar de novo a mesma empresa atualiza a linha
+class SaidaSqlite(Saida):
+    def __init__(self, caminho, tamanho_lote=TAMANHO_LOTE_PADRAO, tabela="empresas"):
+        super().__init__(caminho, tamanho_lote)
+        self.tabela = tabela
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        colunas = ", ".join(f'"{campo}" TEXT' for campo in CAMPOS)
+        self.conexao.execute(f'CREATE TABLE IF NOT EXISTS "{tabela}" (chave TEXT PRIMARY KEY, {colunas})')
+        nomes = ", ".join(f'"{campo}"' for campo in CAMPOS)
+        atualizacoes = ", ".join(f'"{campo}" = excluded."{campo}"' for campo in CAMPOS)
+        self.sql_upsert = (
+            f'INSERT INTO "{tabela}" (chave, {nomes}) VALUES (?{", ?" * len(CAMPOS)}) '
+            f"ON CONFLICT (chave) DO UPDATE SET {atualizacoes}"
+        )
+
+    @staticmethod
+    def chave(dados):
+        return normalizar_cnpj(dados["CNPJ"]) or "razao:" + dados["Razão Social"]
+
+    def escrever(self, lote):
+        with self.conexao:
+            self.conexao.executemany(
+                self.sql_upsert, [(self.chave(dados),) + tuple(dados[campo] for campo in CAMPOS) for dados in lote]
+            )
+
+    # Apaga as empresas dos CNPJs informados
+    def remover(self, cnpjs):
+        self.descarregar()
+        with self.conexao:
+            self.conexao.executemany(
+                f'DELETE FROM "{self.tabela}" WHERE chave = ?', [(normalizar_cnpj(cnpj),) for cnpj in cnpjs]
+            )
+
+    def fechar(self):
+        super().fechar()
+        self.conexao.close()
+
+SAIDAS = {
+    "csv": SaidaCsv,
+    "jsonl": SaidaJsonl,
+    "parquet": SaidaParquet,
+    "sqlite": SaidaSqlite,
+}
+
+EXTENSOES = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".sqlite3": "sqlite",
+}
+
+# Descobre o formato pela extensão do arquivo (CSV se não reconhecer)
+def formato_do_caminho(caminho):
+    return EXTENSOES.get(os.path.splitext(caminho)[1].lower(), "csv")
+
+# Abre a saída do formato pedido (ou o da extensão do arquivo)
+def abrir_saida(caminho, formato=None):
+    return SAIDAS[formato or formato_do_caminho(caminho)](caminho)
+
+# Lê os registros de um arquivo JSONL ou Parquet gravado por estas saídas (lista vazia se não existe)
+def ler_registros(caminho, formato=None):
+    if not os.path.exists(caminho) or os.path.getsize(caminho) == 0:
+        return []
+    if (formato or formato_do_caminho(caminho)) == "parquet":
+        if pyarrow is None:
+            raise RuntimeError("A saída Parquet precisa do pyarrow (pip install pyarrow)")
+        return pyarrow.parquet.read_table(caminho).to_pylist()
+    with open(caminho, encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+# Adiciona a opção de formato a um ArgumentParser (o caminho fica com cada script)
+def adicionar_argumento_formato(parser):
+    parser.add_argument("--formato", choices=SAIDAS, default=None,
+                        help="Formato da saída: csv, jsonl, parquet ou sqlite (padrão: pela extensão do arquivo)")
@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+
+import aiohttp
+import requests
+from bs4 import BeautifulSoup
+
+from coletor import (TIMEOUT_PADRAO, coletar_detalhes, criar_controles, adicionar_argumentos_coleta,
+                     opcoes_coleta)
+from extracao import extrair_dados_empresa_rapido
+from espaco_ids import STATUS_HTTP_VAZIOS, dados_vazios
+from estado import EstadoCrawl, STATUS_OK, STATUS_ERRO, STATUS_VAZIA
+from indice_cnpj import normalizar_cnpj
+from listagem import ErroPagina, buscar_pesquisa, coletar_ids, payload_pesquisa, ler_total
+from pipeline import extrair_resultados, adicionar_argumentos_pipeline
+from resiliencia import TENTATIVAS_PADRAO
+from saidas import abrir_saida, adicionar_argumento_formato
+
+# Divisão da coleta do CIB em fatias (shards) disjuntas
+# Cada shard é uma combinação de filtros da pesquisa (ex.: estado x faixa de importação).
+# Os shards são distribuídos entre trabalhadores independentes (processos ou máquinas),
+# cada um com sua própria taxa de requisições, e os resultados são mesclados por CNPJ.
+#
+#   python CIB/shards.py planejar --dimensoes CodigoSubdivisaoPais CodigoFaixaImportacao --trabalhadores 4
+#   python CIB/shards.py trabalhar --trabalhador 0        (em cada máquina/processo)
+#   python CIB/shards.py local                           (todos os trabalhadores nesta máquina)
+#   python CIB/shards.py mesclar shard_*.jsonl --saida empresas.csv
+
+# URLs base
+URL_PESQUISA_COMPLETA = "https://cib.dpr.gov.br/Home/PesquisaCompleta"
+URL_DETALHE_EMPRESA = "https://cib.dpr.gov.br/Home/DetalheEmpresaPartial/"
+
+# Cabeçalhos das requisições
+HEADERS_POST = {
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+    "content-type": "application/x-www-form-urlencoded",
+    "referer": "https://cib.dpr.gov.br/Home/PesquisaCompleta",
+    "user-agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Mobile Safari/537.36",
+}
+HEADERS_GET = {
+    "accept": "text/html, */*; q=0.01",
+    "referer": "https://cib.dpr.gov.br/Home/PesquisaCompleta",
+    "user-agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Mobile Safari/537.36",
+    "x-requested-with": "XMLHttpRequest",
+}
+
+ARQUIVO_PLANO = "shards.json"
+DIMENSOES_PADRAO = ["CodigoSubdivisaoPais", "CodigoFaixaImportacao"]
+
+# Função para ler as opções de um filtro (<select name="...">) do formulário da pesquisa
+def descobrir_opcoes(html, campo):
+    soup = BeautifulSoup(html, "html.parser")
+    select = soup.find("select", attrs={"name": campo})
+    if not select:
+        return []
+    return [opcao["value"] for opcao in select.find_all("option") if opcao.get("value")]
+
+# Combina os valores de cada dimensão; como cada empresa tem um único valor por dimensão,
+# os shards não se sobrepõem
+def planejar_shards(valores_por_dimensao):
+    dimensoes = sorted(valores_por_dimensao)
+    shards = []
+    for combinacao in itertools.product(*(valores_por_dimensao[dimensao] for dimensao in dimensoes)):
+        filtros = dict(zip(dimensoes, combinacao))
+        chave = "|".join(f"{dimensao}={valor}" for dimensao, valor in filtros.items())
+        shards.append({"chave": chave, "filtros": filtros, "total": None})
+    return shards
+
+# Conta as empresas de cada shard lendo só a primeira página da pesquisa
+# Usa o mesmo ajuste de taxa, disjuntor e repetição da coleta; um shard que falhar em todas
+# as tentativas fica com total None (conta como tamanho 1 na distribuição) sem parar os outros
+async def _medir_shards(shards, taxa, rajada, concorrencia, taxa_maxima, tentativas):
+    limitador, controle, disjuntor = criar_controles(taxa, rajada, taxa_maxima)
+    semaforo = asyncio.Semaphore(concorrencia)
+    tempo_limite = aiohttp.ClientTimeout(total=TIMEOUT_PADRAO)
+    async with aiohttp.ClientSession(headers=HEADERS_POST, timeout=tempo_limite) as sessao:
+        async def medir(shard):
+            async with semaforo:
+                try:
+                    html = await buscar_pesquisa(sessao, URL_PESQUISA_COMPLETA, payload_pesquisa(1, 10, shard["filtros"]),
+                                                 limitador, f"shard {shard['chave'] or '(todos)'}", tentativas,
+                                                 controle, disjuntor)
+                except ErroPagina as erro:
+                    print(f"Não foi possível medir o {erro}")
+                    shard["total"] = None
+                    return
+                shard["total"] = ler_total(html)
+
+        await asyncio.gather(*(medir(shard) for shard in shards))
+
+def medir_shards(shards, taxa, rajada, concorrencia, taxa_maxima=None, tentativas=TENTATIVAS_PADRAO):
+    asyncio.run(_medir_shards(shards, taxa, rajada, concorrencia, taxa_maxima, tentativas))
+
+# Distribui os shards entre os trabalhadores: os maiores primeiro, sempre para o menos carregado
+# (shards sem medição contam como tamanho 1)
+def distribuir(shards, trabalhadores):
+    cargas = [0] * trabalhadores
+    for shard in sorted(shards, key=lambda shard: shard["total"] or 1, reverse=True):
+        trabalhador = cargas.index(min(cargas))
+        shard["trabalhador"] = trabalhador
+        cargas[trabalhador] += shard["total"] or 1
+    return cargas
+
+def salvar_plano(plano, caminho=ARQUIVO_PLANO):
+    with open(caminho, "w", encoding="utf-8") as file:
+        json.dump(plano, file, ensure_ascii=False, indent=2)
+
+def carregar_plano(caminho=ARQUIVO_PLANO):
+    with open(caminho, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+# Função para montar o plano de shards e salvá-lo em shards.json
+def planejar(args):
+    opcoes = opcoes_coleta(args)
+    response = requests.get(URL_PESQUISA_COMPLETA, headers=HEADERS_POST)
+    response.raise_for_status()
+
+    valores = {}
+    for dimensao in args.dimensoes:
+        valores[dimensao] = descobrir_opcoes(response.text, dimensao)
+        print(f"{dimensao}: {len(valores[dimensao])} opções")
+        if not valores[dimensao]:
+            print(f"Nenhuma opção encontrada para {dimensao}, verifique o nome do campo.")
+            return
+
+    shards = planejar_shards(valores)
+    if args.medir:
+        print(f"Medindo {len(shards)} shards...")
+        medir_shards(shards, **opcoes)
+        vazios = [shard for shard in shards if shard["total"] == 0]
+        shards = [shard for shard in shards if shard["total"] != 0]
+        print(f"{len(vazios)} shards vazios descartados")
+
+        # Sem filtro nenhum: se a soma dos shards for menor, há empresas sem valor em alguma dimensão
+        total_geral = [{"chave": "", "filtros": {}, "total": None}]
+        medir_shards(total_geral, **opcoes)
+        soma = sum(shard["total"] or 0 for shard in shards)
+        print(f"Soma dos shards: {soma} | total da pesquisa: {total_geral[0]['total']}")
+        if total_geral[0]["total"] and soma < total_geral[0]["total"]:
+            print("Atenção: os shards não cobrem todas as empresas; rode também um trabalhador sem filtros.")
+
+    cargas = distribuir(shards, args.trabalhadores)
+    salvar_plano({"dimensoes": args.dimensoes, "trabalhadores": args.trabalhadores, "shards": shards}, args.plano)
+    print(f"{len(shards)} shards salvos em {args.plano}; carga por trabalhador: {cargas}")
+
+# Função para processar os shards de um trabalhador, gravando os dados em shard_<n>.jsonl
+# O estado de cada trabalhador fica em um banco próprio, então ele pode ser interrompido e retomado
+def trabalhar(args):
+    plano = carregar_plano(args.plano)
+    opcoes = opcoes_coleta(args)
+    meus = [shard for shard in plano["shards"] if shard["trabalhador"] == args.trabalhador]
+    print(f"Trabalhador {args.trabalhador}: {len(meus)} shards")
+
+    with EstadoCrawl(f"cib_estado_shard{args.trabalhador}.db") as estado, \
+            open(f"shard_{args.trabalhador}.jsonl", "a", encoding="utf-8") as saida:
+        for shard in meus:
+            print(f"Shard {shard['chave']} ({shard['total'] or '?'} empresas)")
+            ids = coletar_ids(URL_PESQUISA_COMPLETA, HEADERS_POST, filtros=shard["filtros"], **opcoes)
+            ids = estado.pendentes(ids, max_tentativas=args.max_tentativas)
+            resultados = coletar_detalhes(ids, URL_DETALHE_EMPRESA, HEADERS_GET, **opcoes)
+            for resultado, dados in extrair_resultados(resultados, extrair_dados_empresa_rapido, args.processos):
+                if resultado.status in STATUS_HTTP_VAZIOS or (dados is not None and dados_vazios(dados)):
+                    # Id sem empresa: não vai para o arquivo e não é buscado de novo
+                    estado.registrar(resultado.empresa_id, STATUS_VAZIA, resultado.status)
+                    continue
+                if dados is None:
+                    print(f"Erro ao acessar empresa {resultado.empresa_id}: {resultado.erro or resultado.status}")
+                    estado.registrar(resultado.empresa_id, STATUS_ERRO, resultado.status)
+                    continue
+                saida.write(json.dumps(dados.como_dict(), ensure_ascii=False) + "\n")
+                saida.flush()
+                estado.registrar(resultado.empresa_id, STATUS_OK, resultado.status, dados["CNPJ"].replace("CNPJ", "").strip())
+
+        print(f"Trabalhador {args.trabalhador} concluído: {estado.resumo()}")
+
+# Função para rodar todos os trabalhadores do plano como processos independentes nesta máquina
+def local(args):
+    plano = carregar_plano(args.plano)
+    repassar = ["--plano", args.plano, "--taxa", str(args.taxa), "--rajada", str(args.rajada),
+                "--concorrencia", str(args.concorrencia), "--processos", str(args.processos),
+                "--tentativas", str(args.tentativas), "--max-tentativas", str(args.max_tentativas)]
+    if args.taxa_maxima is not None:
+        repassar += ["--taxa-maxima", str(args.taxa_maxima)]
+    processos = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "trabalhar", "--trabalhador", str(trabalhador)] + repassar)
+        for trabalhador in range(plano["trabalhadores"])
+    ]
+    codigos = [processo.wait() for processo in processos]
+    print(f"Trabalhadores encerrados com os códigos {codigos}")
+
+# Função para mesclar os arquivos dos trabalhadores, removendo CNPJs repetidos
+def mesclar(args):
+    vistos = set()
+    repetidos = 0
+    with abrir_saida(args.saida, args.formato) as saida:
+        for caminho in args.arquivos:
+            with open(caminho, "r", encoding="utf-8") as file:
+                for linha in file:
+                    if not linha.strip():
+                        continue
+                    dados = json.loads(linha)
+                    if dados_vazios(dados):
+                        continue  # arquivos de versões antigas podiam ter registros vazios
+                    cnpj = normalizar_cnpj(dados["CNPJ"])
+                    if cnpj and cnpj in vistos:
+                        repetidos += 1
+                        continue
+                    vistos.add(cnpj)
+                    saida.gravar(dados)
+    print(f"{saida.gravados} empresas gravadas em {args.saida} ({repetidos} repetidas ignoradas)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Divide a coleta do CIB em shards e distribui entre trabalhadores")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_planejar = subparsers.add_parser("planejar", help="Monta o plano de shards")
+    p_planejar.add_argument("--dimensoes", nargs="+", default=DIMENSOES_PADRAO,
+                            help=f"Campos da pesquisa usados para dividir (padrão: {' '.join(DIMENSOES_PADRAO)})")
+    p_planejar.add_argument("--trabalhadores", type=int, default=4, help="Número de trabalhadores (padrão: 4)")
+    p_planejar.add_argument("--sem-medir", dest="medir", action="store_false",
+                            help="Não conta as empresas de cada shard antes de distribuir")
+    p_planejar.set_defaults(funcao=planejar)
+
+    p_trabalhar = subparsers.add_parser("trabalhar", help="Processa os shards de um trabalhador")
+    p_trabalhar.add_argument("--trabalhador", type=int, required=True, help="Número deste trabalhador (começa em 0)")
+    p_trabalhar.set_defaults(funcao=trabalhar)
+
+    p_local = subparsers.add_parser("local", help="Roda todos os trabalhadores nesta máquina")
+    p_local.set_defaults(funcao=local)
+
+    for sub in (p_planejar, p_trabalhar, p_local):
+        sub.add_argument("--plano", default=ARQUIVO_PLANO, help=f"Arquivo do plano (padrão: {ARQUIVO_PLANO})")
+        adicionar_argumentos_coleta(sub)
+    for sub in (p_trabalhar, p_local):
+        adicionar_argumentos_pipeline(sub)
+        sub.add_argument("--max-tentativas", type=int, default=3,
+                         help="Tentativas por empresa antes de desistir dela (padrão: 3)")
+
+    p_mesclar = subparsers.add_parser("mesclar", help="Mescla os resultados dos trabalhadores por CNPJ")
+    p_mesclar.add_argument("arquivos", nargs="+", help="Arquivos shard_*.jsonl")
+    p_mesclar.add_argument("--saida", default="empresas.csv",
+                           help="Arquivo de saída: .csv, .jsonl, .parquet ou .db (padrão: empresas.csv)")
+    adicionar_argumento_formato(p_mesclar)
+    p_mesclar.set_defaults(funcao=mesclar)
+
+    args = parser.parse_args()
+    args.funcao(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import random
+import threading
+import time
+
+from extracao import CAMPOS, Empresa
+from indice_cnpj import COLUNA_CNPJ, requisicoes_remocao
+
+# Escrita em lote no Google Sheets
+# A planilha é aberta uma única vez e as linhas ficam em um buffer até atingir o tamanho
+# do lote ou o tempo máximo de espera; cada descarga é uma única chamada de append.
+
+TAMANHO_LOTE_PADRAO = 100  # linhas por chamada
+INTERVALO_PADRAO = 30  # segundos que uma linha pode esperar no buffer
+TENTATIVAS_PADRAO = 6
+
+# Códigos HTTP que indicam cota estourada ou instabilidade passageira da API
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+# Linhas atualizadas por chamada de batchUpdate
+INTERVALOS_POR_CHAMADA = 500
+
+# Letra de uma coluna (1 -> "A"); a planilha tem uma coluna por campo de CAMPOS
+def letra_coluna(numero):
+    return chr(ord("A") + numero - 1)
+
+COLUNA_FINAL = letra_coluna(len(CAMPOS))
+
+# Intervalo A1 de uma linha inteira da planilha (ex.: "A12:J12")
+def intervalo_linha(numero):
+    return f"A{numero}:{COLUNA_FINAL}{numero}"
+
+# Converte os dados de uma empresa (Empresa ou dicionário) para a linha da planilha
+def linha_empresa(dados):
+    if isinstance(dados, Empresa):
+        return list(dados.values())
+    return [dados[campo] for campo in CAMPOS]
+
+# Descobre o código HTTP de um erro do gspread (APIError) ou do googleapiclient (HttpError)
+def status_http(erro):
+    resposta = getattr(erro, "response", None)
+    if resposta is not None and getattr(resposta, "status_code", None) is not None:
+        return resposta.status_code
+    resposta = getattr(erro, "resp", None)
+    if resposta is not None and getattr(resposta, "status", None) is not None:
+        return int(resposta.status)
+    return None
+
+# Executa uma chamada à API repetindo com espera exponencial em caso de cota ou instabilidade
+def chamar_com_repeticao(funcao, tentativas=TENTATIVAS_PADRAO):
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return funcao()
+        except Exception as erro:
+            if status_http(erro) not in STATUS_REPETIVEIS or tentativa == tentativas:
+                raise
+            espera = min(64, 2 ** tentativa) + random.uniform(0, 1)
+            print(f"Cota do Google Sheets atingida ({status_http(erro)}), tentando novamente em {espera:.0f}s...")
+            time.sleep(espera)
+
+# Destinos: anexar(linhas) grava no fim da planilha; ler_cnpjs() lê a coluna de CNPJ inteira;
+# atualizar({numero: linha}) reescreve só as linhas informadas; remover(numeros) apaga linhas
+
+# Destino gspread: usa worksheet.append_rows
+class DestinoGspread:
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def anexar(self, linhas):
+        self.worksheet.append_rows(linhas, value_input_option="RAW")
+
+    def ler_cnpjs(self):
+        return self.worksheet.col_values(COLUNA_CNPJ)
+
+    def atualizar(self, linhas):
+        dados = [{"range": intervalo_linha(numero), "values": [linha]} for numero, linha in linhas.items()]
+        self.worksheet.batch_update(dados, value_input_option="RAW")
+
+    def remover(self, numeros):
+        self.worksheet.spreadsheet.batch_update({"requests": requisicoes_remocao(self.worksheet.id, numeros)})
+
+# Abre a primeira aba da planilha uma única vez
+def abrir_destino_gspread(client, spreadsheet_url):
+    return DestinoGspread(client.open_by_url(spreadsheet_url).sheet1)
+
+# Destino API v4 (googleapiclient): usa spreadsheets.values.append
+class DestinoApiV4:
+    def __init__(self, service, spreadsheet_id, range_name):
+        self.planilhas = service.spreadsheets()
+        self.valores = self.planilhas.values()
+        self.spreadsheet_id = spreadsheet_id
+        self.range_name = range_name
+        # Nome da aba do intervalo ("Empresas!A2" -> "Empresas"); sem aba, vale a primeira
+        self.aba = range_name.split("!")[0] if "!" in range_name else None
+        self._sheet_id = None
+
+    def _intervalo(self, intervalo):
+        return f"{self.aba}!{intervalo}" if self.aba else intervalo
+
+    def anexar(self, linhas):
+        self.valores.append(
+            spreadsheetId=self.spreadsheet_id, range=self.range_name, valueInputOption="RAW", body={"values": linhas}
+        ).execute()
+
+    def ler_cnpjs(self):
+        coluna = letra_coluna(COLUNA_CNPJ)
+        resposta = self.valores.get(spreadsheetId=self.spreadsheet_id, range=self._intervalo(f"{coluna}:{coluna}")).execute()
+        return [linha[0] if linha else "" for linha in resposta.get("values", [])]
+
+    def atualizar(self, linhas):
+        dados = [{"range": self._intervalo(intervalo_linha(numero)), "values": [linha]} for numero, linha in linhas.items()]
+        self.valores.batchUpdate(
+            spreadsheetId=self.spreadsheet_id, body={"valueInputOption": "RAW", "data": dados}
+        ).execute()
+
+    # Id numérico da aba, necessário para o deleteDimension (lido uma vez)
+    def sheet_id(self):
+        if self._sheet_id is None:
+            planilha = self.planilhas.get(spreadsheetId=self.spreadsheet_id, fields="sheets.properties").execute()
+            abas = [aba["properties"] for aba in planilha["sheets"]]
+            escolhida = next((aba for aba in abas if aba["title"] == self.aba), abas[0])
+            self._sheet_id = escolhida["sheetId"]
+        return self._sheet_id
+
+    def remover(self, numeros):
+        self.planilhas.batchUpdate(
+            spreadsheetId=self.spreadsheet_id, body={"requests": requisicoes_remocao(self.sheet_id(), numeros)}
+        ).execute()
+
+# `ao_gravar`, se informado, recebe os marcadores das linhas depois que o lote delas foi
+# aceito pela API (útil para só marcar uma empresa como concluída quando ela está na planilha)
+# Dentro do `with`, uma thread confere a idade do buffer a cada segundo: as linhas não ficam
+# paradas esperando a próxima chamada de adicionar quando a coleta demora ou termina. O
+# `ao_gravar` dos lotes enviados por ela roda na thread de quem usa o escritor, na próxima
+# chamada de adicionar ou descarregar (o SQLite do estado só pode ser usado na thread que o abriu).
+# O lote sai do buffer antes do envio: a espera entre tentativas não segura quem só está
+# adicionando linhas (`_trava` protege o buffer; `_trava_envio` mantém os lotes em ordem).
+class EscritorSheets:
+    def __init__(self, destino, tamanho_lote=TAMANHO_LOTE_PADRAO, intervalo=INTERVALO_PADRAO, tentativas=TENTATIVAS_PADRAO, ao_gravar=None):
+        self.destino = destino
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.tentativas = tentativas
+        self.ao_gravar = ao_gravar
+        self.buffer = []
+        self.marcadores = []
+        self.inicio_buffer = None
+        self.linhas_gravadas = 0
+        self._trava = threading.Lock()
+        self._trava_envio = threading.Lock()
+        self._gravados = []  # marcadores de lotes já aceitos, aguardando o ao_gravar
+        self._erro = None  # falha de um envio feito pela thread, repassada a quem usa o escritor
+        self._parar = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._vigiar, name="escritor-sheets", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        self._parar.set()
+        self._thread.join()
+        self._erro = None  # o que falhou na thread continua no buffer e vai agora
+        if tipo is None:
+            self.descarregar()
+            return
+        # O corpo do `with` falhou: uma única tentativa de gravar o que sobrou, sem esperas,
+        # e o erro original é o que chega a quem chamou
+        try:
+            self._enviar(tentativas=1)
+            self._repassar_gravados()
+        except Exception as erro:
+            print(f"{len(self.buffer)} linhas não foram enviadas para o Google Sheets ({erro!r})")
+
+    def _vigiar(self):
+        while not self._parar.wait(min(1, self.intervalo)):
+            with self._trava:
+                if self._erro is not None or not self._vencido():
+                    continue
+            try:
+                self._enviar()
+            except Exception as erro:
+                with self._trava:
+                    self._erro = erro
+
+    def _vencido(self):
+        return bool(self.buffer) and time.monotonic() - self.inicio_buffer >= self.intervalo
+
+    # Adiciona uma linha ao buffer e descarrega se o lote encheu ou se a linha mais antiga já esperou demais
+    def adicionar(self, linha, marcador=None):
+        with self._trava:
+            self._conferir_erro()
+            if not self.buffer:
+                self.inicio_buffer = time.monotonic()
+            self.buffer.append(linha)
+            if marcador is not None:
+                self.marcadores.append(marcador)
+            cheio = len(self.buffer) >= self.tamanho_lote or self._vencido()
+        if cheio:
+            self._enviar()
+        self._repassar_gravados()
+
+    # Envia todo o buffer em uma única chamada, repetindo com espera exponencial em caso de cota
+    def descarregar(self):
+        with self._trava:
+            self._conferir_erro()
+        self._enviar()
+        self._repassar_gravados()
+
+    def _conferir_erro(self):
+        if self._erro is not None:
+            erro, self._erro = self._erro, None
+            raise erro
+
+    # Tira o buffer inteiro e envia sem segurar `_trava`; se a API falhar de vez, as linhas
+    # voltam para a frente do buffer
+    def _enviar(self, tentativas=None):
+        with self._trava_envio:
+            with self._trava:
+                if not self.buffer:
+                    return
+                linhas, marcadores, inicio = self.buffer, self.marcadores, self.inicio_buffer
+                self.buffer, self.marcadores, self.inicio_buffer = [], [], None
+            try:
+                chamar_com_repeticao(lambda: self.destino.anexar(linhas), tentativas or self.tentativas)
+            except Exception:
+                with self._trava:
+                    self.buffer = linhas + self.buffer
+                    self.marcadores = marcadores + self.marcadores
+                    self.inicio_buffer = inicio
+                raise
+
+            print(f"{len(linhas)} linhas enviadas para o Google Sheets")
+            with self._trava:
+                self.linhas_gravadas += len(linhas)
+                self._gravados.extend(marcadores)
+
+    def _repassar_gravados(self):
+        with self._trava:
+            marcadores, self._gravados = self._gravados, []
+        if self.ao_gravar is not None and marcadores:
+            self.ao_gravar(marcadores)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os módulos do CIB se importam pelo nome (from coletor import ...), como quando os scripts
+# são rodados de dentro da pasta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
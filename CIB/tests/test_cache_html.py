@@ -0,0 +1,89 @@
+import os
+import random
+import string
+
+import pytest
+
+import cache_html
+from cache_html import CacheHtml
+
+# Relógio controlado pelo teste no lugar de time.time()
+class Relogio:
+    def __init__(self):
+        self.agora = 1_000_000.0
+
+    def time(self):
+        return self.agora
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_html, "time", relogio)
+    return relogio
+
+def html_aleatorio(semente, tamanho=4000):
+    gerador = random.Random(semente)
+    return "".join(gerador.choice(string.ascii_letters) for _ in range(tamanho))
+
+def test_grava_e_le_com_conteudo_compartilhado(tmp_path, relogio):
+    with CacheHtml(str(tmp_path / "cache")) as cache:
+        cache.gravar("u/1", 200, "<p>igual</p>")
+        cache.gravar("u/2", 200, "<p>igual</p>")
+        cache.gravar("u/3", 404, "")
+        cache.gravar("u/4", 503, "<p>fora</p>")
+        assert cache.obter("u/1") == (200, "<p>igual</p>")
+        assert cache.obter("u/3") == (404, "")
+        assert cache.obter("u/4") is None
+        resumo = cache.resumo()
+        assert (resumo["respostas"], resumo["objetos"], resumo["acertos"], resumo["faltas"]) == (3, 2, 2, 1)
+
+def test_ttl(tmp_path, relogio):
+    with CacheHtml(str(tmp_path / "cache"), ttl_dias=1) as cache:
+        cache.gravar("u/1", 200, "<p>velha</p>")
+        relogio.agora += 86400 + 1
+        cache.gravar("u/2", 200, "<p>nova</p>")
+        assert cache.obter("u/1") is None
+        assert cache.obter("u/1", aceitar_expirado=True) == (200, "<p>velha</p>")
+        assert cache.obter("u/2") == (200, "<p>nova</p>")
+        assert cache.limpar_expirados() == 1
+        assert cache.resumo()["objetos"] == 1
+        assert len([nome for _, _, nomes in os.walk(tmp_path / "cache" / "objetos") for nome in nomes]) == 1
+
+def test_despeja_as_menos_acessadas_ate_caber(tmp_path, relogio):
+    with CacheHtml(str(tmp_path / "cache")) as cache:
+        for empresa_id in range(1, 5):
+            relogio.agora += 1
+            cache.gravar(f"u/{empresa_id}", 200, html_aleatorio(empresa_id))
+        tamanho_objeto = cache.tamanho_total / 4
+        # u/1 foi lida por último: a menos acessada passa a ser u/2
+        relogio.agora += 1
+        cache.obter("u/1")
+        cache.tamanho_maximo = int(tamanho_objeto * 4.2)
+        relogio.agora += 1
+        cache.gravar("u/5", 200, html_aleatorio(5))
+        assert cache.tamanho_total <= cache.tamanho_maximo * 0.9
+        presentes = [empresa_id for empresa_id in range(1, 6) if cache.obter(f"u/{empresa_id}") is not None]
+        assert presentes == [1, 4, 5]
+
+def test_conteudo_corrompido_volta_a_ser_buscado(tmp_path, relogio):
+    with CacheHtml(str(tmp_path / "cache")) as cache:
+        cache.gravar("u/1", 200, "<p>x</p>")
+        for raiz, _, nomes in os.walk(tmp_path / "cache" / "objetos"):
+            for nome in nomes:
+                with open(os.path.join(raiz, nome), "wb") as arquivo:
+                    arquivo.write(b"lixo")
+        assert cache.obter("u/1") is None
+        assert cache.obter("u/1", aceitar_expirado=True) is None
+
+def test_replay_em_ordem_de_id_e_sem_ttl(tmp_path, relogio):
+    caminho = str(tmp_path / "cache")
+    with CacheHtml(caminho, ttl_dias=1) as cache:
+        for empresa_id in [10, 2, 33]:
+            cache.gravar(f"https://cib/detalhe/{empresa_id}", 200, f"<p>{empresa_id}</p>")
+        cache.gravar("https://cib/detalhe/7", 404, "")
+        cache.gravar("https://cib/outra/1", 200, "<p>outra</p>")
+    relogio.agora += 10 * 86400
+    with CacheHtml(caminho, ttl_dias=1) as cache:
+        resultados = list(cache.resultados("https://cib/detalhe/"))
+    assert [(resultado.empresa_id, resultado.status) for resultado in resultados] == [(2, 200), (7, 404), (10, 200), (33, 200)]
+    assert resultados[0].html == "<p>2</p>" and resultados[0].erro is None
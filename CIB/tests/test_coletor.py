@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from coletor import LimitadorTaxa, buscar_detalhes
+
+# Sobe um servidor aiohttp local com `tratar(request, empresa_id)` em /detalhe/{id}, roda
+# `cenario(url_base)` e devolve o que ele devolver
+def rodar_com_servidor(tratar, cenario):
+    async def principal():
+        async def rota(request):
+            return await tratar(request, int(request.match_info["id"]))
+
+        app = web.Application()
+        app.router.add_get("/detalhe/{id}", rota)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        porta = site._server.sockets[0].getsockname()[1]
+        try:
+            return await cenario(f"http://127.0.0.1:{porta}/detalhe/")
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(principal())
+
+async def coletar(ids, url_base, limitador, **opcoes):
+    return [resultado async for resultado in buscar_detalhes(ids, url_base, {}, limitador, **opcoes)]
+
+def test_limitador_respeita_taxa_e_rajada():
+    chegadas = []
+
+    async def tratar(request, empresa_id):
+        chegadas.append(time.monotonic())
+        return web.Response(text="ok")
+
+    taxa, rajada, total = 20, 2, 12
+    resultados = rodar_com_servidor(
+        tratar, lambda url: coletar(range(total), url, LimitadorTaxa(taxa, rajada), concorrencia=8))
+
+    assert sorted(resultado.empresa_id for resultado in resultados) == list(range(total))
+    chegadas.sort()
+    # Depois da rajada inicial, as requisições saem no ritmo da taxa
+    assert chegadas[-1] - chegadas[0] >= (total - rajada) / taxa * 0.9
+    for inicio in range(total):
+        for fim in range(inicio + 1, total):
+            janela = chegadas[fim] - chegadas[inicio]
+            assert fim - inicio + 1 <= rajada + janela * taxa + 1
+
+def test_concorrencia_limita_requisicoes_em_andamento():
+    em_andamento = 0
+    maximo = 0
+
+    async def tratar(request, empresa_id):
+        nonlocal em_andamento, maximo
+        em_andamento += 1
+        maximo = max(maximo, em_andamento)
+        await asyncio.sleep(0.05)
+        em_andamento -= 1
+        return web.Response(text="ok")
+
+    resultados = rodar_com_servidor(
+        tratar, lambda url: coletar(range(20), url, LimitadorTaxa(1000, 100), concorrencia=3))
+
+    assert len(resultados) == 20
+    assert maximo == 3
+
+def test_repete_503_com_retry_after_e_nao_repete_404():
+    chamadas = {}
+
+    async def tratar(request, empresa_id):
+        chamadas[empresa_id] = chamadas.get(empresa_id, 0) + 1
+        if empresa_id == 1 and chamadas[empresa_id] < 3:
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        if empresa_id == 2:
+            return web.Response(status=404)
+        return web.Response(text=f"empresa {empresa_id}")
+
+    resultados = rodar_com_servidor(
+        tratar, lambda url: coletar([1, 2], url, LimitadorTaxa(1000, 100), tentativas=4))
+
+    por_id = {resultado.empresa_id: resultado for resultado in resultados}
+    assert (por_id[1].status, por_id[1].html) == (200, "empresa 1")
+    assert por_id[2].status == 404
+    assert chamadas == {1: 3, 2: 1}
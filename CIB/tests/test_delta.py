@@ -0,0 +1,82 @@
+import csv
+import json
+
+import pytest
+
+import cib
+from coletor import ResultadoBusca
+
+def pagina(empresa_id, bairro="Centro"):
+    return (f'<div class="campo-detalhe full"><span class="valor">EMPRESA {empresa_id} '
+            f'CNPJ 00.000.000/0001-{empresa_id:02d}</span></div>'
+            f'<label>Bairro</label><span class="valor">{bairro}</span>')
+
+@pytest.fixture
+def coleta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def coletar_detalhes(ids, *args, **kwargs):
+        for empresa_id in ids:
+            yield ResultadoBusca(empresa_id, 200, pagina(empresa_id), None)
+
+    monkeypatch.setattr(cib, "coletar_detalhes", coletar_detalhes)
+    return tmp_path
+
+def linhas_csv(caminho):
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        return list(csv.DictReader(arquivo))
+
+def test_outro_arquivo_recebe_todas_as_empresas(coleta):
+    cib.processar_empresas(range(1, 4), {}, "a.csv")
+    cib.processar_empresas(range(1, 4), {}, "b.csv")
+    assert len(linhas_csv("b.csv")) == 3
+
+def test_arquivo_apagado_e_regravado(coleta):
+    cib.processar_empresas(range(1, 4), {}, "a.csv")
+    (coleta / "a.csv").unlink()
+    cib.processar_empresas(range(1, 4), {}, "a.csv")
+    assert len(linhas_csv("a.csv")) == 3
+
+def test_arquivo_repetido_nao_duplica(coleta):
+    cib.processar_empresas(range(1, 4), {}, "a.csv")
+    cib.processar_empresas(range(1, 4), {}, "a.csv")
+    assert len(linhas_csv("a.csv")) == 3
+
+def test_troca_de_formato_grava_tudo(coleta):
+    cib.processar_empresas(range(1, 4), {}, "a.csv")
+    cib.processar_empresas(range(1, 4), {}, "a.db", "sqlite")
+    import sqlite3
+    assert sqlite3.connect("a.db").execute("SELECT COUNT(*) FROM empresas").fetchone()[0] == 3
+
+def linhas_jsonl(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+def test_jsonl_recebe_o_delta(coleta, monkeypatch):
+    cib.processar_empresas(range(1, 3), {}, "a.jsonl")
+    cib.processar_empresas(range(1, 3), {}, "a.jsonl")
+    assert len(linhas_jsonl("a.jsonl")) == 2
+
+    # Só a empresa nova é anexada
+    cib.processar_empresas(range(1, 4), {}, "a.jsonl")
+    assert [dados["Razão Social"] for dados in linhas_jsonl("a.jsonl")] == ["EMPRESA 1", "EMPRESA 2", "EMPRESA 3"]
+
+    # A empresa 2 some do portal e a 3 muda de bairro: o arquivo é reescrito
+    def coletar_detalhes(ids, *args, **kwargs):
+        for empresa_id in ids:
+            if empresa_id == 2:
+                yield ResultadoBusca(empresa_id, 404, "", None)
+            else:
+                yield ResultadoBusca(empresa_id, 200, pagina(empresa_id, "Sul" if empresa_id == 3 else "Centro"), None)
+
+    monkeypatch.setattr(cib, "coletar_detalhes", coletar_detalhes)
+    cib.processar_empresas(range(1, 4), {}, "a.jsonl")
+    assert [(dados["Razão Social"], dados["Bairro"]) for dados in linhas_jsonl("a.jsonl")] == [
+        ("EMPRESA 1", "Centro"), ("EMPRESA 3", "Sul")]
+
+def test_parquet_recebe_o_delta(coleta):
+    pytest.importorskip("pyarrow")
+    cib.processar_empresas(range(1, 3), {}, "a.parquet")
+    cib.processar_empresas(range(1, 4), {}, "a.parquet")
+    import pyarrow.parquet
+    assert pyarrow.parquet.read_table("a.parquet").num_rows == 3
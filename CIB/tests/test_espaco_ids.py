@@ -0,0 +1,88 @@
+import threading
+
+from coletor import ResultadoBusca
+from espaco_ids import VarreduraEsparsa, encontrar_maior_id
+from estado import STATUS_OK, STATUS_VAZIA
+
+# Coleta falsa em ordem: cada id pedido à varredura recebe o resultado antes do próximo
+def varrer(varredura, ocupados):
+    buscados = []
+    for empresa_id in varredura:
+        buscados.append(empresa_id)
+        varredura.registrar(empresa_id, empresa_id not in ocupados)
+    return buscados
+
+def test_encontrar_maior_id_atravessa_buracos():
+    ocupados = set(range(1, 40)) | set(range(250, 520)) | set(range(2300, 2311))
+    sondados = []
+
+    def sondar(ids):
+        sondados.extend(ids)
+        return ocupados.intersection(ids)
+
+    assert encontrar_maior_id(sondar, janela=8, dobras_extras=3) == 2310
+    assert len(sondados) < 300
+
+def test_encontrar_maior_id_sem_empresas():
+    assert encontrar_maior_id(lambda ids: set()) is None
+
+def test_varredura_pula_faixa_vazia_e_acha_o_comeco_da_proxima():
+    ocupados = set(range(1, 21)) | set(range(700, 731))
+    varredura = VarreduraEsparsa(730, limite_vazios=10, salto_inicial=16, salto_maximo=64)
+    buscados = varrer(varredura, ocupados)
+    assert ocupados <= set(buscados)
+    assert len(buscados) < 200
+    assert varredura.pulados + len(buscados) >= 730 - 10
+
+def test_conhecidos_nao_sao_buscados_mas_contam_como_vazios():
+    conhecidos = {empresa_id: STATUS_VAZIA for empresa_id in range(1, 31)}
+    conhecidos[31] = STATUS_OK
+    varredura = VarreduraEsparsa(40, conhecidos=conhecidos, limite_vazios=100)
+    assert varrer(varredura, set(range(32, 41))) == list(range(32, 41))
+
+def test_vazios_seguidos_contados_em_ordem_de_id():
+    varredura = VarreduraEsparsa(100, limite_vazios=3)
+    ids = iter(varredura)
+    assert [next(ids) for _ in range(4)] == [1, 2, 3, 4]
+    # Resultados fora de ordem: 2, 3 e 4 vazios, mas o 1 ainda não respondeu
+    for empresa_id in (4, 3, 2):
+        varredura.registrar(empresa_id, True)
+    assert (varredura.fronteira, varredura.vazios_seguidos) == (1, 0)
+    varredura.registrar(1, False)
+    assert (varredura.fronteira, varredura.vazios_seguidos) == (5, 3)
+    varredura.registrar(6, True)
+    varredura.registrar(5, False)
+    assert (varredura.fronteira, varredura.vazios_seguidos) == (7, 1)
+
+def test_parar_libera_quem_espera_uma_sonda():
+    varredura = VarreduraEsparsa(10_000, limite_vazios=2, salto_inicial=16)
+    ids = iter(varredura)
+    for _ in range(2):
+        varredura.registrar(next(ids), True)
+    assert next(ids) == 18  # primeira sonda depois de dois vazios
+
+    fim = []
+    thread = threading.Thread(target=lambda: fim.append(next(ids, None)), daemon=True)
+    thread.start()  # fica esperando a resposta da sonda 18
+    thread.join(0.2)
+    assert thread.is_alive()
+    varredura.parar()
+    thread.join(5)
+    assert not thread.is_alive() and fim == [None]
+
+def test_fechar_acompanhar_para_a_varredura():
+    varredura = VarreduraEsparsa(10_000, limite_vazios=1, salto_inicial=16)
+    fechado = []
+
+    def coleta(ids):
+        try:
+            for empresa_id in ids:
+                yield ResultadoBusca(empresa_id, 404, "", None)
+        finally:
+            fechado.append(True)
+
+    resultados = varredura.acompanhar(coleta(iter(varredura)))
+    next(resultados)
+    resultados.close()
+    assert fechado == [True]
+    assert list(varredura) == []
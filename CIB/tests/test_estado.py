@@ -0,0 +1,54 @@
+from estado import STATUS_DUPLICADA, STATUS_ERRO, STATUS_OK, STATUS_VAZIA, EstadoCrawl
+
+def test_registrar_varios_em_uma_transacao(tmp_path):
+    with EstadoCrawl(str(tmp_path / "estado.db")) as estado:
+        estado.registrar(1, STATUS_ERRO, 503)
+        comandos = []
+        estado.conexao.set_trace_callback(comandos.append)
+        estado.registrar_varios([(1, STATUS_OK, 200, "111"), (2, STATUS_OK, 200, "222"), (3, STATUS_ERRO, None, None)])
+        estado.conexao.set_trace_callback(None)
+
+        assert sum(comando.startswith("BEGIN") for comando in comandos) == 1
+        assert sum(comando.startswith("COMMIT") for comando in comandos) == 1
+        linhas = estado.conexao.execute("SELECT empresa_id, status, tentativas, cnpj FROM empresas ORDER BY empresa_id").fetchall()
+        assert linhas == [(1, STATUS_OK, 2, "111"), (2, STATUS_OK, 1, "222"), (3, STATUS_ERRO, 1, None)]
+
+def test_pendentes_e_concluidos(tmp_path):
+    with EstadoCrawl(str(tmp_path / "estado.db")) as estado:
+        estado.registrar(1, STATUS_OK, 200, "111")
+        estado.registrar(2, STATUS_DUPLICADA, 200, "111")
+        estado.registrar(3, STATUS_VAZIA, 404)
+        estado.registrar(4, STATUS_ERRO, 503)
+        estado.registrar(5, STATUS_ERRO, None)
+        estado.registrar(5, STATUS_ERRO, 500)
+
+        assert estado.concluidos() == {1: STATUS_OK, 2: STATUS_DUPLICADA, 3: STATUS_VAZIA}
+        assert list(estado.pendentes([7, 5, 1, 4, 6, 3])) == [7, 5, 4, 6]
+        # Falhas que esgotaram as tentativas ficam de fora; sem reprocessar, todas ficam
+        assert list(estado.pendentes(range(1, 8), max_tentativas=2)) == [4, 6, 7]
+        assert list(estado.pendentes(range(1, 8), reprocessar_falhas=False)) == [6, 7]
+        assert estado.resumo() == {STATUS_OK: 1, STATUS_DUPLICADA: 1, STATUS_VAZIA: 1, STATUS_ERRO: 2}
+
+def test_estado_sobrevive_a_reabertura(tmp_path):
+    caminho = str(tmp_path / "estado.db")
+    with EstadoCrawl(caminho) as estado:
+        estado.registrar(1, STATUS_OK, 200, "111")
+        estado.registrar(2, STATUS_ERRO, 503)
+    with EstadoCrawl(caminho) as estado:
+        assert list(estado.pendentes([1, 2, 3])) == [2, 3]
+        # Uma falha que depois dá certo mantém a contagem de tentativas
+        estado.registrar(2, STATUS_OK, 200, "222")
+        assert estado.conexao.execute("SELECT tentativas FROM empresas WHERE empresa_id = 2").fetchone() == (2,)
+        assert list(estado.pendentes([1, 2, 3])) == [3]
+
+def test_cnpjs_processados_inclui_o_txt_antigo(tmp_path):
+    legado = tmp_path / "cnpjs_extraidos.txt"
+    legado.write_text("333\n\n444\n333\n")
+    with EstadoCrawl(str(tmp_path / "estado.db")) as estado:
+        estado.registrar(1, STATUS_OK, 200, "111")
+        estado.registrar(2, STATUS_DUPLICADA, 200, "222")
+        estado.registrar(3, STATUS_ERRO, 503)
+        assert estado.importar_cnpjs_txt(str(legado)) == 2
+        assert estado.importar_cnpjs_txt(str(legado)) == 0
+        assert estado.importar_cnpjs_txt(str(tmp_path / "nao_existe.txt")) == 0
+        assert estado.cnpjs_processados() == {"111", "333", "444"}
@@ -0,0 +1,70 @@
+import pickle
+
+import pytest
+
+from cib import extrair_dados_empresa
+from extracao import BACKENDS, SEM_INFORMACAO, CAMPOS, extrair_dados_empresa_rapido
+
+COMPLETO = """
+<div class="campo-detalhe full"><label>Razão social</label>
+  <span class="valor">EMPRESA EXEMPLO LTDA CNPJ 12.345.678/0001-90</span></div>
+<div class="campo-detalhe"><label>e-mail</label><span class="valor">contato@exemplo.com</span></div>
+<div class="campo-detalhe"><label>Website</label><span class="valor"><a href="#">www.exemplo.com</a></span></div>
+<div class="campo-detalhe"><label><b>Contato</b></label><span class="valor">Fulano de Tal</span></div>
+<div class="campo-detalhe"><label>Faixa de importação anual</label><span class="valor">Até US$ 1 milhão</span></div>
+<div class="campo-detalhe"><label>Bairro</label><span class="valor"> Centro </span></div>
+<div class="campo-detalhe"><label>Cidade/Estado</label><span class="valor">São Paulo/SP</span></div>
+<div class="campo-detalhe"><label>CEP</label><span class="valor">01000-000</span></div>
+<div class="campo-detalhe"><label>Telefone</label><span class="valor">(11) 5555-0000</span></div>
+"""
+
+# Tags sem fechamento, rótulo sem valor e rótulo repetido
+MALFORMADO = """
+<div class="campo-detalhe full"><span class="valor">SEM CNPJ NO TEXTO
+<div><label>Bairro</label><span class="valor">Vila <i>Nova</span>
+<label>CEP</label>
+<label>Bairro</label><span class="valor">Outro</span>
+<label>Telefone</label><span class="valor">123
+"""
+
+ENTRADAS = {
+    "completo": COMPLETO,
+    "malformado": MALFORMADO,
+    "vazio": "",
+    "espacos": "  \n\t ",
+    "comentario": "<!-- nada aqui -->",
+    "sem_rotulos": "<html><body><p>Página de erro</p></body></html>",
+}
+
+@pytest.mark.parametrize("nome", ENTRADAS)
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_iguais_ao_beautifulsoup(backend, nome):
+    html = ENTRADAS[nome]
+    assert extrair_dados_empresa_rapido(html, backend).como_dict() == extrair_dados_empresa(html)
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_corpo_vazio_devolve_registro_sem_informacao(backend):
+    dados = extrair_dados_empresa_rapido("", backend)
+    assert list(dados.values()) == [SEM_INFORMACAO] * len(CAMPOS)
+
+def test_completo_le_todos_os_campos():
+    dados = extrair_dados_empresa_rapido(COMPLETO, "html.parser")
+    assert dados["CNPJ"] == "CNPJ 12.345.678/0001-90"
+    assert dados["Tomador de Decisões"] == "Fulano de Tal"
+    assert SEM_INFORMACAO not in dados.values()
+
+def test_empresa_se_comporta_como_dicionario():
+    dados = extrair_dados_empresa_rapido(COMPLETO, "html.parser")
+    assert "CNPJ" in dados and "cnpj" not in dados
+    assert list(dados) == CAMPOS
+    assert dict(dados) == dados.como_dict() == extrair_dados_empresa(COMPLETO)
+    assert {**dados}["Bairro"] == dados.bairro == dados[CAMPOS.index("Bairro")]
+
+def test_empresa_sobrevive_a_pickle_e_replace():
+    dados = extrair_dados_empresa_rapido(COMPLETO, "html.parser")
+    copia = pickle.loads(pickle.dumps(dados))
+    assert copia == dados and copia.como_dict() == dados.como_dict()
+    assert all(valor is SEM_INFORMACAO for valor in pickle.loads(pickle.dumps(extrair_dados_empresa_rapido(""))).values())
+    trocado = dados._replace(bairro="Lapa")
+    assert trocado["Bairro"] == "Lapa" and trocado["CNPJ"] == dados["CNPJ"]
+    assert dados._asdict()["cnpj"] == dados["CNPJ"]
@@ -0,0 +1,69 @@
+from indice_cnpj import IndiceCnpj, remover_duplicadas
+
+CABECALHO = ["Razão Social", "CNPJ", "E-mail"]
+
+# Aba falsa do gspread: get_values devolve a área usada, como a API
+class AbaFalsa:
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def get_values(self):
+        return [list(linha) for linha in self.linhas]
+
+def test_carregar_conta_linhas_do_fim_sem_cnpj():
+    aba = AbaFalsa([
+        CABECALHO,
+        ["A", "CNPJ 11.111.111/0001-11", ""],
+        ["B", "", "b@exemplo.com"],
+        ["C", "", ""],
+    ])
+    indice = IndiceCnpj.carregar(aba)
+    assert indice.total_linhas == 4
+    assert indice.linha("11111111000111") == 2
+    assert indice.registrar_anexada("22.222.222/0001-22") == 5
+
+def test_carregar_aceita_linhas_mais_curtas():
+    indice = IndiceCnpj.carregar(AbaFalsa([CABECALHO, ["só a razão"], ["C", "33333333000133"]]))
+    assert indice.total_linhas == 3
+    assert indice.linha("33333333000133") == 3
+
+# Planilha falsa: guarda cada batchUpdate
+class PlanilhaFalsa:
+    def __init__(self):
+        self.chamadas = []
+
+    def batch_update(self, corpo):
+        self.chamadas.append(corpo)
+
+def test_deduplicacao_pelo_cnpj_normalizado():
+    indice = IndiceCnpj(["CNPJ", "11.111.111/0001-11", "22222222000122", "CNPJ 11111111000111", "", "22.222.222/0001-22"])
+    assert "11111111000111" in indice
+    assert "CNPJ 22.222.222/0001-22" in indice
+    assert len(indice) == 2
+    assert indice.linhas_duplicadas() == [4, 6]
+
+def test_remover_duplicadas_em_um_unico_batch_update():
+    cnpjs = {"A": "11111111000111", "B": "22222222000122", "C": "33333333000133", "D": "44444444000144"}
+    indice = IndiceCnpj(["CNPJ"] + [cnpjs[letra] for letra in "ABAACBDC"])
+    aba = AbaFalsa([])
+    aba.id = 7
+    aba.spreadsheet = PlanilhaFalsa()
+
+    assert remover_duplicadas(aba, indice) == 4
+    assert len(aba.spreadsheet.chamadas) == 1
+    faixas = [(requisicao["deleteDimension"]["range"]["startIndex"], requisicao["deleteDimension"]["range"]["endIndex"])
+              for requisicao in aba.spreadsheet.chamadas[0]["requests"]]
+    # Linhas 4-5, 7 e 9 (índices a partir de 0), de baixo para cima
+    assert faixas == [(8, 9), (6, 7), (3, 5)]
+    assert all(requisicao["deleteDimension"]["range"]["sheetId"] == 7
+               for requisicao in aba.spreadsheet.chamadas[0]["requests"])
+    # O índice acompanha as linhas que subiram
+    assert indice.linhas_duplicadas() == []
+    assert [indice.linha(cnpjs[letra]) for letra in "ABCD"] == [2, 3, 4, 5]
+    assert indice.total_linhas == 5
+
+def test_sem_duplicadas_nao_chama_a_api():
+    aba = AbaFalsa([])
+    aba.spreadsheet = PlanilhaFalsa()
+    assert remover_duplicadas(aba, IndiceCnpj(["CNPJ", "1", "2"])) == 0
+    assert aba.spreadsheet.chamadas == []
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from coletor import LimitadorTaxa
+from listagem import ErroPagina, ler_ids, ler_total, listar_ids, payload_pesquisa
+
+# Portal falso: `total` empresas com ids 1..total, páginas de até `maximo` por página
+# (pedidos maiores que `recusa_acima` levam 400); `falhas` são páginas que sempre dão 503
+class PortalFalso:
+    def __init__(self, total, maximo, recusa_acima, falhas=()):
+        self.total = total
+        self.maximo = maximo
+        self.recusa_acima = recusa_acima
+        self.falhas = set(falhas)
+        self.pedidos = []
+        self.em_andamento = 0
+        self.maximo_em_andamento = 0
+
+    async def tratar(self, request):
+        formulario = await request.post()
+        pagina, tamanho = int(formulario["PaginaAtual"]), int(formulario["TamanhoPagina"])
+        self.pedidos.append((pagina, tamanho))
+        if tamanho > self.recusa_acima:
+            return web.Response(status=400)
+        if pagina in self.falhas:
+            return web.Response(status=503)
+        self.em_andamento += 1
+        self.maximo_em_andamento = max(self.maximo_em_andamento, self.em_andamento)
+        await asyncio.sleep(0.02)
+        self.em_andamento -= 1
+        tamanho = min(tamanho, self.maximo)
+        inicio = (pagina - 1) * tamanho + 1
+        linhas = "".join(f'<tr data-codigo-empresa="{empresa_id}"></tr>'
+                         for empresa_id in range(inicio, min(inicio + tamanho, self.total + 1)))
+        total = f"{self.total:,}".replace(",", ".")
+        return web.Response(text=f"<p>{total} empresas encontradas</p><table>{linhas}</table>")
+
+    # Roda listar_ids contra o portal e devolve (ids, info)
+    def listar(self, **opcoes):
+        async def principal():
+            app = web.Application()
+            app.router.add_post("/pesquisa", self.tratar)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            porta = site._server.sockets[0].getsockname()[1]
+            info = {}
+            try:
+                ids = [empresa_id async for empresa_id in listar_ids(
+                    f"http://127.0.0.1:{porta}/pesquisa", {}, LimitadorTaxa(1000, 100), info=info, **opcoes)]
+            finally:
+                await runner.cleanup()
+            return ids, info
+
+        return asyncio.run(principal())
+
+def test_ler_total_ids_e_payload():
+    html = '<p>1.234 empresas encontradas</p><tr data-codigo-empresa="42"><tr data-codigo-empresa=\'7\'>'
+    assert ler_total(html) == 1234
+    assert ler_total("<p>nada</p>") is None
+    assert ler_ids(html) == [42, 7]
+    payload = payload_pesquisa(3, 500, {"CodigoSubdivisaoPais": "SP"})
+    assert (payload["PaginaAtual"], payload["TamanhoPagina"], payload["CodigoSubdivisaoPais"]) == (3, 500, "SP")
+    assert payload["CodigoPais"] == ""
+
+def test_descobre_o_tamanho_de_pagina_e_busca_as_paginas_em_paralelo():
+    # 1000 é recusado; 500 é aceito mas o portal corta em 200 por página sem avisar
+    portal = PortalFalso(total=2345, maximo=200, recusa_acima=500)
+    ids, info = portal.listar(tentativas=1, concorrencia=4, tamanhos=[1000, 500, 200])
+    assert sorted(ids) == list(range(1, 2346)) and len(ids) == len(set(ids))
+    assert (info["total"], info["tamanho_pagina"], info["paginas"], info["ids"]) == (2345, 200, 12, 2345)
+    assert portal.pedidos[:2] == [(1, 1000), (1, 500)]
+    assert {tamanho for pagina, tamanho in portal.pedidos[2:]} == {200}
+    assert 1 < portal.maximo_em_andamento <= 4
+
+def test_pagina_com_erro_fica_no_info():
+    portal = PortalFalso(total=95, maximo=20, recusa_acima=20, falhas={3})
+    ids, info = portal.listar(tentativas=1, concorrencia=2, tamanhos=[20])
+    assert sorted(ids) == [empresa_id for empresa_id in range(1, 96) if not 41 <= empresa_id <= 60]
+    assert info["paginas_com_erro"] == [3] and info["paginas"] == 5
+
+def test_primeira_pagina_recusada_em_todos_os_tamanhos():
+    portal = PortalFalso(total=10, maximo=10, recusa_acima=5)
+    with pytest.raises(ErroPagina, match="primeira página"):
+        portal.listar(tentativas=1, tamanhos=[50, 10])
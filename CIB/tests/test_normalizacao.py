@@ -0,0 +1,25 @@
+import pandas as pd
+
+from extracao import CAMPOS, SEM_INFORMACAO
+from normalizacao import deduplicar, normalizar
+
+def tabela(*linhas):
+    return pd.DataFrame([{campo: linha.get(campo, SEM_INFORMACAO) for campo in CAMPOS} for linha in linhas])
+
+def test_digitos_unicode_nao_quebram_a_validacao():
+    # "١" (dígito arábico) conta como \d mas não é ASCII
+    limpa = normalizar(tabela({"CNPJ": "CNPJ 11.222.333/0001-8١"}, {"CNPJ": "CNPJ 11.222.333/0001-81"}))
+    assert list(limpa["CNPJ"]) == ["1122233300018", "11222333000181"]
+    assert list(limpa["CNPJ válido"]) == [False, True]
+
+def test_linhas_sem_chave_nao_sao_deduplicadas():
+    limpa = normalizar(tabela(
+        {"Bairro": "Centro"},
+        {"Bairro": "Lapa"},
+        {"Razão Social": "ACME LTDA", "Bairro": "Centro"},
+        {"Razão Social": "Acme  Ltda"},
+        {"CNPJ": "CNPJ 11.222.333/0001-81", "Razão Social": "X"},
+        {"CNPJ": "CNPJ 11.222.333/0001-81", "Razão Social": "X", "Bairro": "Sé"},
+    ))
+    unicas = deduplicar(limpa)
+    assert list(unicas["Bairro"]) == ["Centro", "Lapa", "Centro", "Sé"]
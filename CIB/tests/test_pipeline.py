@@ -0,0 +1,28 @@
+import pytest
+
+from coletor import ResultadoBusca
+from pipeline import extrair_resultados
+
+# Precisa ser uma função de módulo para ir para o pool de processos
+def extrator_fragil(html):
+    if html == "quebrada":
+        raise ValueError("página estranha")
+    return html.upper()
+
+@pytest.mark.parametrize("processos", [0, 2])
+def test_erro_na_extracao_volta_no_resultado_sem_parar_a_coleta(processos):
+    resultados = [
+        ResultadoBusca(1, 200, "a", None),
+        ResultadoBusca(2, 200, "quebrada", None),
+        ResultadoBusca(3, 500, "", None),
+        ResultadoBusca(4, 200, "b", None),
+    ]
+    saida = {resultado.empresa_id: (resultado, dados)
+             for resultado, dados in extrair_resultados(resultados, extrator_fragil, processos)}
+
+    assert sorted(saida) == [1, 2, 3, 4]
+    assert saida[1][1] == "A" and saida[4][1] == "B"
+    resultado, dados = saida[2]
+    assert dados is None and resultado.status == 200
+    assert isinstance(resultado.erro, ValueError)
+    assert saida[3][1] is None and saida[3][0].erro is None
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from resiliencia import RETRY_AFTER_MAXIMO, ControleAdaptativo, Disjuntor, espera_backoff, ler_retry_after
+
+class LimitadorFalso:
+    def __init__(self, taxa):
+        self.taxa = taxa
+
+def test_retry_after_em_segundos_e_data():
+    assert ler_retry_after("7") == 7.0
+    data = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 <= ler_retry_after(data) <= 30
+    passada = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=30), usegmt=True)
+    assert ler_retry_after(passada) == 0.0
+
+def test_retry_after_invalido_ou_ausente():
+    assert ler_retry_after(None) is None
+    assert ler_retry_after("") is None
+    assert ler_retry_after("amanhã") is None
+
+def test_retry_after_limitado():
+    assert ler_retry_after("86400") == RETRY_AFTER_MAXIMO
+    data = format_datetime(datetime.now(timezone.utc) + timedelta(days=1), usegmt=True)
+    assert ler_retry_after(data) == RETRY_AFTER_MAXIMO
+    assert ler_retry_after("50", maxima=10) == 10
+
+@pytest.mark.parametrize("tentativa", [1, 2, 5, 10])
+def test_espera_backoff_dentro_do_teto(tentativa):
+    teto = min(120, 2 * 2 ** tentativa)
+    esperas = [espera_backoff(tentativa, base=2, maxima=120) for _ in range(200)]
+    assert all(0 <= espera <= teto for espera in esperas)
+
+def test_controle_reduz_na_sobrecarga_e_sobe_com_sucessos():
+    limitador = LimitadorFalso(4.0)
+    controle = ControleAdaptativo(limitador, 0.5, 8, incremento=1, sucessos_para_subir=3, intervalo_reducao=0)
+    controle.sobrecarga("HTTP 429")
+    assert limitador.taxa == 2.0
+    for _ in range(3):
+        controle.sucesso(0.1)
+    assert limitador.taxa == 3.0
+    for _ in range(5):
+        controle.sobrecarga("HTTP 503")
+    assert limitador.taxa == 0.5
+
+def test_disjuntor_abre_testa_e_fecha():
+    async def cenario():
+        disjuntor = Disjuntor(limite_falhas=2, pausa=0.1)
+        assert await disjuntor.aguardar() is False
+        await disjuntor.falha()
+        assert disjuntor.aberto_ate is None
+        await disjuntor.falha()
+        assert disjuntor.aberto_ate is not None
+
+        inicio = time.monotonic()
+        assert await disjuntor.aguardar() is True  # requisição de teste
+        assert time.monotonic() - inicio >= 0.09
+        # Enquanto o teste não responde, as demais esperam
+        outra = asyncio.create_task(disjuntor.aguardar())
+        await asyncio.sleep(0.05)
+        assert not outra.done()
+
+        await disjuntor.sucesso()
+        assert await asyncio.wait_for(outra, 1) is False
+        assert (disjuntor.aberto_ate, disjuntor.testando, disjuntor.falhas_seguidas) == (None, False, 0)
+
+    asyncio.run(cenario())
+
+def test_disjuntor_teste_com_falha_dobra_a_pausa():
+    async def cenario():
+        disjuntor = Disjuntor(limite_falhas=1, pausa=0.05, pausa_maxima=0.15)
+        await disjuntor.falha()
+        for pausa in (0.1, 0.15):
+            assert await disjuntor.aguardar() is True
+            await disjuntor.falha()
+            assert disjuntor.pausa == pytest.approx(pausa)
+            assert not disjuntor.testando
+
+    asyncio.run(cenario())
+
+def test_disjuntor_libera_teste_cancelado():
+    async def cenario():
+        disjuntor = Disjuntor(limite_falhas=1, pausa=0.01)
+        await disjuntor.falha()
+
+        async def requisicao():
+            teste = await disjuntor.aguardar()
+            try:
+                await asyncio.sleep(10)
+            finally:
+                if teste:
+                    await disjuntor.encerrar_teste()
+
+        tarefa = asyncio.create_task(requisicao())
+        await asyncio.sleep(0.05)
+        assert disjuntor.testando
+        tarefa.cancel()
+        await asyncio.gather(tarefa, return_exceptions=True)
+        assert await asyncio.wait_for(disjuntor.aguardar(), 1) is True
+
+    asyncio.run(cenario())
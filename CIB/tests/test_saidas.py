@@ -0,0 +1,69 @@
+import csv
+import json
+import sqlite3
+
+import pytest
+
+from extracao import CAMPOS, SEM_INFORMACAO, Empresa
+from saidas import SaidaJsonl, SaidaSqlite, abrir_saida, formato_do_caminho, ler_registros
+
+def empresa(numero, bairro="Centro", cnpj=True):
+    dados = dict.fromkeys(CAMPOS, SEM_INFORMACAO)
+    dados.update({"Razão Social": f"EMPRESA {numero}", "Bairro": bairro})
+    if cnpj:
+        dados["CNPJ"] = f"CNPJ 00.000.000/0001-{numero:02d}"
+    return dados
+
+@pytest.mark.parametrize("caminho, formato", [
+    ("a.csv", "csv"), ("a.JSONL", "jsonl"), ("a.ndjson", "jsonl"), ("a.parquet", "parquet"),
+    ("a.db", "sqlite"), ("a.sqlite3", "sqlite"), ("a.txt", "csv"),
+])
+def test_formato_do_caminho(caminho, formato):
+    assert formato_do_caminho(caminho) == formato
+
+def test_csv_em_lotes(tmp_path):
+    caminho = str(tmp_path / "a.csv")
+    with abrir_saida(caminho) as saida:
+        saida.tamanho_lote = 2
+        saida.gravar_varios(empresa(numero) for numero in range(1, 4))
+        assert saida.gravados == 2 and len(saida.buffer) == 1
+    assert saida.gravados == 3
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        linhas = list(csv.DictReader(arquivo))
+    assert [linha["Razão Social"] for linha in linhas] == ["EMPRESA 1", "EMPRESA 2", "EMPRESA 3"]
+    assert list(linhas[0]) == CAMPOS
+
+def test_jsonl_aceita_empresa_e_anexa(tmp_path):
+    caminho = str(tmp_path / "a.jsonl")
+    with abrir_saida(caminho) as saida:
+        saida.gravar(Empresa.de_dict(empresa(1)))
+    with abrir_saida(caminho, "jsonl") as saida:
+        saida.gravar(empresa(2))
+    assert ler_registros(caminho) == [empresa(2)]
+    with SaidaJsonl(caminho, anexar=True) as saida:
+        saida.gravar(empresa(3))
+    with open(caminho, encoding="utf-8") as arquivo:
+        assert [json.loads(linha)["Razão Social"] for linha in arquivo] == ["EMPRESA 2", "EMPRESA 3"]
+
+def test_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    caminho = str(tmp_path / "a.parquet")
+    with abrir_saida(caminho) as saida:
+        saida.gravar_varios(empresa(numero) for numero in range(1, 4))
+    assert ler_registros(caminho) == [empresa(numero) for numero in range(1, 4)]
+
+def test_sqlite_upsert_por_cnpj_e_remover(tmp_path):
+    caminho = str(tmp_path / "a.db")
+    with abrir_saida(caminho) as saida:
+        saida.gravar_varios([empresa(1), empresa(2), empresa(3, cnpj=False)])
+    with SaidaSqlite(caminho) as saida:
+        saida.gravar(empresa(1, bairro="Lapa"))
+        saida.gravar(empresa(3, bairro="Sé", cnpj=False))
+        saida.remover(["00.000.000/0001-02"])
+    conexao = sqlite3.connect(caminho)
+    linhas = conexao.execute('SELECT chave, "Razão Social", "Bairro" FROM empresas ORDER BY chave').fetchall()
+    conexao.close()
+    assert linhas == [("00000000000101", "EMPRESA 1", "Lapa"), ("razao:EMPRESA 3", "EMPRESA 3", "Sé")]
+
+def test_ler_registros_de_arquivo_inexistente(tmp_path):
+    assert ler_registros(str(tmp_path / "nada.jsonl")) == []
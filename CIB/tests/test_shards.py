@@ -0,0 +1,67 @@
+import argparse
+import json
+
+import pytest
+
+import shards
+from coletor import ResultadoBusca
+from estado import STATUS_OK, STATUS_VAZIA, EstadoCrawl
+from extracao import CAMPOS, SEM_INFORMACAO
+
+def pagina(razao, cnpj):
+    return (f'<div class="campo-detalhe full"><span class="valor">{razao} CNPJ {cnpj}</span></div>'
+            f'<label>Bairro</label><span class="valor">Centro</span>')
+
+def registro(razao, cnpj):
+    dados = dict.fromkeys(CAMPOS, SEM_INFORMACAO)
+    dados.update({"Razão Social": razao, "CNPJ": f"CNPJ {cnpj}"})
+    return dados
+
+def test_planejar_combina_as_dimensoes():
+    planejados = shards.planejar_shards({"UF": ["SP", "RJ"], "Faixa": ["1", "2", "3"]})
+    assert len(planejados) == 6
+    assert len({shard["chave"] for shard in planejados}) == 6
+    assert planejados[0] == {"chave": "Faixa=1|UF=SP", "filtros": {"Faixa": "1", "UF": "SP"}, "total": None}
+
+def test_distribuir_equilibra_as_cargas():
+    planejados = [{"chave": str(total), "total": total} for total in (100, 60, 50, 30, 10, None)]
+    cargas = shards.distribuir(planejados, 2)
+    # Maiores primeiro, sempre para o menos carregado; sem medição conta como 1
+    assert cargas == [130, 121]
+    assert [shard["trabalhador"] for shard in planejados] == [0, 1, 1, 0, 1, 1]
+
+def test_mesclar_remove_cnpjs_repetidos_e_registros_vazios(tmp_path):
+    partes = []
+    for numero, registros in enumerate([
+        [registro("A", "11.111.111/0001-11"), registro("B", "22.222.222/0001-22")],
+        [registro("A de novo", "11111111000111"), dict.fromkeys(CAMPOS, SEM_INFORMACAO), registro("C", "33.333.333/0001-33")],
+    ]):
+        caminho = tmp_path / f"shard_{numero}.jsonl"
+        caminho.write_text("".join(json.dumps(dados, ensure_ascii=False) + "\n" for dados in registros), encoding="utf-8")
+        partes.append(str(caminho))
+    saida = tmp_path / "empresas.jsonl"
+
+    shards.mesclar(argparse.Namespace(arquivos=partes, saida=str(saida), formato=None))
+
+    razoes = [json.loads(linha)["Razão Social"] for linha in saida.read_text(encoding="utf-8").splitlines()]
+    assert razoes == ["A", "B", "C"]
+
+def test_trabalhar_nao_grava_ids_vazios(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shards.salvar_plano({"trabalhadores": 1, "shards": [{"chave": "UF=SP", "filtros": {"UF": "SP"}, "total": 3, "trabalhador": 0}]})
+    monkeypatch.setattr(shards, "coletar_ids", lambda *args, **kwargs: [1, 2, 3])
+    respostas = {
+        1: ResultadoBusca(1, 200, pagina("A", "11.111.111/0001-11"), None),
+        2: ResultadoBusca(2, 200, "<div></div>", None),
+        3: ResultadoBusca(3, 404, "", None),
+    }
+    monkeypatch.setattr(shards, "coletar_detalhes", lambda ids, *args, **kwargs: (respostas[i] for i in ids))
+    args = argparse.Namespace(plano=shards.ARQUIVO_PLANO, trabalhador=0, processos=0, max_tentativas=3,
+                              taxa=1, rajada=1, concorrencia=1, taxa_maxima=None, tentativas=1)
+
+    shards.trabalhar(args)
+
+    linhas = (tmp_path / "shard_0.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(linha)["Razão Social"] for linha in linhas] == ["A"]
+    with EstadoCrawl("cib_estado_shard0.db") as estado:
+        assert estado.concluidos() == {1: STATUS_OK, 2: STATUS_VAZIA, 3: STATUS_VAZIA}
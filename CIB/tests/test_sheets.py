@@ -0,0 +1,132 @@
+import threading
+import time
+import types
+
+import pytest
+
+import sheets
+from sheets import EscritorSheets, chamar_com_repeticao, status_http
+
+# Erros no formato do gspread (APIError.response.status_code) e do googleapiclient (HttpError.resp.status)
+class ErroGspread(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = types.SimpleNamespace(status_code=status)
+
+class ErroApiV4(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.resp = types.SimpleNamespace(status=str(status))
+
+# Destino falso: guarda cada chamada de anexar e levanta os erros da lista antes de aceitar
+class DestinoFalso:
+    def __init__(self, erros=()):
+        self.lotes = []
+        self.erros = list(erros)
+
+    def anexar(self, linhas):
+        if self.erros:
+            raise self.erros.pop(0)
+        self.lotes.append(list(linhas))
+
+@pytest.fixture
+def esperas(monkeypatch):
+    esperas = []
+    monkeypatch.setattr(sheets, "time", types.SimpleNamespace(sleep=esperas.append, monotonic=time.monotonic))
+    return esperas
+
+def test_status_http_dos_dois_clientes():
+    assert status_http(ErroGspread(429)) == 429
+    assert status_http(ErroApiV4(503)) == 503
+    assert status_http(ValueError()) is None
+
+def test_lote_enviado_ao_encher():
+    destino = DestinoFalso()
+    gravados = []
+    with EscritorSheets(destino, tamanho_lote=3, intervalo=60, ao_gravar=gravados.extend) as escritor:
+        for numero in range(7):
+            escritor.adicionar([numero], marcador=numero)
+        assert destino.lotes == [[[0], [1], [2]], [[3], [4], [5]]]
+        assert gravados == [0, 1, 2, 3, 4, 5]
+    assert destino.lotes[-1] == [[6]]
+    assert gravados == list(range(7))
+    assert escritor.linhas_gravadas == 7
+
+def test_lote_enviado_pelo_tempo_sem_nova_linha():
+    destino = DestinoFalso()
+    gravados = []
+    with EscritorSheets(destino, tamanho_lote=100, intervalo=0.1, ao_gravar=gravados.extend) as escritor:
+        escritor.adicionar(["a"], marcador="a")
+        limite = time.monotonic() + 5
+        while not destino.lotes and time.monotonic() < limite:
+            time.sleep(0.02)
+        assert destino.lotes == [[["a"]]]
+        # O ao_gravar do envio da thread roda na próxima chamada de quem usa o escritor
+        assert gravados == []
+        escritor.descarregar()
+        assert gravados == ["a"]
+
+@pytest.mark.parametrize("erro", [ErroGspread(429), ErroGspread(500), ErroApiV4(503)])
+def test_repete_cota_e_instabilidade(esperas, erro):
+    destino = DestinoFalso([erro, erro])
+    escritor = EscritorSheets(destino, tamanho_lote=2, tentativas=3)
+    escritor.adicionar(["a"])
+    escritor.adicionar(["b"])
+    assert destino.lotes == [[["a"], ["b"]]]
+    assert len(esperas) == 2
+    assert esperas[0] < esperas[1]
+
+def test_nao_repete_outros_erros(esperas):
+    destino = DestinoFalso([ErroGspread(400)])
+    escritor = EscritorSheets(destino, tamanho_lote=1)
+    with pytest.raises(ErroGspread):
+        escritor.adicionar(["a"])
+    assert esperas == []
+    # A linha continua no buffer e vai na próxima descarga
+    escritor.descarregar()
+    assert destino.lotes == [[["a"]]]
+
+def test_desiste_depois_das_tentativas(esperas):
+    destino = DestinoFalso([ErroGspread(429)] * 3)
+    with pytest.raises(ErroGspread):
+        chamar_com_repeticao(lambda: destino.anexar([["a"]]), tentativas=3)
+    assert len(esperas) == 2
+    assert destino.lotes == []
+
+def test_erro_do_with_nao_e_trocado_pela_descarga(esperas):
+    destino = DestinoFalso([ErroGspread(429)] * 10)
+    with pytest.raises(KeyError):
+        with EscritorSheets(destino, tamanho_lote=100, intervalo=60) as escritor:
+            escritor.adicionar(["a"])
+            raise KeyError("coleta")
+    # Uma única tentativa, sem espera; a linha continua no buffer
+    assert esperas == []
+    assert len(destino.erros) == 9
+    assert escritor.buffer == [["a"]]
+
+def test_erro_do_with_ainda_grava_o_buffer():
+    destino = DestinoFalso()
+    with pytest.raises(KeyError):
+        with EscritorSheets(destino, tamanho_lote=100, intervalo=60) as escritor:
+            escritor.adicionar(["a"])
+            raise KeyError("coleta")
+    assert destino.lotes == [[["a"]]]
+
+def test_espera_da_thread_nao_segura_adicionar(monkeypatch):
+    liberar = threading.Event()
+    esperando = threading.Event()
+
+    def dormir(segundos):
+        esperando.set()
+        liberar.wait(5)
+
+    monkeypatch.setattr(sheets, "time", types.SimpleNamespace(sleep=dormir, monotonic=time.monotonic))
+    destino = DestinoFalso([ErroGspread(429)])
+    with EscritorSheets(destino, tamanho_lote=100, intervalo=0.05) as escritor:
+        escritor.adicionar(["a"])
+        assert esperando.wait(5)  # a thread está na espera entre tentativas
+        inicio = time.monotonic()
+        escritor.adicionar(["b"])
+        assert time.monotonic() - inicio < 0.5
+        liberar.set()
+    assert [linha for lote in destino.lotes for linha in lote] == [["a"], ["b"]]
@@ -0,0 +1,130 @@
+import html
+import unicodedata
+from collections import deque
+
+from camadas import texto_visivel
+
+# Busca de todas as palavras-chave em uma única passada pela página
+# As palavras de palavras.txt viram um autômato de Aho–Corasick montado uma vez só; cada página
+# é percorrida um caractere por vez, independente de quantas palavras houver na lista.
+# Opções: ignorar acentos e maiúsculas ("Ação" acha "acao"), exigir palavra inteira ("chave"
+# não acha "chaveiro"), olhar só o texto visível (fora de tags, scripts e atributos) e contar
+# quantas vezes cada palavra aparece.
+
+# pyahocorasick (implementação em C) é opcional; sem ele o autômato é montado em Python
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Normaliza o texto para comparação: minúsculas (casefold) e, se pedido, sem acentos
+def dobrar(texto, acentos=True):
+    texto = texto.casefold()
+    if acentos:
+        texto = "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+    return texto
+
+# Autômato em Python: transições por estado, links de falha e, em cada estado, os índices
+# das palavras que terminam ali (já incluindo as que chegam pelos links de falha)
+class _Automato:
+    def __init__(self, chaves):
+        self.transicoes = [{}]
+        self.saidas = [[]]
+        for indice, chave in enumerate(chaves):
+            estado = 0
+            for caractere in chave:
+                proximo = self.transicoes[estado].get(caractere)
+                if proximo is None:
+                    proximo = len(self.transicoes)
+                    self.transicoes[estado][caractere] = proximo
+                    self.transicoes.append({})
+                    self.saidas.append([])
+                estado = proximo
+            self.saidas[estado].append(indice)
+
+        self.falhas = [0] * len(self.transicoes)
+        fila = deque(self.transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self.transicoes[estado].items():
+                fila.append(proximo)
+                falha = self.falhas[estado]
+                while falha and caractere not in self.transicoes[falha]:
+                    falha = self.falhas[falha]
+                destino = self.transicoes[falha].get(caractere, 0)
+                self.falhas[proximo] = destino if destino != proximo else 0
+                self.saidas[proximo] = self.saidas[proximo] + self.saidas[self.falhas[proximo]]
+
+    # Devolve (posição final, índice da chave) de cada ocorrência
+    def procurar(self, texto):
+        transicoes, falhas, saidas = self.transicoes, self.falhas, self.saidas
+        estado = 0
+        for posicao, caractere in enumerate(texto):
+            while estado and caractere not in transicoes[estado]:
+                estado = falhas[estado]
+            estado = transicoes[estado].get(caractere, 0)
+            for indice in saidas[estado]:
+                yield posicao, indice
+
+# Mesmo formato de saída usando o pyahocorasick
+class _AutomatoC:
+    def __init__(self, chaves):
+        self.automato = ahocorasick.Automaton()
+        for indice, chave in enumerate(chaves):
+            self.automato.add_word(chave, indice)
+        self.automato.make_automaton()
+
+    def procurar(self, texto):
+        if len(self.automato):
+            yield from self.automato.iter(texto)
+
+def _parte_de_palavra(caractere):
+    return caractere.isalnum() or caractere == "_"
+
+class BuscadorPalavras:
+    def __init__(self, palavras, acentos=True, palavra_inteira=True, so_texto=True):
+        self.acentos = acentos
+        self.palavra_inteira = palavra_inteira
+        self.so_texto = so_texto
+        self.palavras = list(dict.fromkeys(palavra for palavra in palavras if palavra.strip()))
+        # Palavras diferentes que ficam iguais depois de dobradas ("Ação" e "acao") dividem a chave
+        self.chaves = []
+        self.palavras_da_chave = []
+        posicoes = {}
+        for palavra in self.palavras:
+            chave = dobrar(palavra.strip(), acentos)
+            if chave not in posicoes:
+                posicoes[chave] = len(self.chaves)
+                self.chaves.append(chave)
+                self.palavras_da_chave.append([])
+            self.palavras_da_chave[posicoes[chave]].append(palavra)
+        self.automato = (_AutomatoC if ahocorasick is not None else _Automato)(self.chaves)
+
+    # Texto em que as palavras são procuradas: o HTML inteiro ou só o texto visível
+    def preparar(self, conteudo):
+        if self.so_texto:
+            conteudo = html.unescape(texto_visivel(conteudo))
+        return dobrar(conteudo, self.acentos)
+
+    # Quantas vezes cada palavra aparece; só as encontradas, na ordem de palavras.txt
+    def contar(self, conteudo):
+        texto = self.preparar(conteudo)
+        por_chave = [0] * len(self.chaves)
+        for fim, indice in self.automato.procurar(texto):
+            if self.palavra_inteira:
+                inicio = fim - len(self.chaves[indice]) + 1
+                if inicio > 0 and _parte_de_palavra(texto[inicio - 1]):
+                    continue
+                if fim + 1 < len(texto) and _parte_de_palavra(texto[fim + 1]):
+                    continue
+            por_chave[indice] += 1
+        contagens = {}
+        for indice, total in enumerate(por_chave):
+            if total:
+                for palavra in self.palavras_da_chave[indice]:
+                    contagens[palavra] = total
+        return {palavra: contagens[palavra] for palavra in self.palavras if palavra in contagens}
+
+    # Lista das palavras encontradas, na ordem de palavras.txt
+    def encontrar(self, conteudo):
+        return list(self.contar(conteudo))
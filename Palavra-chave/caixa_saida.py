@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+
+from indice_dominios import chave_site
+
+# O código HTTP dos erros da API vem do mesmo status_http usado pelos scripts do CIB
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "CIB"))
+from sheets import status_http
+
+# Caixa de saída dos resultados do monitor
+# Cada resultado é gravado primeiro na tabela `saida` do monitor.db (na hora, sem rede) e um
+# enviador em segundo plano manda as linhas para o Google Sheets em lotes de append_rows,
+# repetindo com espera exponencial enquanto a API estiver fora. A chave de cada linha é o
+# site normalizado: um site reprocessado depois de uma queda não entra duas vezes na caixa, e
+# um lote cujo envio ficou sem confirmação é conferido na coluna A da planilha antes de ser
+# reenviado, então nenhuma linha é duplicada nem perdida entre reinícios.
+
+TAMANHO_LOTE_PADRAO = 100  # linhas por append_rows
+INTERVALO_PADRAO = 5  # segundos que uma linha pode esperar por um lote cheio
+ESPERA_MAXIMA = 300  # segundos entre tentativas com a API fora
+COLUNA_SITE = 1
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS saida (
+    id INTEGER PRIMARY KEY,
+    chave TEXT NOT NULL UNIQUE,
+    linha TEXT NOT NULL,
+    criado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS saida_em_voo (
+    id INTEGER PRIMARY KEY
+);
+"""
+
+class CaixaSaida:
+    def __init__(self, caminho):
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+
+    # Guarda a linha de um site; se o site já está na caixa, a linha antiga é mantida
+    def adicionar(self, linha):
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT OR IGNORE INTO saida (chave, linha, criado) VALUES (?, ?, ?)",
+                (chave_site(linha[0]), json.dumps(linha, ensure_ascii=False), time.time()),
+            )
+
+    # Próximo lote, em ordem de chegada: lista de (id, linha)
+    def lote(self, limite):
+        return [(id_linha, json.loads(linha)) for id_linha, linha in
+                self.conexao.execute("SELECT id, linha FROM saida ORDER BY id LIMIT ?", (limite,))]
+
+    def pendentes(self):
+        return self.conexao.execute("SELECT COUNT(*) FROM saida").fetchone()[0]
+
+    def mais_antiga(self):
+        return self.conexao.execute("SELECT MIN(criado) FROM saida").fetchone()[0]
+
+    # Linhas que foram enviadas sem confirmação (queda ou erro no meio do append)
+    def em_voo(self):
+        return {id_linha for (id_linha,) in self.conexao.execute("SELECT id FROM saida_em_voo")}
+
+    def marcar_em_voo(self, ids):
+        with self.conexao:
+            self.conexao.execute("DELETE FROM saida_em_voo")
+            self.conexao.executemany("INSERT INTO saida_em_voo (id) VALUES (?)", [(id_linha,) for id_linha in ids])
+
+    # Linhas confirmadas na planilha saem da caixa
+    def confirmar(self, ids):
+        with self.conexao:
+            self.conexao.executemany("DELETE FROM saida WHERE id = ?", [(id_linha,) for id_linha in ids])
+            self.conexao.execute("DELETE FROM saida_em_voo")
+
+    def fechar(self):
+        self.conexao.close()
+
+# Esvazia a caixa no Sheets em segundo plano
+# `abrir_planilha()` devolve a aba (gspread Worksheet); é chamada de novo depois de um erro
+class EnviadorSheets:
+    def __init__(self, caixa, abrir_planilha, tamanho_lote=TAMANHO_LOTE_PADRAO, intervalo=INTERVALO_PADRAO):
+        self.caixa = caixa
+        self.abrir_planilha = abrir_planilha
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.planilha = None
+        self.falhas_seguidas = 0
+        self.enviadas = 0
+        self._aviso = asyncio.Event()
+        self._encerrando = False
+        self._tarefa = None
+
+    def iniciar(self):
+        self._tarefa = asyncio.create_task(self._executar())
+
+    # Chamada depois de cada resultado: acorda o enviador se o lote já encheu
+    def avisar(self):
+        self._aviso.set()
+
+    # Um erro inesperado (ex.: banco travado) é mostrado e o laço recomeça depois de uma espera,
+    # em vez de a tarefa morrer calada e a caixa parar de ser esvaziada
+    async def _executar(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._aviso.wait(), self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._aviso.clear()
+            try:
+                await self._esvaziar()
+            except Exception as erro:
+                self.falhas_seguidas += 1
+                print(f"Erro inesperado no envio ao Google Sheets ({type(erro).__name__}: {erro}); "
+                      f"o enviador continua")
+                if self._encerrando:
+                    return
+                await asyncio.sleep(self._espera())
+                continue
+            if self._encerrando:
+                return
+
+    def _espera(self):
+        return min(ESPERA_MAXIMA, 2 ** self.falhas_seguidas) + random.uniform(0, 1)
+
+    # Envia os lotes enquanto houver um cheio, vencido ou, no encerramento, qualquer linha
+    async def _esvaziar(self):
+        while True:
+            pendentes = self.caixa.pendentes()
+            if not pendentes:
+                return
+            mais_antiga = self.caixa.mais_antiga()
+            if (pendentes < self.tamanho_lote and not self._encerrando
+                    and time.time() - mais_antiga < self.intervalo):
+                return
+            if not await self._enviar_lote():
+                # API fora: espera exponencial antes de tentar de novo
+                await asyncio.sleep(self._espera())
+
+    # Envia um lote; devolve False se a API falhou (as linhas continuam na caixa)
+    async def _enviar_lote(self):
+        lote = self.caixa.lote(self.tamanho_lote)
+        ids = [id_linha for id_linha, _ in lote]
+        try:
+            if self.planilha is None:
+                self.planilha = await asyncio.to_thread(self.abrir_planilha)
+            em_voo = self.caixa.em_voo()
+            if em_voo:
+                # O último envio não foi confirmado: o que já chegou na planilha não vai de novo
+                sites = await asyncio.to_thread(self.planilha.col_values, COLUNA_SITE)
+                na_planilha = {chave_site(site) for site in sites if site}
+                ja_enviados = [id_linha for id_linha, linha in lote
+                               if id_linha in em_voo and chave_site(linha[0]) in na_planilha]
+                if ja_enviados:
+                    self.caixa.confirmar(ja_enviados)
+                    print(f"{len(ja_enviados)} linhas já estavam na planilha, não serão reenviadas")
+                    lote = [(id_linha, linha) for id_linha, linha in lote if id_linha not in ja_enviados]
+                    ids = [id_linha for id_linha, _ in lote]
+                    if not lote:
+                        return True
+            self.caixa.marcar_em_voo(ids)
+            await asyncio.to_thread(self.planilha.append_rows, [linha for _, linha in lote], value_input_option="RAW")
+        except Exception as erro:
+            self.falhas_seguidas += 1
+            self.planilha = None
+            status = status_http(erro)
+            motivo = f"HTTP {status}" if status else type(erro).__name__
+            print(f"Falha ao enviar {len(lote)} linhas ao Google Sheets ({motivo}); "
+                  f"{self.caixa.pendentes()} aguardando na caixa de saída")
+            return False
+        self.caixa.confirmar(ids)
+        self.falhas_seguidas = 0
+        self.enviadas += len(ids)
+        return True
+
+    # Tenta esvaziar a caixa antes de sair; o que não couber em `timeout` fica para a próxima execução
+    async def encerrar(self, timeout=30):
+        if self._tarefa is None:
+            return
+        self._encerrando = True
+        self._aviso.set()
+        try:
+            await asyncio.wait_for(self._tarefa, timeout)
+        except asyncio.TimeoutError:
+            print(f"{self.caixa.pendentes()} linhas ficaram na caixa de saída e serão enviadas na próxima execução")
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,135 @@
+import re
+import time
+import sqlite3
+
+import aiohttp
+
+from pool_paginas import chave_host
+from resolucao_dns import ordem_protocolos
+
+# Busca em camadas
+# Primeiro o site é baixado com um GET simples (aiohttp, conexões reaproveitadas, compressão e
+# redirecionamentos); o Chromium só entra quando a resposta parece depender de JavaScript
+# (corpo vazio, casca de framework sem texto, ou um marcador configurado). A camada que cada
+# domínio precisou fica gravada em SQLite, então a próxima visita já vai direto para ela.
+
+CAMADA_HTTP = "http"
+CAMADA_NAVEGADOR = "navegador"
+MODOS = ["auto", CAMADA_NAVEGADOR]
+MODO_PADRAO = "auto"
+
+TIMEOUT_HTTP = 15  # segundos, o mesmo limite da navegação
+MIN_TEXTO_PADRAO = 200  # caracteres de texto visível abaixo dos quais a página é considerada vazia
+TAMANHO_MAXIMO = 5 * 1024 * 1024  # bytes lidos de uma resposta
+
+HEADERS_HTTP = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+}
+
+# Pontos de montagem vazios dos frameworks mais comuns (React, Vue, Next, Nuxt, Angular...)
+MARCADORES_JS = [
+    r'<div[^>]+id=["\'](root|app|__next|__nuxt|q-app)["\'][^>]*>\s*</div>',
+    r"<app-root[^>]*>\s*</app-root>",
+    r"<noscript[^>]*>[^<]*(enable|habilite|ative)[^<]*javascript",
+]
+
+PADRAO_INVISIVEL = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.I | re.S)
+PADRAO_TAG = re.compile(r"<[^>]+>")
+PADRAO_ESPACOS = re.compile(r"\s+")
+
+# Texto visível aproximado de um HTML (sem scripts, estilos e tags)
+def texto_visivel(html):
+    texto = PADRAO_TAG.sub(" ", PADRAO_INVISIVEL.sub(" ", html))
+    return PADRAO_ESPACOS.sub(" ", texto).strip()
+
+# Decide se um HTML baixado por GET precisa do navegador para mostrar o conteúdo
+def depende_de_js(html, min_texto=MIN_TEXTO_PADRAO, marcadores=None):
+    if not html or not html.strip():
+        return True
+    for marcador in marcadores if marcadores is not None else MARCADORES_JS:
+        if re.search(marcador, html, re.I):
+            return True
+    return len(texto_visivel(html)) < min_texto
+
+# Camada de cada domínio na tabela `camadas` do banco do monitor
+class MemoriaCamadas:
+    def __init__(self, caminho):
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS camadas (host TEXT PRIMARY KEY, camada TEXT NOT NULL, atualizado REAL)"
+        )
+        self.conexao.commit()
+
+    def obter(self, site):
+        linha = self.conexao.execute("SELECT camada FROM camadas WHERE host = ?", (chave_host(site),)).fetchone()
+        return linha[0] if linha else None
+
+    def registrar(self, site, camada):
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT INTO camadas (host, camada, atualizado) VALUES (?, ?, ?) "
+                "ON CONFLICT (host) DO UPDATE SET camada = excluded.camada, atualizado = excluded.atualizado",
+                (chave_host(site), camada, time.time()),
+            )
+
+    def contagem(self):
+        return dict(self.conexao.execute("SELECT camada, COUNT(*) FROM camadas GROUP BY camada").fetchall())
+
+    def fechar(self):
+        self.conexao.close()
+
+# Sessão HTTP compartilhada pelos trabalhadores do pool
+def criar_sessao(conexoes, por_host, timeout=TIMEOUT_HTTP):
+    conector = aiohttp.TCPConnector(limit=conexoes, limit_per_host=por_host, ttl_dns_cache=300)
+    tempo_limite = aiohttp.ClientTimeout(total=timeout)
+    return aiohttp.ClientSession(headers=HEADERS_HTTP, connector=conector, timeout=tempo_limite)
+
+# Baixa a URL por GET; devolve o HTML, ou None quando a resposta não é HTML
+# (erros de conexão e status >= 400 sobem como exceção)
+async def baixar_html(sessao, url):
+    async with sessao.get(url, allow_redirects=True, max_redirects=10) as resposta:
+        resposta.raise_for_status()
+        tipo = resposta.headers.get("Content-Type", "text/html").lower()
+        if "html" not in tipo and "text/plain" not in tipo:
+            return None
+        corpo = await resposta.content.read(TAMANHO_MAXIMO)
+        try:
+            return corpo.decode(resposta.charset or "utf-8", errors="replace")
+        except LookupError:
+            return corpo.decode("utf-8", errors="replace")
+
+class BuscaCamadas:
+    # `dns` é a MemoriaDns (resolucao_dns.py), para tentar primeiro o protocolo que respondeu da última vez
+    def __init__(self, sessao, memoria, modo=MODO_PADRAO, min_texto=MIN_TEXTO_PADRAO, marcadores=None, dns=None):
+        self.sessao = sessao
+        self.dns = dns
+        self.memoria = memoria
+        self.modo = modo
+        self.min_texto = min_texto
+        self.marcadores = MARCADORES_JS + list(marcadores or [])
+
+    # Tenta o site só com HTTP (http e https); devolve o HTML
+    # ou None quando é preciso o navegador. A camada descoberta fica gravada para o domínio.
+    async def conteudo_http(self, site):
+        if self.modo == CAMADA_NAVEGADOR or self.memoria.obter(site) == CAMADA_NAVEGADOR:
+            return None
+        for protocol in ordem_protocolos(self.dns, site):
+            url = protocol + site
+            try:
+                html = await baixar_html(self.sessao, url)
+            except Exception:
+                # Falha de rede ou status de erro: tenta o outro protocolo, e depois o navegador
+                # (que tem as próprias tentativas) sem gravar a camada
+                continue
+            if html is None or depende_de_js(html, self.min_texto, self.marcadores):
+                self.memoria.registrar(site, CAMADA_NAVEGADOR)
+                return None
+            self.memoria.registrar(site, CAMADA_HTTP)
+            if self.dns is not None:
+                self.dns.registrar_esquema(site, url)
+            return html
+        return None
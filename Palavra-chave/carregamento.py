@@ -0,0 +1,98 @@
+from urllib.parse import urlsplit
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+# Perfis de carregamento das páginas
+# Só lemos o HTML para procurar as palavras-chave, então no perfil "leve" o contexto aborta
+# imagens, mídia, fontes, CSS e os hosts de anúncio/analytics mais comuns, e a navegação
+# espera só o domcontentloaded (mais um tempo curto de rede ociosa para o JS montar a página).
+# O perfil "completo" é o comportamento antigo: espera o evento load com tudo carregado.
+
+PERFIS = ["leve", "completo"]
+PERFIL_PADRAO = "leve"
+TIMEOUT_NAVEGACAO = 15000  # ms
+ESPERA_REDE_PADRAO = 3000  # ms de espera máxima pela rede ociosa depois do domcontentloaded
+
+# Tipos de recurso (request.resource_type) que não mudam o texto da página
+TIPOS_BLOQUEADOS = {"image", "media", "font", "stylesheet", "texttrack", "manifest"}
+
+# Hosts de anúncio e analytics (vale o domínio e todos os subdomínios)
+HOSTS_BLOQUEADOS = {
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "facebook.net",
+    "analytics.tiktok.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "hotjar.com",
+    "mc.yandex.ru",
+    "scorecardresearch.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "adnxs.com",
+    "rubiconproject.com",
+    "pubmatic.com",
+    "segment.io",
+    "mixpanel.com",
+    "nr-data.net",
+}
+
+# Verifica se o host é um dos bloqueados ou subdomínio de um deles
+def host_bloqueado(host, hosts=HOSTS_BLOQUEADOS):
+    host = (host or "").lower()
+    while host:
+        if host in hosts:
+            return True
+        if "." not in host:
+            return False
+        host = host.split(".", 1)[1]
+    return False
+
+# Intercepta as requisições do contexto e aborta as desnecessárias; conta o que foi bloqueado
+class BloqueioRecursos:
+    def __init__(self, tipos=TIPOS_BLOQUEADOS, hosts=HOSTS_BLOQUEADOS):
+        self.tipos = tipos
+        self.hosts = hosts
+        self.bloqueadas = 0
+        self.liberadas = 0
+
+    async def instalar(self, context):
+        await context.route("**/*", self._decidir)
+
+    async def _decidir(self, route):
+        request = route.request
+        if request.resource_type in self.tipos or host_bloqueado(urlsplit(request.url).hostname, self.hosts):
+            self.bloqueadas += 1
+            await route.abort()
+        else:
+            self.liberadas += 1
+            await route.continue_()
+
+# Prepara o contexto para o perfil escolhido; devolve o BloqueioRecursos (ou None no perfil completo)
+async def preparar_contexto(context, perfil=PERFIL_PADRAO):
+    if perfil != "leve":
+        return None
+    bloqueio = BloqueioRecursos()
+    await bloqueio.instalar(context)
+    return bloqueio
+
+# Abre a URL na página conforme o perfil
+async def carregar_pagina(page, url, perfil=PERFIL_PADRAO, timeout=TIMEOUT_NAVEGACAO, espera_rede=ESPERA_REDE_PADRAO):
+    if perfil != "leve":
+        await page.goto(url, timeout=timeout)
+        return
+    await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    if espera_rede:
+        try:
+            await page.wait_for_load_state("networkidle", timeout=espera_rede)
+        except PlaywrightTimeoutError:
+            # Página que nunca fica ociosa (chat, polling...): segue com o que já carregou
+            pass
@@ -0,0 +1,167 @@
+import os
+import time
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+
+from indice_dominios import STATUS_OK, chave_site
+
+# Entrada de sites orientada a eventos
+# O sites.txt só cresce: o monitor guarda até que byte já leu e, a cada mudança avisada pelo
+# inotify, lê apenas os bytes acrescentados. Nada é reescrito no arquivo de entrada; o que já
+# foi feito fica no índice de processados (indice_dominios.py), consultado site a site.
+# Fora do Linux (sem inotify) o arquivo é observado por os.stat a cada segundo.
+
+INTERVALO_POLLING = 1.0  # segundos, só quando não há inotify
+ESPERA_LINHA_INCOMPLETA = 5.0  # segundos sem mudança no arquivo para aceitar a última linha sem "\n" no polling
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+CABECALHO_EVENTO = struct.Struct("iIII")  # wd, mask, cookie, len (struct inotify_event)
+
+# Observa um diretório com inotify e devolve os eventos do arquivo de interesse
+class _Inotify:
+    def __init__(self, caminho):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        diretorio = os.path.dirname(os.path.abspath(caminho))
+        self.nome = os.path.basename(caminho).encode()
+        # O diretório (e não o arquivo) é observado para pegar também o arquivo substituído por um editor
+        mascara = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, diretorio.encode(), mascara) < 0:
+            erro = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(erro, f"inotify_add_watch falhou em {diretorio}")
+
+    # Máscaras dos eventos pendentes do arquivo observado (lista vazia se não houver nenhum)
+    def ler_eventos(self):
+        mascaras = []
+        while True:
+            try:
+                dados = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return mascaras
+            posicao = 0
+            while posicao < len(dados):
+                _, mascara, _, tamanho = CABECALHO_EVENTO.unpack_from(dados, posicao)
+                inicio = posicao + CABECALHO_EVENTO.size
+                nome = dados[inicio:inicio + tamanho].rstrip(b"\0")
+                posicao = inicio + tamanho
+                if nome == self.nome:
+                    mascaras.append(mascara)
+
+    def fechar(self):
+        os.close(self.fd)
+
+class EntradaSites:
+    def __init__(self, caminho, indice):
+        self.caminho = caminho
+        self.indice = indice
+        self.offset = 0
+        self.inode = None
+        self.tamanho_anterior = None
+        self.mudou_em = 0.0
+        # Chaves entregues nesta execução que ainda não entraram no índice
+        self.pendentes = set()
+        self.inotify = None
+        self._aviso = None
+        self._primeira_leitura = True
+
+    # Lê os bytes acrescentados desde a última leitura e devolve os sites novos, na ordem do arquivo
+    # Uma última linha sem "\n" só é aceita com `final` (o escritor fechou o arquivo), para não
+    # pegar pela metade um site que ainda está sendo escrito
+    def ler_novos(self, final=True):
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return []
+        if info.st_ino != self.inode or info.st_size < self.offset:
+            # Arquivo substituído ou truncado: relê do começo (os já vistos são ignorados)
+            self.inode = info.st_ino
+            self.offset = 0
+        if info.st_size == self.offset:
+            return []
+        with open(self.caminho, "rb") as f:
+            f.seek(self.offset)
+            dados = f.read(info.st_size - self.offset)
+        if not final:
+            fim = dados.rfind(b"\n") + 1
+            dados = dados[:fim]
+        self.offset += len(dados)
+
+        novos = []
+        for linha in dados.decode("utf-8", errors="replace").splitlines():
+            site = linha.strip()
+            if not site:
+                continue
+            chave = chave_site(site)
+            if chave not in self.pendentes and not self.indice.contem(site):
+                self.pendentes.add(chave)
+                novos.append(site)
+        return novos
+
+    def _iniciar_observacao(self):
+        if self.inotify is not None or self._aviso is not None:
+            return
+        self._aviso = asyncio.Event()
+        try:
+            self.inotify = _Inotify(self.caminho)
+        except (OSError, AttributeError, TypeError):
+            # Sem inotify (outro sistema): fica no polling por os.stat
+            self.inotify = None
+            return
+        asyncio.get_running_loop().add_reader(self.inotify.fd, self._aviso.set)
+
+    # Espera até haver sites novos e devolve todos os que estiverem disponíveis
+    async def proximos(self):
+        # A observação começa antes da primeira leitura, para não perder o que chegar no meio
+        self._iniciar_observacao()
+        if self._primeira_leitura:
+            self._primeira_leitura = False
+            novos = self.ler_novos()
+            if novos:
+                return novos
+        while True:
+            if self.inotify is not None:
+                await self._aviso.wait()
+                self._aviso.clear()
+                mascaras = self.inotify.ler_eventos()
+                if not mascaras:
+                    continue
+                final = any(mascara & (IN_CLOSE_WRITE | IN_MOVED_TO) for mascara in mascaras)
+                novos = self.ler_novos(final)
+            else:
+                await asyncio.sleep(INTERVALO_POLLING)
+                try:
+                    tamanho = os.stat(self.caminho).st_size
+                except FileNotFoundError:
+                    continue
+                agora = time.monotonic()
+                if tamanho != self.tamanho_anterior:
+                    self.tamanho_anterior = tamanho
+                    self.mudou_em = agora
+                # Arquivo parado há um tempo: o escritor terminou, vale até a linha sem "\n"
+                novos = self.ler_novos(final=agora - self.mudou_em >= ESPERA_LINHA_INCOMPLETA)
+            if novos:
+                return novos
+
+    # Grava o resultado do site no índice (STATUS_OK ou STATUS_FALHA); ele não volta mais
+    def concluir(self, site, status=STATUS_OK):
+        self.indice.registrar(site, status)
+        self.pendentes.discard(chave_site(site))
+
+    def fechar(self):
+        if self.inotify is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self.inotify.fd)
+            except RuntimeError:
+                pass
+            self.inotify.fechar()
+            self.inotify = None
@@ -1,15 +1,32 @@
 import os
-import time
-from playwright.sync_api import sync_playwright
+import asyncio
+import argparse
+from functools import partial
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 from colorama import Fore, Style
+from pool_paginas import PoolPaginas, PAGINAS_PADRAO, POR_HOST_PADRAO
+from carregamento import PERFIS, PERFIL_PADRAO, ESPERA_REDE_PADRAO, preparar_contexto, carregar_pagina
+from navegador import PAGINAS_POR_CONTEXTO_PADRAO, LIMITE_RSS_MB_PADRAO, GerenciadorNavegador
+from buscador_palavras import BuscadorPalavras
+from entrada import EntradaSites
+from resolucao_dns import TTL_NEGATIVO_PADRAO, ResolvedorDns, MemoriaDns, FiltroDns, ordem_protocolos
+from caixa_saida import TAMANHO_LOTE_PADRAO, INTERVALO_PADRAO, CaixaSaida, EnviadorSheets
+from indice_dominios import STATUS_OK, STATUS_FALHA, CAPACIDADE_BLOOM_PADRAO, IndiceProcessados
+from camadas import (MODOS, MODO_PADRAO, MIN_TEXTO_PADRAO, CAMADA_NAVEGADOR, MemoriaCamadas, BuscaCamadas,
+                     criar_sessao)
+from fragmentos import Coordenador, receber_lotes
 
 # Caminho da pasta de trabalho
 WORK_DIR = os.path.join(os.getcwd(), "Palavra-chave")
 SITES_FILE = os.path.join(WORK_DIR, "sites.txt")
 PALAVRAS_FILE = os.path.join(WORK_DIR, "palavras.txt")
 PROCESSADOS_FILE = os.path.join(WORK_DIR, "processados.txt")
+FALHAS_FILE = os.path.join(WORK_DIR, "falhas.txt")
+MONITOR_DB = os.path.join(WORK_DIR, "monitor.db")
+BLOOM_FILE = os.path.join(WORK_DIR, "processados.bloom")
 SECRET_FILE = "secret.json"
 SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/1ghQU4TODlkWPR82tlH07mP_gI2d5Mh5teVLTbQU87DU/edit#gid=0"
 
@@ -29,16 +46,6 @@ def load_file(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         return [line.strip() for line in f.readlines() if line.strip()]
 
-def save_processed(site):
-    with open(PROCESSADOS_FILE, 'a', encoding='utf-8') as f:
-        f.write(site + '\n')
-
-def remove_processed_site(site):
-    sites = load_file(SITES_FILE)
-    sites = [s for s in sites if s != site]
-    with open(SITES_FILE, 'w', encoding='utf-8') as f:
-        f.writelines([s + '\n' for s in sites])
-
 # Autenticação do Google Sheets
 def autenticacao_google_sheets():
     scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
@@ -46,107 +53,291 @@ def autenticacao_google_sheets():
     client = gspread.authorize(creds)
     return client
 
-def escrever_no_sheets(client, dados, spreadsheet_url):
+# Primeira aba da planilha de resultados (aberta pelo enviador da caixa de saída)
+def abrir_planilha(client, spreadsheet_url):
     spreadsheet = client.open_by_url(spreadsheet_url)
-    sheet = spreadsheet.sheet1
-    sheet.append_row(dados)
+    return spreadsheet.sheet1
 
 # Função para mostrar uma animação de carregamento
-def mostrar_carregando():
+async def mostrar_carregando():
     print(f"{Fore.YELLOW}Esperando lista nova", end="")
     for _ in range(3):
         print(".", end="", flush=True)
-        time.sleep(0.5)
+        await asyncio.sleep(0.5)
     print(f"{Style.RESET_ALL}")
 
-# Remover duplicados de sites
-def remove_duplicados(sites):
-    return list(set(sites))
+# Visitar um site no navegador (http e https) e devolver as palavras-chave encontradas
+# com o número de ocorrências de cada uma (buscador_palavras.py)
+# Repete até 3 falhas; depois disso a última exceção é levantada
+# `carregar(page, url)` abre a URL conforme o perfil de carregamento (carregamento.py)
+# Com `dns` (MemoriaDns) o protocolo que respondeu da última vez é tentado primeiro
+# A página vem de `abrir_pagina()` a cada tentativa: se a aba ou o navegador caiu, a próxima
+# tentativa já usa uma página nova (navegador.py)
+async def verificar_site(abrir_pagina, site, buscador, carregar=carregar_pagina, dns=None):
+    tentativas = 0
+    while True:
+        for protocol in ordem_protocolos(dns, site):
+            url = protocol + site
+            try:
+                page = await abrir_pagina()
+                await carregar(page, url)  # Timeout de 15 segundos
+                palavras_encontradas = buscador.contar(await page.content())
+                if dns is not None:
+                    dns.registrar_esquema(site, url)
+                return palavras_encontradas
+            except Exception as e:
+                tentativas += 1
+                print(f"{Fore.YELLOW}Erro ao processar {url}: {Style.RESET_ALL}")
+                # Caso o erro seja relacionado ao tempo de carregamento
+                if "Timeout" in str(e):
+                    print(f"{Fore.RED}Site não carregou em 15 segundos! ({site}) Tentativa {tentativas}/3{Style.RESET_ALL}")
+                elif "ERR_NAME_NOT_RESOLVED" in str(e):
+                    print(f"{Fore.RED}Erro de DNS ao tentar acessar {site}, tentativas {tentativas}/3{Style.RESET_ALL}")
+
+                if tentativas == 3:
+                    raise
+                await asyncio.sleep(2)  # Aguardar um pouco antes da próxima tentativa
+
+# Tarefa de cada site no pool de páginas
+# Com `busca` (camadas.py) cada site tenta primeiro um GET simples e só abre página no
+# navegador quando o HTML depende de JavaScript ou o domínio já precisou do navegador antes
+def criar_tarefa(buscador, carregar=carregar_pagina, busca=None, memoria_dns=None):
+    async def tarefa(abrir_pagina, site):
+        if busca is not None:
+            content = await busca.conteudo_http(site)
+            if content is not None:
+                return buscador.contar(content)
+        palavras_encontradas = await verificar_site(abrir_pagina, site, buscador, carregar, memoria_dns)
+        if busca is not None and busca.memoria.obter(site) is None:
+            # O GET falhou mas o navegador conseguiu (bloqueio de robôs, TLS...): fica no navegador
+            busca.memoria.registrar(site, CAMADA_NAVEGADOR)
+        return palavras_encontradas
+    return tarefa
 
 # Processar sites
-def process_sites(client, context, palavras):
-    sites = load_file(SITES_FILE)
-    sites = remove_duplicados(sites)  # Remove duplicados
-    processados = set(load_file(PROCESSADOS_FILE))
-    novos_sites = [site for site in sites if site not in processados]
-
-    if not novos_sites:
-        mostrar_carregando()  # Só exibe a mensagem "Esperando lista nova" quando não houver novos sites
-        return
-
-    print(f"{Fore.CYAN}Lista nova adicionada, processando ({1}/{len(novos_sites)})...{Style.RESET_ALL}")
-    
-    for idx, site in enumerate(novos_sites):
-        print(f"{Fore.CYAN}Processando {idx + 1}/{len(novos_sites)} - {site}...{Style.RESET_ALL}")
-        tentativas = 0
-        processado = False
-        while tentativas < 3 and not processado:
-            for protocol in ["http://", "https://"]:
-                url = protocol + site if not site.startswith("http") else site
-                page = None  # Inicialize a variável antes do bloco try
-                try:
-                    page = context.new_page()
-                    page.goto(url, timeout=15000)  # Timeout ajustado para 15 segundos
-                    content = page.content().lower()
-                    palavras_encontradas = [palavra for palavra in palavras if palavra.lower() in content]
-
-                    if palavras_encontradas:
-                        palavras_str = ", ".join(palavras_encontradas)
-                        print(f"{Fore.GREEN}{site} - Palavra-chave encontrada - {palavras_str}{Style.RESET_ALL}")
-                        escrever_no_sheets(client, [site, "Sim", palavras_str], SPREADSHEET_URL)
-                    else:
-                        print(f"{Fore.RED}{site} - Nenhuma palavra-chave encontrada{Style.RESET_ALL}")
-                        escrever_no_sheets(client, [site, "Não", ""], SPREADSHEET_URL)
-
-                    save_processed(site)
-                    remove_processed_site(site)
-                    processado = True
-                    break
-                except Exception as e:
-                    tentativas += 1
-                    print(f"{Fore.YELLOW}Erro ao processar {url}: {Style.RESET_ALL}")
-                    # Caso o erro seja relacionado ao tempo de carregamento
-                    if "Timeout" in str(e):
-                        print(f"{Fore.RED}Site não carregou em 15 segundos! ({site}) Tentativa {tentativas}/3{Style.RESET_ALL}")
-                    elif "ERR_NAME_NOT_RESOLVED" in str(e):
-                        print(f"{Fore.RED}Erro de DNS ao tentar acessar {site}, tentativas {tentativas}/3{Style.RESET_ALL}")
-
-                    if tentativas == 3:
-                        print(f"{Fore.RED}Provavelmente não iremos conseguir processar - {site}{Style.RESET_ALL}")
-                        # Remover o site da lista após 3 tentativas falhadas
-                        remove_processed_site(site)
-                    time.sleep(2)  # Aguardar um pouco antes da próxima tentativa
-                finally:
-                    if page:
-                        page.close()
-
-    mostrar_carregando()
+# `novos_sites` chega da entrada (entrada.py) já sem repetidos e sem os já processados;
+# o resultado de cada site volta para o índice de processados por `entrada.concluir`.
+# Os sites novos vão para o pool de páginas e são visitados em paralelo; os resultados
+# são gravados aqui, um de cada vez, conforme cada site termina.
+# `pool` pode ser também o Coordenador (fragmentos.py), que espalha os sites por vários processos
+# e devolve os resultados da mesma forma
+# Com `contagens` a planilha recebe "palavra (n)" em vez de só a palavra
+# Com `dns` (resolucao_dns.py) os domínios são resolvidos antes e os inexistentes nem chegam ao pool
+async def process_sites(enviador, pool, buscador, entrada, novos_sites, carregar=carregar_pagina, busca=None,
+                        contagens=False, dns=None):
+    print(f"{Fore.CYAN}Lista nova adicionada, processando {len(novos_sites)} sites com {pool.paginas} páginas...{Style.RESET_ALL}")
+
+    memoria_dns = None
+    if dns is not None:
+        memoria_dns = dns.memoria
+        novos_sites, inexistentes = await dns.separar(novos_sites)
+        for site in inexistentes:
+            print(f"{Fore.RED}Domínio não existe (DNS), ignorando - {site}{Style.RESET_ALL}")
+            entrada.concluir(site, STATUS_FALHA)
+
+    tarefa = criar_tarefa(buscador, carregar, busca, memoria_dns)
+    concluidos = 0
+    async for site, palavras_encontradas, erro in pool.processar(novos_sites, tarefa):
+        concluidos += 1
+        print(f"{Fore.CYAN}Processado {concluidos}/{len(novos_sites)} - {site}{Style.RESET_ALL}")
+        if erro is not None:
+            print(f"{Fore.RED}Provavelmente não iremos conseguir processar - {site}{Style.RESET_ALL}")
+            # Após 3 tentativas falhadas o site fica marcado como falha e não volta mais
+            entrada.concluir(site, STATUS_FALHA)
+            continue
+
+        if palavras_encontradas:
+            if contagens:
+                palavras_str = ", ".join(f"{palavra} ({total})" for palavra, total in palavras_encontradas.items())
+            else:
+                palavras_str = ", ".join(palavras_encontradas)
+            print(f"{Fore.GREEN}{site} - Palavra-chave encontrada - {palavras_str}{Style.RESET_ALL}")
+            dados = [site, "Sim", palavras_str]
+        else:
+            print(f"{Fore.RED}{site} - Nenhuma palavra-chave encontrada{Style.RESET_ALL}")
+            dados = [site, "Não", ""]
+        # A linha vai para a caixa de saída local; o enviador manda para o Sheets em segundo plano
+        enviador.caixa.adicionar(dados)
+        entrada.concluir(site)
+        enviador.avisar()
+
+# Mostra o uso de memória do navegador e de cada contexto
+async def mostrar_memoria(navegador, titulo="Navegador"):
+    estatisticas = await navegador.estatisticas()
+    rss = estatisticas["rss_mb"]
+    print(f"{Fore.CYAN}{titulo}: {f'{rss:.0f} MB de RSS' if rss is not None else 'RSS indisponível'}, "
+          f"{estatisticas['reciclagens']} reciclagens, {estatisticas['relancamentos']} relançamentos{Style.RESET_ALL}")
+    for contexto in estatisticas["contextos"]:
+        amostra = ("sem página para amostra" if contexto["heap_js_mb"] is None else
+                   f"heap JS {contexto['heap_js_mb']:.1f} MB e {contexto['nos_dom']} nós DOM em uma página")
+        print(f"{Fore.CYAN}  Contexto {contexto['contexto']}{' (atual)' if contexto['atual'] else ''}: "
+              f"{contexto['paginas_servidas']} páginas servidas, {contexto['paginas_abertas']} abertas, "
+              f"{amostra}, {contexto['idade_min']:.0f} min{Style.RESET_ALL}")
+
+# O autômato das palavras-chave é montado uma vez para a execução inteira
+def criar_buscador(args):
+    return BuscadorPalavras(load_file(PALAVRAS_FILE), acentos=not args.manter_acentos,
+                            palavra_inteira=not args.substring, so_texto=not args.html_inteiro)
+
+# Navegador gerenciado (navegador.py), pool de páginas e busca em camadas de um processo:
+# devolve (navegador, pool, busca, carregar) e fecha tudo na saída do `async with`
+@asynccontextmanager
+async def abrir_navegacao(args, memoria_dns):
+    memoria = MemoriaCamadas(MONITOR_DB)
+    try:
+        async with async_playwright() as p:
+            # No perfil leve, imagens, fontes, CSS e rastreadores são abortados em cada contexto novo
+            navegador = GerenciadorNavegador(p, partial(preparar_contexto, perfil=args.perfil),
+                                             args.paginas_por_contexto, args.limite_rss_mb)
+            carregar = partial(carregar_pagina, perfil=args.perfil, espera_rede=args.espera_rede)
+            try:
+                async with criar_sessao(args.paginas, args.por_host) as sessao:
+                    busca = BuscaCamadas(sessao, memoria, args.camada, args.min_texto, args.marcador_js, memoria_dns)
+                    yield navegador, PoolPaginas(navegador, args.paginas, args.por_host), busca, carregar
+            finally:
+                await navegador.fechar()
+    finally:
+        memoria.fechar()
+
+# Processo trabalhador do --processos (fragmentos.py): visita os lotes que o coordenador manda
+# com o próprio navegador e devolve as palavras encontradas; o índice de processados e a caixa
+# de saída ficam só com o coordenador
+async def trabalhar_fragmento(numero, args, fila_sites, fila_resultados):
+    buscador = criar_buscador(args)
+    memoria_dns = MemoriaDns(MONITOR_DB)
+    try:
+        async with abrir_navegacao(args, memoria_dns) as (navegador, pool, busca, carregar):
+            tarefa = criar_tarefa(buscador, carregar, busca, memoria_dns)
+            async for lote in receber_lotes(fila_sites):
+                async for site, palavras_encontradas, erro in pool.processar(lote, tarefa):
+                    # A exceção vai como texto: nem toda exceção do Playwright passa de um processo para outro
+                    fila_resultados.put((numero, site, palavras_encontradas,
+                                         None if erro is None else f"{type(erro).__name__}: {erro}"))
+                fila_resultados.put((numero, None, None, None))
+                await mostrar_memoria(navegador, f"Navegador do trabalhador {numero}")
+    finally:
+        memoria_dns.fechar()
+
+# A primeira volta pega os sites que já estavam no arquivo; depois a entrada só
+# acorda quando o sites.txt recebe linhas novas
+async def aguardar_sites(enviador, pool, buscador, entrada, args, carregar=carregar_pagina, busca=None, dns=None,
+                         navegador=None):
+    print(f"{Fore.CYAN}Servidor iniciado novamente! Aguardando por novos sites.{Style.RESET_ALL}")
+    while True:
+        novos_sites = await entrada.proximos()
+        await process_sites(enviador, pool, buscador, entrada, novos_sites, carregar, busca, args.contagens, dns)
+        if navegador is not None:
+            await mostrar_memoria(navegador)
+        await mostrar_carregando()
+
+# Laço principal: um navegador gerenciado (navegador.py) para toda a execução, com os
+# contextos reciclados de tempos em tempos e o navegador relançado se cair
+# Com --processos maior que 1 este processo só distribui os sites entre os trabalhadores
+# (fragmentos.py), cada um com seu navegador, e grava os resultados que eles devolvem
+async def servidor(client, args):
+    memoria_dns = MemoriaDns(MONITOR_DB)
+    dns = FiltroDns(None if args.sem_dns else ResolvedorDns(args.dns), memoria_dns, args.ttl_dns_negativo)
+    # Índice dos sites já processados; os diários antigos (processados.txt e falhas.txt) são
+    # importados uma vez (nas partidas seguintes só o que tiver sido acrescentado a eles)
+    indice = IndiceProcessados(MONITOR_DB, None if args.sem_bloom else BLOOM_FILE, args.capacidade_bloom)
+    for diario, status in ((PROCESSADOS_FILE, STATUS_OK), (FALHAS_FILE, STATUS_FALHA)):
+        importados = indice.importar_diario(diario, status)
+        if importados:
+            print(f"{Fore.CYAN}{importados} sites importados de {diario}{Style.RESET_ALL}")
+    entrada = EntradaSites(SITES_FILE, indice)
+    # Resultados ficam na caixa de saída e vão para o Sheets em lotes, sem segurar as páginas
+    caixa = CaixaSaida(MONITOR_DB)
+    enviador = EnviadorSheets(caixa, partial(abrir_planilha, client, SPREADSHEET_URL),
+                              args.lote_sheets, args.intervalo_sheets)
+    if caixa.pendentes():
+        print(f"{Fore.CYAN}{caixa.pendentes()} resultados da execução anterior aguardando envio ao Sheets{Style.RESET_ALL}")
+    enviador.iniciar()
+
+    try:
+        if args.processos > 1:
+            print(f"{Fore.CYAN}Dividindo os sites entre {args.processos} processos{Style.RESET_ALL}")
+            coordenador = Coordenador(trabalhar_fragmento, args, args.processos, args.paginas)
+            coordenador.iniciar()
+            try:
+                await aguardar_sites(enviador, coordenador, None, entrada, args, dns=dns)
+            finally:
+                await coordenador.encerrar()
+        else:
+            async with abrir_navegacao(args, memoria_dns) as (navegador, pool, busca, carregar):
+                await aguardar_sites(enviador, pool, criar_buscador(args), entrada, args, carregar, busca, dns,
+                                     navegador)
+    finally:
+        await enviador.encerrar()
+        caixa.fechar()
+        entrada.fechar()
+        indice.fechar()
+        if dns.resolvedor is not None:
+            dns.resolvedor.fechar()
+        memoria_dns.fechar()
 
 # Inicializar servidor
 def start_server():
+    parser = argparse.ArgumentParser(description="Monitora sites.txt e procura as palavras-chave em cada site")
+    parser.add_argument("--paginas", type=int, default=PAGINAS_PADRAO,
+                        help=f"Páginas abertas ao mesmo tempo (padrão: {PAGINAS_PADRAO})")
+    parser.add_argument("--por-host", type=int, default=POR_HOST_PADRAO,
+                        help=f"Páginas abertas ao mesmo tempo no mesmo host (padrão: {POR_HOST_PADRAO})")
+    parser.add_argument("--perfil", choices=PERFIS, default=PERFIL_PADRAO,
+                        help="leve: bloqueia imagens/fontes/CSS/rastreadores e espera só o DOM; "
+                             f"completo: espera a página inteira (padrão: {PERFIL_PADRAO})")
+    parser.add_argument("--espera-rede", type=int, default=ESPERA_REDE_PADRAO,
+                        help=f"No perfil leve, ms de espera pela rede ociosa depois do DOM (padrão: {ESPERA_REDE_PADRAO})")
+    parser.add_argument("--camada", choices=MODOS, default=MODO_PADRAO,
+                        help="auto: tenta um GET simples e só usa o navegador quando a página depende de JavaScript; "
+                             f"navegador: sempre o Chromium (padrão: {MODO_PADRAO})")
+    parser.add_argument("--min-texto", type=int, default=MIN_TEXTO_PADRAO,
+                        help=f"Texto visível mínimo para aceitar o HTML do GET (padrão: {MIN_TEXTO_PADRAO} caracteres)")
+    parser.add_argument("--marcador-js", action="append", default=[],
+                        help="Expressão regular extra que, se aparecer no HTML, manda o site para o navegador "
+                             "(pode repetir)")
+    parser.add_argument("--manter-acentos", action="store_true",
+                        help="Diferencia letras acentuadas (por padrão \"ação\" também acha \"acao\")")
+    parser.add_argument("--substring", action="store_true",
+                        help="Aceita a palavra dentro de outra (por padrão só palavra inteira)")
+    parser.add_argument("--html-inteiro", action="store_true",
+                        help="Procura também em tags, scripts e atributos (por padrão só no texto visível)")
+    parser.add_argument("--contagens", action="store_true",
+                        help="Grava na planilha quantas vezes cada palavra apareceu")
+    parser.add_argument("--sem-bloom", action="store_true",
+                        help="Consulta o índice de processados só pelo SQLite, sem o filtro de Bloom")
+    parser.add_argument("--capacidade-bloom", type=int, default=CAPACIDADE_BLOOM_PADRAO,
+                        help=f"Sites previstos no filtro de Bloom; dobra sozinho quando passa (padrão: {CAPACIDADE_BLOOM_PADRAO})")
+    parser.add_argument("--sem-dns", action="store_true",
+                        help="Não resolve os domínios antes de abrir os sites")
+    parser.add_argument("--dns", action="append", default=None, metavar="SERVIDOR",
+                        help="Servidor de DNS a usar (ex.: 1.1.1.1 ou 127.0.0.1:5353; pode repetir; precisa do aiodns)")
+    parser.add_argument("--ttl-dns-negativo", type=int, default=TTL_NEGATIVO_PADRAO,
+                        help=f"Segundos que um domínio inexistente fica sem ser consultado de novo (padrão: {TTL_NEGATIVO_PADRAO})")
+    parser.add_argument("--lote-sheets", type=int, default=TAMANHO_LOTE_PADRAO,
+                        help=f"Linhas por envio ao Google Sheets (padrão: {TAMANHO_LOTE_PADRAO})")
+    parser.add_argument("--intervalo-sheets", type=float, default=INTERVALO_PADRAO,
+                        help=f"Segundos que um resultado espera por um lote cheio antes de ser enviado (padrão: {INTERVALO_PADRAO})")
+    parser.add_argument("--paginas-por-contexto", type=int, default=PAGINAS_POR_CONTEXTO_PADRAO,
+                        help=f"Sites visitados antes de trocar o contexto do navegador; 0 desliga (padrão: {PAGINAS_POR_CONTEXTO_PADRAO})")
+    parser.add_argument("--limite-rss-mb", type=int, default=LIMITE_RSS_MB_PADRAO,
+                        help=f"Memória (RSS) do monitor e do navegador que força a troca do contexto; 0 desliga (padrão: {LIMITE_RSS_MB_PADRAO})")
+    parser.add_argument("--processos", type=int, default=1,
+                        help="Processos trabalhadores, cada um com seu navegador; os sites são divididos pelo domínio "
+                             "(0 usa um por núcleo; padrão: 1)")
+    args = parser.parse_args()
+    if args.processos <= 0:
+        args.processos = os.cpu_count() or 1
+
     try:
         client = autenticacao_google_sheets()
     except Exception as e:
         print(f"{Fore.RED}Erro na autenticação do Google Sheets: {e}{Style.RESET_ALL}")
         exit(1)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        palavras = load_file(PALAVRAS_FILE)
-
-        # Processar sites existentes no início
-        process_sites(client, context, palavras)
-
-        print(f"{Fore.CYAN}Servidor iniciado novamente! Aguardando por novos sites.{Style.RESET_ALL}")
-        try:
-            while True:
-                process_sites(client, context, palavras)  # Verifica novos sites
-                time.sleep(10)  # Verifica a cada 10 segundos
-        except KeyboardInterrupt:
-            print(f"{Fore.YELLOW}Encerrando o servidor...{Style.RESET_ALL}")
-
-        browser.close()
+    try:
+        asyncio.run(servidor(client, args))
+    except KeyboardInterrupt:
+        print(f"{Fore.YELLOW}Encerrando o servidor...{Style.RESET_ALL}")
 
 if __name__ == "__main__":
     start_server()
@@ -0,0 +1,163 @@
+import time
+import queue
+import struct
+import hashlib
+import asyncio
+import multiprocessing
+
+from pool_paginas import chave_host
+
+# Sites divididos entre vários processos
+# Cada trabalhador é um processo com o próprio navegador e o próprio pool de páginas; os sites
+# são distribuídos pelo hash do domínio, então um domínio cai sempre no mesmo trabalhador (o
+# limite por host continua valendo e as memórias de camada e protocolo não disputam o mesmo host).
+# Os resultados voltam todos para o coordenador, que é o único a gravar no índice de processados
+# e na caixa de saída: cada site é registrado uma vez só, mesmo que um trabalhador caia no meio
+# do lote e os sites dele sejam reenviados para o processo que o substitui.
+
+INTERVALO_VERIFICACAO = 1.0  # segundos máximos de espera por um resultado antes de conferir os trabalhadores
+PRAZO_POR_SITE = 300  # segundos sem nenhum resultado de um trabalhador com sites pendentes antes de matá-lo
+ESPERA_TERMINO = 5  # segundos para um trabalhador travado sair depois do terminate
+QUEDAS_ANTES_DE_ISOLAR = 2  # quedas do mesmo trabalhador num lote antes de mandar um site por vez
+ESPERA_ENCERRAMENTO = 30  # segundos para cada trabalhador terminar antes de ser morto
+
+# Trabalhador de um site; usa blake2b porque o hash() do Python muda a cada processo
+def fragmento(site, total):
+    resumo = hashlib.blake2b(chave_host(site).encode("utf-8"), digest_size=8).digest()
+    return struct.unpack("<Q", resumo)[0] % total
+
+def _executar(trabalho, numero, config, fila_sites, fila_resultados):
+    try:
+        asyncio.run(trabalho(numero, config, fila_sites, fila_resultados))
+    except KeyboardInterrupt:
+        pass
+
+# Lado do trabalhador: devolve os lotes recebidos do coordenador até o aviso de encerramento
+async def receber_lotes(fila_sites):
+    while True:
+        lote = await asyncio.to_thread(fila_sites.get)
+        if lote is None:
+            return
+        yield lote
+
+# Coordenador com a mesma interface do PoolPaginas (`processar` devolve (site, resultado, erro))
+# `trabalho(numero, config, fila_sites, fila_resultados)` é a corrotina de cada processo; ela lê os
+# lotes com `receber_lotes`, põe (numero, site, resultado, erro) em `fila_resultados` para cada
+# site e (numero, None, None, None) ao fim de cada lote. Precisa ser uma função de módulo, porque
+# os processos são criados com "spawn" (o Playwright não sobrevive a um fork).
+# A cada resultado (ou a cada INTERVALO_VERIFICACAO sem nenhum) o coordenador confere se os
+# trabalhadores com sites pendentes estão vivos e se algum passou `prazo_site` segundos sem
+# devolver nada; um trabalhador travado é morto e tratado como uma queda.
+class Coordenador:
+    def __init__(self, trabalho, config, processos, paginas, prazo_site=PRAZO_POR_SITE):
+        self.trabalho = trabalho
+        self.config = config
+        self.prazo_site = prazo_site
+        self.total = max(1, processos)
+        self.paginas = self.total * paginas  # páginas abertas somando todos os trabalhadores
+        self.reinicios = 0
+        self._mp = multiprocessing.get_context("spawn")
+        self.resultados = self._mp.Queue()
+        self.filas = [None] * self.total
+        self.processos = [None] * self.total
+
+    def _iniciar_trabalhador(self, numero):
+        self.filas[numero] = self._mp.Queue()
+        processo = self._mp.Process(target=_executar, name=f"trabalhador-{numero}", daemon=True,
+                                    args=(self.trabalho, numero, self.config, self.filas[numero], self.resultados))
+        processo.start()
+        self.processos[numero] = processo
+
+    def iniciar(self):
+        for numero in range(self.total):
+            self._iniciar_trabalhador(numero)
+
+    # Próximo site de um trabalhador em isolamento, na ordem da lista
+    def _enviar_proximo(self, numero, pendentes):
+        self.filas[numero].put([min(pendentes, key=pendentes.get)])
+
+    # Motivo para substituir um trabalhador com sites pendentes, ou None se ele está bem
+    async def _problema(self, numero, ultimo_sinal):
+        processo = self.processos[numero]
+        if not processo.is_alive():
+            return f"caiu (código {processo.exitcode})"
+        if time.monotonic() - ultimo_sinal > self.prazo_site:
+            processo.terminate()
+            await asyncio.to_thread(processo.join, ESPERA_TERMINO)
+            if processo.is_alive():
+                processo.kill()
+            return f"travou ({self.prazo_site:.0f}s sem resultado)"
+        return None
+
+    # A `tarefa` do pool local é ignorada: cada trabalhador monta a sua no próprio processo
+    async def processar(self, sites, tarefa=None):
+        pendentes = [{} for _ in range(self.total)]  # site -> posição, por trabalhador
+        for posicao, site in enumerate(sites):
+            pendentes[fragmento(site, self.total)][site] = posicao
+        ativos = set()
+        # Último lote enviado ou resultado recebido de cada trabalhador (para o prazo por site)
+        ultimo_sinal = [time.monotonic()] * self.total
+        for numero, lote in enumerate(pendentes):
+            if lote:
+                self.filas[numero].put(list(lote))
+                ativos.add(numero)
+        quedas = [0] * self.total
+        # Trabalhadores que já caíram QUEDAS_ANTES_DE_ISOLAR vezes neste lote recebem um site por vez,
+        # para que só o site que derruba o navegador fique como falha
+        isolando = set()
+
+        while ativos:
+            try:
+                numero, site, resultado, erro = await asyncio.to_thread(self.resultados.get, True, INTERVALO_VERIFICACAO)
+            except queue.Empty:
+                pass
+            else:
+                ultimo_sinal[numero] = time.monotonic()
+                if site is None:
+                    # Fim de lote; um fim atrasado de um processo substituído não encerra o lote novo
+                    if not pendentes[numero]:
+                        ativos.discard(numero)
+                elif site in pendentes[numero]:  # senão é um resultado repetido de um lote reenviado
+                    del pendentes[numero][site]
+                    if numero in isolando and pendentes[numero]:
+                        self._enviar_proximo(numero, pendentes[numero])
+                    yield site, resultado, None if erro is None else RuntimeError(erro)
+
+            for numero in list(ativos):
+                motivo = await self._problema(numero, ultimo_sinal[numero])
+                if motivo is None:
+                    continue
+                # Trabalhador caiu ou travou (falta de memória, navegador preso...): os sites ainda
+                # sem resultado vão para um processo novo, na mesma ordem
+                quedas[numero] += 1
+                self.reinicios += 1
+                print(f"Trabalhador {numero} {motivo}, {len(pendentes[numero])} sites voltam para um processo novo")
+                self._iniciar_trabalhador(numero)
+                ultimo_sinal[numero] = time.monotonic()
+                if numero in isolando and pendentes[numero]:
+                    # Só havia um site no processo: foi ele que o derrubou
+                    site = min(pendentes[numero], key=pendentes[numero].get)
+                    del pendentes[numero][site]
+                    yield site, None, RuntimeError(f"o site derrubou o trabalhador {numero}: {motivo}")
+                elif quedas[numero] >= QUEDAS_ANTES_DE_ISOLAR:
+                    isolando.add(numero)
+                if not pendentes[numero]:
+                    ativos.discard(numero)
+                elif numero in isolando:
+                    self._enviar_proximo(numero, pendentes[numero])
+                else:
+                    self.filas[numero].put(sorted(pendentes[numero], key=pendentes[numero].get))
+
+    async def encerrar(self):
+        for numero, processo in enumerate(self.processos):
+            if processo is not None and processo.is_alive():
+                self.filas[numero].put(None)
+        for processo in self.processos:
+            if processo is None:
+                continue
+            await asyncio.to_thread(processo.join, ESPERA_ENCERRAMENTO)
+            if processo.is_alive():
+                processo.terminate()
+                await asyncio.to_thread(processo.join, ESPERA_TERMINO)
+                if processo.is_alive():
+                    processo.kill()
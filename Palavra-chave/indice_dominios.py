@@ -0,0 +1,208 @@
+import os
+import time
+import mmap
+import math
+import struct
+import sqlite3
+import hashlib
+from urllib.parse import urlsplit
+
+# Índice dos sites já processados pelo monitor
+# Fica na tabela `processados` do monitor.db, com a chave normalizada do site como chave
+# primária: cada consulta é uma busca no índice, sem carregar o histórico inteiro na memória.
+# Na frente do SQLite há um filtro de Bloom em arquivo (mmap): a maioria dos sites novos
+# nunca foi vista, e o filtro responde "não está" sem tocar no banco.
+
+STATUS_OK = "ok"
+STATUS_FALHA = "falha"
+
+CAPACIDADE_BLOOM_PADRAO = 1_000_000  # sites; o filtro dobra de tamanho quando passa disso
+TAXA_FALSO_POSITIVO = 0.01
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS processados (
+    id INTEGER PRIMARY KEY,
+    chave TEXT NOT NULL UNIQUE,
+    site TEXT NOT NULL,
+    status TEXT NOT NULL,
+    atualizado REAL
+);
+CREATE TABLE IF NOT EXISTS importacoes (
+    arquivo TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+
+# Chave de um site: sem esquema, host em minúsculas e sem "www.", sem "/" no fim
+# ("https://www.Exemplo.com/" e "exemplo.com" são o mesmo site; "exemplo.com/a" é outro)
+# Uma linha que nem é URL válida ("exemplo.com:abc", "http://[::1") vira a própria linha em
+# minúsculas, para que uma linha ruim no sites.txt não derrube a leitura a cada partida
+def chave_site(site):
+    site = site.strip()
+    endereco = site if "://" in site else "http://" + site
+    try:
+        partes = urlsplit(endereco)
+        porta = partes.port
+    except ValueError:
+        return site.lower()
+    host = (partes.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if porta:
+        host += f":{porta}"
+    caminho = partes.path.rstrip("/")
+    if partes.query:
+        caminho += "?" + partes.query
+    return host + caminho
+
+# Filtro de Bloom guardado em um arquivo mapeado na memória
+# Cabeçalho: assinatura, bits, funções de hash, capacidade e o último id do SQLite já incluído
+class FiltroBloom:
+    ASSINATURA = b"BLM1"
+    CABECALHO = struct.Struct("<4sQIQQ")
+
+    def __init__(self, caminho, capacidade, taxa=TAXA_FALSO_POSITIVO):
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.bits = max(8, int(-capacidade * math.log(taxa) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacidade * math.log(2)))
+        tamanho = self.CABECALHO.size + (self.bits + 7) // 8
+        novo = not os.path.exists(caminho) or os.path.getsize(caminho) != tamanho
+        with open(caminho, "w+b" if novo else "r+b") as f:
+            if novo:
+                f.truncate(tamanho)  # arquivo esparso: só as páginas com bits ligados ocupam disco
+            self.mapa = mmap.mmap(f.fileno(), tamanho)
+        assinatura, bits, hashes, capacidade_gravada, self.ultimo_id = self.CABECALHO.unpack_from(self.mapa, 0)
+        if novo or assinatura != self.ASSINATURA or (bits, hashes, capacidade_gravada) != (self.bits, self.hashes, capacidade):
+            if not novo:
+                self.mapa[:] = bytes(tamanho)
+            self.ultimo_id = 0
+            self._gravar_cabecalho()
+
+    def _gravar_cabecalho(self):
+        self.CABECALHO.pack_into(self.mapa, 0, self.ASSINATURA, self.bits, self.hashes, self.capacidade, self.ultimo_id)
+
+    def _posicoes(self, chave):
+        resumo = hashlib.blake2b(chave.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", resumo)
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def adicionar(self, chave):
+        base = self.CABECALHO.size
+        for posicao in self._posicoes(chave):
+            indice = base + (posicao >> 3)
+            self.mapa[indice] |= 1 << (posicao & 7)
+
+    def talvez_contem(self, chave):
+        base = self.CABECALHO.size
+        return all(self.mapa[base + (posicao >> 3)] & (1 << (posicao & 7)) for posicao in self._posicoes(chave))
+
+    def marcar_ate(self, ultimo_id):
+        self.ultimo_id = ultimo_id
+        self._gravar_cabecalho()
+
+    def fechar(self):
+        self.mapa.flush()
+        self.mapa.close()
+
+class IndiceProcessados:
+    def __init__(self, caminho, caminho_bloom=None, capacidade=CAPACIDADE_BLOOM_PADRAO):
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+        self.caminho_bloom = caminho_bloom
+        self.bloom = None
+        if caminho_bloom:
+            total = self._total()
+            while capacidade < total:
+                capacidade *= 2
+            self._abrir_bloom(capacidade)
+
+    # Quantidade de sites no índice; como nada é apagado, é o maior id (consulta O(1), sem COUNT)
+    def _total(self):
+        return self.conexao.execute("SELECT MAX(id) FROM processados").fetchone()[0] or 0
+
+    # Abre o filtro e acrescenta os sites gravados no SQLite depois da última vez que foi usado
+    # (ou todos, se o arquivo é novo ou mudou de tamanho)
+    def _abrir_bloom(self, capacidade):
+        self.bloom = FiltroBloom(self.caminho_bloom, capacidade)
+        ultimo_id = self.bloom.ultimo_id
+        for id_site, chave in self.conexao.execute(
+            "SELECT id, chave FROM processados WHERE id > ? ORDER BY id", (self.bloom.ultimo_id,)
+        ):
+            self.bloom.adicionar(chave)
+            ultimo_id = id_site
+        self.bloom.marcar_ate(ultimo_id)
+
+    def contem(self, site):
+        chave = chave_site(site)
+        if self.bloom is not None and not self.bloom.talvez_contem(chave):
+            return False
+        return self.conexao.execute("SELECT 1 FROM processados WHERE chave = ?", (chave,)).fetchone() is not None
+
+    def registrar(self, site, status=STATUS_OK):
+        self.registrar_varios([site], status)
+
+    def registrar_varios(self, sites, status=STATUS_OK):
+        chaves = [(chave_site(site), site) for site in sites]
+        # O filtro recebe a chave antes do commit: se o processo cair no meio, o filtro
+        # pode ter a mais (falso positivo, resolvido pelo SQLite), nunca a menos
+        if self.bloom is not None:
+            for chave, _ in chaves:
+                self.bloom.adicionar(chave)
+        agora = time.time()
+        with self.conexao:
+            self.conexao.executemany(
+                "INSERT INTO processados (chave, site, status, atualizado) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (chave) DO UPDATE SET status = excluded.status, atualizado = excluded.atualizado",
+                [(chave, site, status, agora) for chave, site in chaves],
+            )
+        if self.bloom is not None:
+            ultimo_id = self._total()
+            if ultimo_id > self.bloom.capacidade:
+                # Filtro cheio demais (falsos positivos crescendo): refaz dobrando a capacidade
+                capacidade = self.bloom.capacidade
+                while capacidade < ultimo_id:
+                    capacidade *= 2
+                self.bloom.fechar()
+                os.remove(self.caminho_bloom)
+                self._abrir_bloom(capacidade)
+            else:
+                self.bloom.marcar_ate(ultimo_id)
+
+    # Importa um diário antigo (processados.txt, falhas.txt); só os bytes acrescentados
+    # depois da última importação são lidos, então pode ser chamada em toda partida
+    def importar_diario(self, caminho, status=STATUS_OK):
+        if not os.path.exists(caminho):
+            return 0
+        nome = os.path.abspath(caminho)
+        linha = self.conexao.execute("SELECT offset FROM importacoes WHERE arquivo = ?", (nome,)).fetchone()
+        offset = linha[0] if linha else 0
+        tamanho = os.path.getsize(caminho)
+        if tamanho < offset:
+            offset = 0  # arquivo recriado
+        if tamanho == offset:
+            return 0
+        with open(caminho, "rb") as f:
+            f.seek(offset)
+            dados = f.read(tamanho - offset)
+        dados = dados[:dados.rfind(b"\n") + 1]
+        sites = [linha.strip() for linha in dados.decode("utf-8", errors="replace").splitlines() if linha.strip()]
+        if sites:
+            self.registrar_varios(sites, status)
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT INTO importacoes (arquivo, offset) VALUES (?, ?) "
+                "ON CONFLICT (arquivo) DO UPDATE SET offset = excluded.offset",
+                (nome, offset + len(dados)),
+            )
+        return len(sites)
+
+    def resumo(self):
+        return dict(self.conexao.execute("SELECT status, COUNT(*) FROM processados GROUP BY status"))
+
+    def fechar(self):
+        if self.bloom is not None:
+            self.bloom.fechar()
+        self.conexao.close()
@@ -0,0 +1,192 @@
+import os
+import time
+
+# Navegador e contextos gerenciados para execuções longas
+# O pool de páginas pede as páginas aqui. Cada contexto serve até `paginas_por_contexto` sites;
+# depois disso (ou quando a memória do monitor e do navegador passa de `limite_rss_mb`) um
+# contexto novo assume e o antigo é fechado assim que sua última página é devolvida, levando
+# junto cookies, cache, service workers e a memória dos renderizadores. Se o navegador cai, ele
+# é relançado na próxima página pedida, sem parar o monitor.
+
+PAGINAS_POR_CONTEXTO_PADRAO = 500
+LIMITE_RSS_MB_PADRAO = 2048  # 0 desliga
+INTERVALO_MEDICAO = 10  # segundos entre medições de RSS
+
+# RSS (MB) de um processo e de todos os descendentes, lido do /proc; None fora do Linux
+def rss_arvore_mb(pid_raiz=None):
+    if not os.path.isdir("/proc"):
+        return None
+    filhos = {}
+    rss = {}
+    for nome in os.listdir("/proc"):
+        if not nome.isdigit():
+            continue
+        try:
+            with open(f"/proc/{nome}/stat", "rb") as f:
+                campos = f.read().rsplit(b")", 1)[1].split()
+            # Depois do nome: estado, ppid, ... rss (24º campo do stat, em páginas)
+            filhos.setdefault(int(campos[1]), []).append(int(nome))
+            rss[int(nome)] = int(campos[21])
+        except (OSError, IndexError, ValueError):
+            continue
+    pagina = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    pendentes = [pid_raiz or os.getpid()]
+    while pendentes:
+        pid = pendentes.pop()
+        total += rss.get(pid, 0)
+        pendentes.extend(filhos.get(pid, []))
+    return total * pagina / (1024 * 1024)
+
+class _Contexto:
+    def __init__(self, context, geracao):
+        self.context = context
+        self.geracao = geracao
+        self.criado = time.monotonic()
+        self.servidas = 0  # sites visitados neste contexto
+        self.abertas = set()  # páginas ainda abertas
+
+class GerenciadorNavegador:
+    def __init__(self, playwright, preparar=None, paginas_por_contexto=PAGINAS_POR_CONTEXTO_PADRAO,
+                 limite_rss_mb=LIMITE_RSS_MB_PADRAO, headless=True):
+        self.playwright = playwright
+        self.preparar = preparar  # corrotina chamada com cada contexto novo (ex.: bloqueio de recursos)
+        self.paginas_por_contexto = paginas_por_contexto
+        self.limite_rss_mb = limite_rss_mb
+        self.headless = headless
+        self.browser = None
+        self.atual = None
+        self.antigos = []
+        self.geracao = 0
+        self.relancamentos = 0
+        self.reciclagens = 0
+        self.rss_mb = None
+        self._ultima_medicao = 0.0
+        self._paginas_quebradas = set()
+
+    async def _lancar(self):
+        self.browser = await self.playwright.chromium.launch(headless=self.headless)
+
+    async def _novo_contexto(self):
+        if self.browser is None or not self.browser.is_connected():
+            if self.browser is not None:
+                self.relancamentos += 1
+                print(f"Navegador caiu, relançando (relançamento {self.relancamentos})")
+                # As páginas e contextos do navegador morto não voltam mais
+                self.antigos = []
+            await self._lancar()
+        self.geracao += 1
+        context = await self.browser.new_context()
+        if self.preparar is not None:
+            await self.preparar(context)
+        self.atual = _Contexto(context, self.geracao)
+
+    # Página aberta no contexto atual: devolve `page` se ainda serve, senão fecha e abre outra
+    async def obter_pagina(self, page=None):
+        if self.atual is None or not self.browser.is_connected():
+            await self._novo_contexto()
+        if page is not None:
+            if (not page.is_closed() and page not in self._paginas_quebradas
+                    and page in self.atual.abertas):
+                return page
+            await self.devolver(page)
+        page = await self.atual.context.new_page()
+        # Aba travada (renderizador morto): a página é trocada na próxima vez
+        page.on("crash", lambda pagina: self._paginas_quebradas.add(pagina))
+        self.atual.abertas.add(page)
+        return page
+
+    # Fecha a página; o contexto antigo a que ela pertencia fecha junto quando fica vazio
+    async def devolver(self, page):
+        self._paginas_quebradas.discard(page)
+        if not page.is_closed():
+            try:
+                await page.close()
+            except Exception:
+                pass
+        for registro in list(self.antigos):
+            if page in registro.abertas:
+                registro.abertas.discard(page)
+                if not registro.abertas:
+                    await self._fechar_contexto(registro)
+                return
+        if self.atual is not None:
+            self.atual.abertas.discard(page)
+
+    async def _fechar_contexto(self, registro):
+        if registro in self.antigos:
+            self.antigos.remove(registro)
+        try:
+            await registro.context.close()
+        except Exception:
+            pass
+
+    # Chamada depois de cada site visitado com a página; decide se é hora de reciclar
+    async def pagina_usada(self, page):
+        if self.atual is None or page not in self.atual.abertas:
+            return
+        self.atual.servidas += 1
+        motivo = None
+        if self.paginas_por_contexto and self.atual.servidas >= self.paginas_por_contexto:
+            motivo = f"{self.atual.servidas} páginas"
+        elif self.limite_rss_mb and time.monotonic() - self._ultima_medicao >= INTERVALO_MEDICAO:
+            self._ultima_medicao = time.monotonic()
+            self.rss_mb = rss_arvore_mb()
+            if self.rss_mb is not None and self.rss_mb > self.limite_rss_mb:
+                motivo = f"RSS de {self.rss_mb:.0f} MB"
+        if motivo:
+            await self.reciclar(motivo)
+
+    # Troca o contexto atual por um novo; o antigo fecha quando a última página dele voltar
+    async def reciclar(self, motivo="pedido"):
+        anterior = self.atual
+        await self._novo_contexto()
+        self.reciclagens += 1
+        print(f"Contexto {anterior.geracao} reciclado ({motivo}), contexto {self.geracao} assumiu")
+        if anterior.abertas:
+            self.antigos.append(anterior)
+        else:
+            await self._fechar_contexto(anterior)
+
+    # Métricas do Chromium (CDP) de uma página do contexto; None se nenhuma página respondeu
+    # O Performance.getMetrics só traz valores depois do Performance.enable na mesma sessão
+    async def _amostra(self, registro):
+        for page in list(registro.abertas):
+            sessao = None
+            try:
+                sessao = await registro.context.new_cdp_session(page)
+                await sessao.send("Performance.enable")
+                return {m["name"]: m["value"] for m in (await sessao.send("Performance.getMetrics"))["metrics"]}
+            except Exception:
+                continue
+            finally:
+                if sessao is not None:
+                    try:
+                        await sessao.detach()
+                    except Exception:
+                        pass
+        return None
+
+    # Memória de cada contexto aberto: heap JS e nós do DOM de uma página por contexto (uma
+    # única sessão CDP por contexto, como amostra), além do RSS do monitor e de todos os
+    # processos do navegador
+    async def estatisticas(self):
+        contextos = []
+        for registro in ([self.atual] if self.atual else []) + self.antigos:
+            metricas = await self._amostra(registro)
+            contextos.append({
+                "contexto": registro.geracao,
+                "atual": registro is self.atual,
+                "paginas_servidas": registro.servidas,
+                "paginas_abertas": len(registro.abertas),
+                "idade_min": (time.monotonic() - registro.criado) / 60,
+                "heap_js_mb": None if metricas is None else metricas.get("JSHeapUsedSize", 0) / (1024 * 1024),
+                "nos_dom": None if metricas is None else int(metricas.get("Nodes", 0)),
+            })
+        self.rss_mb = rss_arvore_mb()
+        return {"rss_mb": self.rss_mb, "relancamentos": self.relancamentos, "reciclagens": self.reciclagens,
+                "contextos": contextos}
+
+    async def fechar(self):
+        if self.browser is not None and self.browser.is_connected():
+            await self.browser.close()
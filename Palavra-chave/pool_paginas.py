@@ -0,0 +1,117 @@
+import asyncio
+from collections import deque
+from urllib.parse import urlsplit
+
+# Pool de páginas do Playwright (API assíncrona)
+# N trabalhadores compartilham uma fila de sites; cada trabalhador pede a própria página ao
+# gerenciador do navegador (navegador.py) só quando a tarefa precisa de uma, e a reaproveita de
+# um site para o outro enquanto o contexto dela não for reciclado. Um limite
+# por host impede que vários trabalhadores acessem o mesmo servidor ao mesmo tempo: os sites
+# de um host no limite ficam estacionados e voltam para a frente da fila quando ele libera
+# uma vaga. Só os hosts com site em andamento ou estacionado ocupam memória.
+
+PAGINAS_PADRAO = 4
+POR_HOST_PADRAO = 2
+
+# Host de um site da lista ("https://www.exemplo.com/x" e "exemplo.com" -> "exemplo.com")
+# (uma linha que nem é URL válida, como "http://[::1", conta como o próprio host)
+def chave_host(site):
+    endereco = site if "://" in site else "http://" + site
+    try:
+        host = (urlsplit(endereco).hostname or site).lower()
+    except ValueError:
+        host = site.lower()
+    return host[4:] if host.startswith("www.") else host
+
+class PoolPaginas:
+    def __init__(self, navegador, paginas=PAGINAS_PADRAO, por_host=POR_HOST_PADRAO):
+        self.navegador = navegador
+        self.paginas = max(1, paginas)
+        self.por_host = max(1, por_host)
+
+    # Processa os sites com `tarefa(abrir_pagina, site)` (uma corrotina) e devolve (site, resultado, erro)
+    # conforme cada um termina; a ordem de saída é a de conclusão, não a da lista.
+    # `await abrir_pagina()` devolve a página do trabalhador, aberta na primeira vez que for pedida
+    # e trocada pelo gerenciador quando foi fechada, travou ou o contexto dela foi reciclado
+    async def processar(self, sites, tarefa):
+        fila = deque(sites)
+        estacionados = {}  # host no limite -> sites dele aguardando vaga
+        em_uso = {}  # host -> sites dele em andamento
+        condicao = asyncio.Condition()
+        saida = asyncio.Queue()
+
+        # Próximo site com vaga no host, estacionando os de hosts no limite; None se a fila acabou
+        def proximo():
+            while fila:
+                site = fila.popleft()
+                host = chave_host(site)
+                if em_uso.get(host, 0) < self.por_host:
+                    em_uso[host] = em_uso.get(host, 0) + 1
+                    return site, host
+                estacionados.setdefault(host, deque()).append(site)
+            return None
+
+        async def pegar():
+            async with condicao:
+                while (item := proximo()) is None:
+                    # Sem nada estacionado, ninguém vai devolver site para a fila
+                    if not estacionados:
+                        return None
+                    await condicao.wait()
+                return item
+
+        async def liberar(host):
+            async with condicao:
+                em_uso[host] -= 1
+                if not em_uso[host]:
+                    del em_uso[host]
+                if host in estacionados:
+                    fila.appendleft(estacionados[host].popleft())
+                    if not estacionados[host]:
+                        del estacionados[host]
+                condicao.notify_all()
+
+        async def trabalhador():
+            page = None
+            usada = False
+
+            async def abrir_pagina():
+                nonlocal page, usada
+                page = await self.navegador.obter_pagina(page)
+                usada = True
+                return page
+
+            try:
+                while (item := await pegar()) is not None:
+                    site, host = item
+                    try:
+                        usada = False
+                        try:
+                            resultado = await tarefa(abrir_pagina, site)
+                            await saida.put((site, resultado, None))
+                        except Exception as erro:
+                            await saida.put((site, None, erro))
+                        if usada:
+                            await self.navegador.pagina_usada(page)
+                    finally:
+                        await liberar(host)
+            finally:
+                if page is not None:
+                    await self.navegador.devolver(page)
+
+        async def encerrar():
+            try:
+                await asyncio.gather(*tarefas)
+            finally:
+                await saida.put(None)
+
+        tarefas = [asyncio.create_task(trabalhador()) for _ in range(min(self.paginas, len(fila)))]
+        finalizador = asyncio.create_task(encerrar())
+        try:
+            while (item := await saida.get()) is not None:
+                yield item
+            await finalizador
+        finally:
+            for tarefa_trabalhador in tarefas + [finalizador]:
+                tarefa_trabalhador.cancel()
+            await asyncio.gather(*tarefas, finalizador, return_exceptions=True)
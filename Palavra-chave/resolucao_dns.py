@@ -0,0 +1,180 @@
+import time
+import socket
+import sqlite3
+import asyncio
+import ipaddress
+from urllib.parse import urlsplit
+
+# Resolução de DNS antes do navegador
+# Os domínios da fila são resolvidos todos de uma vez, em paralelo; os que não existem
+# (NXDOMAIN) saem da fila na hora, sem gastar as 3 tentativas de 15 segundos no navegador,
+# e ficam num cache negativo com validade. O mesmo banco guarda o protocolo (http ou https)
+# em que cada domínio respondeu por último, que passa a ser tentado primeiro.
+
+# aiodns (c-ares) é opcional; sem ele a resolução usa o getaddrinfo do sistema em threads
+try:
+    import aiodns
+    import aiodns.error
+except ImportError:
+    aiodns = None
+
+RESOLVIDO = "resolvido"
+INEXISTENTE = "inexistente"
+INCERTO = "incerto"  # timeout, SERVFAIL...: o site segue para o navegador
+
+TIMEOUT_DNS = 5  # segundos
+CONCORRENCIA_DNS = 100
+TTL_NEGATIVO_PADRAO = 6 * 3600  # segundos
+
+PROTOCOLOS = ["http://", "https://"]
+
+# Host de um site da fila, como será resolvido ("https://www.exemplo.com/x" -> "www.exemplo.com")
+# (uma linha que nem é URL válida, como "http://[::1", conta como o próprio host)
+def host_do_site(site):
+    endereco = site if "://" in site else "http://" + site
+    try:
+        host = urlsplit(endereco).hostname or site
+    except ValueError:
+        host = site
+    return host.lower().rstrip(".")
+
+def _e_ip(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+class ResolvedorDns:
+    def __init__(self, servidores=None, timeout=TIMEOUT_DNS):
+        self.timeout = timeout
+        self._resolvedor = None
+        if aiodns is not None:
+            self._resolvedor = aiodns.DNSResolver(nameservers=servidores or None, timeout=timeout, tries=2)
+        elif servidores:
+            raise RuntimeError("Servidores de DNS próprios precisam do aiodns (pip install aiodns)")
+
+    # Devolve RESOLVIDO, INEXISTENTE ou INCERTO
+    async def resolver(self, host):
+        if self._resolvedor is not None:
+            return await self._resolver_aiodns(host)
+        return await self._resolver_sistema(host)
+
+    async def _resolver_aiodns(self, host):
+        sem_endereco = 0
+        for tipo in ["A", "AAAA"]:
+            try:
+                respostas = await self._resolvedor.query(host, tipo)
+            except aiodns.error.DNSError as erro:
+                codigo = erro.args[0] if erro.args else None
+                if codigo == aiodns.error.ARES_ENOTFOUND:
+                    return INEXISTENTE
+                if codigo == aiodns.error.ARES_ENODATA:
+                    sem_endereco += 1
+                    continue
+                return INCERTO
+            if respostas:
+                return RESOLVIDO
+            sem_endereco += 1
+        # O nome existe mas não tem A nem AAAA: também não carrega
+        return INEXISTENTE if sem_endereco == 2 else INCERTO
+
+    async def _resolver_sistema(self, host):
+        try:
+            await asyncio.wait_for(asyncio.get_running_loop().getaddrinfo(host, None), self.timeout)
+        except socket.gaierror as erro:
+            if erro.errno in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)):
+                return INEXISTENTE
+            return INCERTO
+        except asyncio.TimeoutError:
+            return INCERTO
+        return RESOLVIDO
+
+    def fechar(self):
+        if self._resolvedor is not None:
+            self._resolvedor.cancel()
+
+# Cache negativo e protocolo preferido de cada host, nas tabelas `dns_negativo` e `esquemas` do monitor.db
+class MemoriaDns:
+    def __init__(self, caminho):
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS dns_negativo (host TEXT PRIMARY KEY, expira REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS esquemas (host TEXT PRIMARY KEY, esquema TEXT NOT NULL, atualizado REAL);
+            """
+        )
+
+    def negativo(self, host):
+        linha = self.conexao.execute("SELECT expira FROM dns_negativo WHERE host = ?", (host,)).fetchone()
+        return linha is not None and linha[0] > time.time()
+
+    def registrar_negativo(self, host, ttl):
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT INTO dns_negativo (host, expira) VALUES (?, ?) "
+                "ON CONFLICT (host) DO UPDATE SET expira = excluded.expira",
+                (host, time.time() + ttl),
+            )
+
+    def esquema(self, site):
+        linha = self.conexao.execute("SELECT esquema FROM esquemas WHERE host = ?", (host_do_site(site),)).fetchone()
+        return linha[0] if linha else None
+
+    # Guarda o protocolo da URL que respondeu ("https://exemplo.com" -> "https://")
+    def registrar_esquema(self, site, url):
+        esquema = url.split("://", 1)[0] + "://"
+        if esquema == self.esquema(site):
+            return
+        with self.conexao:
+            self.conexao.execute(
+                "INSERT INTO esquemas (host, esquema, atualizado) VALUES (?, ?, ?) "
+                "ON CONFLICT (host) DO UPDATE SET esquema = excluded.esquema, atualizado = excluded.atualizado",
+                (host_do_site(site), esquema, time.time()),
+            )
+
+    def fechar(self):
+        self.conexao.close()
+
+# Ordem em que os protocolos são tentados: o que respondeu da última vez vem primeiro
+# (o site que já vem com "http://" ou "https://" é usado como está)
+def ordem_protocolos(memoria, site):
+    if site.startswith("http"):
+        return [""]
+    if memoria is None:
+        return PROTOCOLOS
+    esquema = memoria.esquema(site)
+    if esquema in PROTOCOLOS:
+        return [esquema] + [protocolo for protocolo in PROTOCOLOS if protocolo != esquema]
+    return PROTOCOLOS
+
+class FiltroDns:
+    def __init__(self, resolvedor, memoria, ttl_negativo=TTL_NEGATIVO_PADRAO, concorrencia=CONCORRENCIA_DNS):
+        self.resolvedor = resolvedor
+        self.memoria = memoria
+        self.ttl_negativo = ttl_negativo
+        self.concorrencia = concorrencia
+
+    # Separa os sites em (vivos, mortos) resolvendo cada host uma vez só, em paralelo
+    # Na dúvida (timeout, erro do servidor) o site fica entre os vivos; sem resolvedor
+    # (--sem-dns) todos são vivos e só a memória de protocolos é usada
+    async def separar(self, sites):
+        if self.resolvedor is None:
+            return list(sites), []
+        hosts = {host_do_site(site) for site in sites}
+        mortos = {host for host in hosts if not _e_ip(host) and self.memoria.negativo(host)}
+        limite = asyncio.Semaphore(self.concorrencia)
+
+        async def resolver(host):
+            async with limite:
+                return host, await self.resolvedor.resolver(host)
+
+        pendentes = [resolver(host) for host in hosts - mortos if not _e_ip(host)]
+        for host, situacao in await asyncio.gather(*pendentes):
+            if situacao == INEXISTENTE:
+                mortos.add(host)
+                self.memoria.registrar_negativo(host, self.ttl_negativo)
+
+        vivos = [site for site in sites if host_do_site(site) not in mortos]
+        return vivos, [site for site in sites if host_do_site(site) in mortos]
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+import buscador_palavras
+from buscador_palavras import BuscadorPalavras, _Automato, dobrar
+
+# Todas as ocorrências (posição final, índice da chave), procurando chave por chave
+def procurar_ingenuo(chaves, texto):
+    return sorted((inicio + len(chave) - 1, indice)
+                  for indice, chave in enumerate(chaves)
+                  for inicio in range(len(texto) - len(chave) + 1) if texto.startswith(chave, inicio))
+
+CHAVES = ["he", "she", "his", "hers", "a", "aa", "ab", "bab", "ção"]
+
+def textos_aleatorios():
+    gerador = random.Random(7)
+    return ["ushers", "aaaa", "babab", "ação e não"] + [
+        "".join(gerador.choice("abhesrçãoi ") for _ in range(gerador.randint(0, 60))) for _ in range(200)]
+
+def test_dobrar():
+    assert dobrar("AÇÃO Éxito") == "acao exito"
+    assert dobrar("AÇÃO", acentos=False) == "ação"
+    assert dobrar("Straße") == "strasse"
+
+def test_automato_em_python_acha_todas_as_ocorrencias():
+    automato = _Automato(CHAVES)
+    for texto in textos_aleatorios():
+        assert sorted(automato.procurar(texto)) == procurar_ingenuo(CHAVES, texto)
+
+def test_automato_em_python_igual_ao_pyahocorasick():
+    pytest.importorskip("ahocorasick")
+    automato, automato_c = _Automato(CHAVES), buscador_palavras._AutomatoC(CHAVES)
+    for texto in textos_aleatorios():
+        assert sorted(automato.procurar(texto)) == sorted(automato_c.procurar(texto))
+
+def test_palavra_inteira():
+    buscador = BuscadorPalavras(["chave", "ar"])
+    assert buscador.contar("<p>Chaveiro e chave, chave_mestra, ar-condicionado, arroz</p>") == {"chave": 1, "ar": 1}
+    assert BuscadorPalavras(["chave"], palavra_inteira=False).contar("chaveiro chave") == {"chave": 2}
+
+def test_maiusculas_e_acentos():
+    buscador = BuscadorPalavras(["Ação", "acao", "importação"])
+    assert buscador.contar("<p>AÇÃO, acao e Importacao</p>") == {"Ação": 2, "acao": 2, "importação": 1}
+    assert BuscadorPalavras(["ação"], acentos=False).contar("<p>acao AÇÃO</p>") == {"ação": 1}
+
+def test_so_texto_visivel():
+    html = '<a title="frete">x</a><script>var frete = 1;</script><p>Frete &amp; entrega</p>'
+    assert BuscadorPalavras(["frete", "entrega", "x"]).encontrar(html) == ["frete", "entrega", "x"]
+    assert BuscadorPalavras(["frete"]).contar(html) == {"frete": 1}
+    assert BuscadorPalavras(["frete"], so_texto=False).contar(html) == {"frete": 3}
+
+def test_ordem_de_palavras_txt_e_lista_vazia():
+    buscador = BuscadorPalavras(["zeta", "", "alfa", "zeta"])
+    assert buscador.encontrar("<p>alfa zeta</p>") == ["zeta", "alfa"]
+    assert BuscadorPalavras([]).encontrar("<p>qualquer coisa</p>") == []
@@ -0,0 +1,93 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from caixa_saida import CaixaSaida, EnviadorSheets
+
+class ErroApi(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status)
+
+# Aba do gspread: guarda as linhas anexadas; `falhas` são erros levantados antes de anexar
+# e, com `perde_confirmacao`, o append chega à planilha mas a resposta se perde
+class PlanilhaFalsa:
+    def __init__(self, falhas=(), perde_confirmacao=False):
+        self.linhas = []
+        self.falhas = list(falhas)
+        self.perde_confirmacao = perde_confirmacao
+
+    def append_rows(self, linhas, value_input_option=None):
+        if self.falhas:
+            raise self.falhas.pop(0)
+        self.linhas.extend(linhas)
+        if self.perde_confirmacao:
+            self.perde_confirmacao = False
+            raise ErroApi(502)
+
+    def col_values(self, coluna):
+        return [linha[coluna - 1] for linha in self.linhas]
+
+@pytest.fixture
+def caixa(tmp_path):
+    caixa = CaixaSaida(str(tmp_path / "monitor.db"))
+    for site in ["https://a.com", "http://www.b.com/", "c.com"]:
+        caixa.adicionar([site, "palavra"])
+    yield caixa
+    caixa.fechar()
+
+def test_linhas_ficam_na_caixa_quando_a_api_falha(caixa):
+    planilha = PlanilhaFalsa([ErroApi(503)])
+    enviador = EnviadorSheets(caixa, lambda: planilha)
+    assert asyncio.run(enviador._enviar_lote()) is False
+    assert caixa.pendentes() == 3 and planilha.linhas == []
+
+    assert asyncio.run(enviador._enviar_lote()) is True
+    assert caixa.pendentes() == 0
+    assert [linha[0] for linha in planilha.linhas] == ["https://a.com", "http://www.b.com/", "c.com"]
+
+def test_site_repetido_nao_entra_duas_vezes(caixa):
+    caixa.adicionar(["https://www.a.com/", "outra"])
+    assert caixa.pendentes() == 3
+
+def test_lote_sem_confirmacao_nao_e_reenviado(caixa):
+    planilha = PlanilhaFalsa(perde_confirmacao=True)
+    enviador = EnviadorSheets(caixa, lambda: planilha, tamanho_lote=2)
+    assert asyncio.run(enviador._enviar_lote()) is False
+    assert len(planilha.linhas) == 2 and len(caixa.em_voo()) == 2
+
+    # As duas linhas já na planilha saem da caixa sem novo append; a terceira vai no lote seguinte
+    assert asyncio.run(enviador._enviar_lote()) is True
+    assert len(planilha.linhas) == 2 and caixa.pendentes() == 1
+    assert asyncio.run(enviador._enviar_lote()) is True
+    assert [linha[0] for linha in planilha.linhas] == ["https://a.com", "http://www.b.com/", "c.com"]
+    assert caixa.pendentes() == 0 and not caixa.em_voo()
+
+def test_enviador_continua_depois_de_erro_inesperado(caixa, monkeypatch):
+    planilha = PlanilhaFalsa()
+    pendentes = caixa.pendentes
+    erros = [RuntimeError("database is locked")]
+
+    def pendentes_com_erro():
+        if erros:
+            raise erros.pop()
+        return pendentes()
+
+    monkeypatch.setattr(caixa, "pendentes", pendentes_com_erro)
+
+    async def rodar():
+        enviador = EnviadorSheets(caixa, lambda: planilha, intervalo=0.01)
+        enviador._espera = lambda: 0
+        enviador.iniciar()
+        for _ in range(200):
+            if enviador.enviadas == 3:
+                break
+            await asyncio.sleep(0.01)
+        tarefa_viva = not enviador._tarefa.done()
+        await enviador.encerrar(timeout=1)
+        return enviador, tarefa_viva
+
+    enviador, tarefa_viva = asyncio.run(rodar())
+    assert tarefa_viva and not erros
+    assert enviador.enviadas == 3 and len(planilha.linhas) == 3
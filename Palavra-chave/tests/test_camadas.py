@@ -0,0 +1,45 @@
+import pytest
+
+from camadas import CAMADA_HTTP, CAMADA_NAVEGADOR, MemoriaCamadas, depende_de_js, texto_visivel
+
+TEXTO = "Somos uma empresa de importação com atendimento em todo o Brasil. " * 5
+
+def pagina(corpo):
+    return f"<html><head><title>Exemplo</title><script>var x = 1;</script></head><body>{corpo}</body></html>"
+
+def test_texto_visivel_ignora_scripts_estilos_e_tags():
+    html = "<style>p { color: red }</style><p>Olá\n\n <b>mundo</b></p><script>alert('x')</script>"
+    assert texto_visivel(html) == "Olá mundo"
+
+def test_pagina_com_texto_nao_depende_de_js():
+    assert not depende_de_js(pagina(f"<p>{TEXTO}</p>"))
+
+@pytest.mark.parametrize("html", [
+    "",
+    "   \n",
+    pagina('<div id="root"></div>'),
+    pagina("<div id='__next'>\n</div>"),
+    pagina("<app-root></app-root>"),
+    pagina("<noscript>Por favor, habilite o JavaScript</noscript>"),
+    pagina("<p>Carregando...</p>"),
+])
+def test_pagina_vazia_ou_montada_no_navegador_depende_de_js(html):
+    assert depende_de_js(html)
+
+def test_marcador_vale_mesmo_com_texto():
+    assert depende_de_js(pagina(f'<p>{TEXTO}</p><div id="app"></div>'))
+    assert not depende_de_js(pagina(f'<p>{TEXTO}</p><div id="app"></div>'), marcadores=[])
+
+def test_limite_de_texto_configuravel():
+    assert depende_de_js(pagina(f"<p>{TEXTO}</p>"), min_texto=len(TEXTO) * 2)
+    assert not depende_de_js(pagina("<p>Curto</p>"), min_texto=3)
+
+def test_memoria_guarda_a_camada_por_host(tmp_path):
+    memoria = MemoriaCamadas(str(tmp_path / "monitor.db"))
+    memoria.registrar("https://www.exemplo.com/contato", CAMADA_HTTP)
+    memoria.registrar("exemplo.com", CAMADA_NAVEGADOR)
+    memoria.registrar("outro.com", CAMADA_HTTP)
+    assert memoria.obter("http://exemplo.com/") == CAMADA_NAVEGADOR
+    assert memoria.obter("novo.com") is None
+    assert memoria.contagem() == {CAMADA_HTTP: 1, CAMADA_NAVEGADOR: 1}
+    memoria.fechar()
@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+from carregamento import BloqueioRecursos, host_bloqueado
+
+def test_host_bloqueado_inclui_subdominios():
+    assert host_bloqueado("doubleclick.net")
+    assert host_bloqueado("Stats.G.DoubleClick.net")
+    assert not host_bloqueado("exemplo.com")
+    assert not host_bloqueado("notdoubleclick.net")
+    assert not host_bloqueado(None) and not host_bloqueado("")
+    assert host_bloqueado("cdn.exemplo.com", {"exemplo.com"})
+
+class RotaFalsa:
+    def __init__(self, url, tipo):
+        self.request = SimpleNamespace(url=url, resource_type=tipo)
+        self.decisao = None
+
+    async def abort(self):
+        self.decisao = "abortada"
+
+    async def continue_(self):
+        self.decisao = "liberada"
+
+def test_bloqueio_aborta_recursos_pesados_e_rastreadores():
+    bloqueio = BloqueioRecursos()
+    rotas = [
+        RotaFalsa("https://exemplo.com/", "document"),
+        RotaFalsa("https://exemplo.com/app.js", "script"),
+        RotaFalsa("https://exemplo.com/foto.jpg", "image"),
+        RotaFalsa("https://exemplo.com/estilo.css", "stylesheet"),
+        RotaFalsa("https://www.google-analytics.com/collect", "xhr"),
+    ]
+
+    async def decidir():
+        for rota in rotas:
+            await bloqueio._decidir(rota)
+
+    asyncio.run(decidir())
+    assert [rota.decisao for rota in rotas] == ["liberada", "liberada", "abortada", "abortada", "abortada"]
+    assert (bloqueio.bloqueadas, bloqueio.liberadas) == (3, 2)
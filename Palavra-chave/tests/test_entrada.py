@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import pytest
+
+from entrada import EntradaSites
+from indice_dominios import STATUS_FALHA, IndiceProcessados
+
+@pytest.fixture
+def entrada(tmp_path):
+    indice = IndiceProcessados(str(tmp_path / "monitor.db"), str(tmp_path / "monitor.bloom"), capacidade=100)
+    entrada = EntradaSites(str(tmp_path / "sites.txt"), indice)
+    yield entrada
+    entrada.fechar()
+    indice.fechar()
+
+def escrever(entrada, texto, modo="a"):
+    with open(entrada.caminho, modo, encoding="utf-8") as arquivo:
+        arquivo.write(texto)
+
+def test_le_so_os_bytes_acrescentados(entrada):
+    assert entrada.ler_novos() == []
+    escrever(entrada, "a.com\n\nb.com\n")
+    assert entrada.ler_novos() == ["a.com", "b.com"]
+    assert entrada.ler_novos() == []
+    escrever(entrada, "c.com\n")
+    assert entrada.ler_novos() == ["c.com"]
+    assert entrada.offset == os.path.getsize(entrada.caminho)
+
+def test_linha_incompleta_espera_o_final(entrada):
+    escrever(entrada, "a.com\nb.co")
+    assert entrada.ler_novos(final=False) == ["a.com"]
+    assert entrada.offset == len("a.com\n")
+    escrever(entrada, "m.br\nc.com")
+    assert entrada.ler_novos(final=False) == ["b.com.br"]
+    assert entrada.ler_novos(final=True) == ["c.com"]
+
+def test_site_repetido_ou_concluido_nao_volta(entrada):
+    escrever(entrada, "https://www.a.com/\nb.com\n")
+    assert entrada.ler_novos() == ["https://www.a.com/", "b.com"]
+    escrever(entrada, "a.com\n")
+    assert entrada.ler_novos() == []
+    entrada.concluir("b.com", STATUS_FALHA)
+    assert "b.com" not in entrada.pendentes
+    escrever(entrada, "http://b.com\n")
+    assert entrada.ler_novos() == []
+
+def test_arquivo_truncado_ou_substituido_e_relido(entrada, tmp_path):
+    escrever(entrada, "a.com\nb.com\nc.com\n")
+    assert entrada.ler_novos() == ["a.com", "b.com", "c.com"]
+    entrada.concluir("a.com")
+    # Truncado e reescrito menor: relê do começo, mas só o site novo sai
+    escrever(entrada, "a.com\nd.com\n", "w")
+    assert entrada.ler_novos() == ["d.com"]
+    assert entrada.offset == len("a.com\nd.com\n")
+    # Substituído por outro arquivo (outro inode), maior que o offset: também é relido
+    temporario = tmp_path / "novo.txt"
+    temporario.write_text("b.com\nd.com\ne.com\nf.com\n", encoding="utf-8")
+    os.replace(temporario, entrada.caminho)
+    assert entrada.ler_novos() == ["e.com", "f.com"]
+
+def test_proximos_acorda_com_o_arquivo_acrescentado(entrada):
+    escrever(entrada, "a.com\n")
+
+    async def rodar():
+        assert await entrada.proximos() == ["a.com"]
+        espera = asyncio.create_task(entrada.proximos())
+        await asyncio.sleep(0.05)
+        assert not espera.done()
+        escrever(entrada, "b.com\n")
+        return await asyncio.wait_for(espera, 5)
+
+    assert asyncio.run(rodar()) == ["b.com"]
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from fragmentos import QUEDAS_ANTES_DE_ISOLAR, Coordenador, fragmento, receber_lotes
+
+PASTA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Trabalho de cada processo: devolve o site em maiúsculas, um lote por vez
+# config["derruba"]: sites que derrubam o processo sempre; config["cai_uma_vez"]: sites que
+# derrubam só a primeira vez (lembrada por um arquivo em config["pasta"])
+async def trabalho_falso(numero, config, fila_sites, fila_resultados):
+    async for lote in receber_lotes(fila_sites):
+        for site in lote:
+            marca = os.path.join(config["pasta"], site)
+            if site in config["derruba"] or (site in config["cai_uma_vez"] and not os.path.exists(marca)):
+                open(marca, "w").close()
+                # Os resultados já postos precisam chegar ao coordenador antes de o processo morrer
+                fila_resultados.close()
+                fila_resultados.join_thread()
+                os._exit(1)
+            fila_resultados.put((numero, site, site.upper(), None))
+        fila_resultados.put((numero, None, None, None))
+
+def processar(sites, processos, tmp_path, derruba=(), cai_uma_vez=()):
+    config = {"pasta": str(tmp_path), "derruba": set(derruba), "cai_uma_vez": set(cai_uma_vez)}
+    coordenador = Coordenador(trabalho_falso, config, processos, paginas=1)
+
+    async def rodar():
+        coordenador.iniciar()
+        try:
+            return [item async for item in coordenador.processar(sites)]
+        finally:
+            await coordenador.encerrar()
+
+    return asyncio.run(rodar()), coordenador
+
+def test_fragmento_e_o_mesmo_para_o_dominio_e_entre_processos():
+    assert fragmento("https://www.exemplo.com/contato", 7) == fragmento("exemplo.com", 7)
+    valores = [fragmento(f"site{indice}.com", 7) for indice in range(50)]
+    assert set(valores) == set(range(7))
+    # blake2b, não hash(): outro interpretador (com outro PYTHONHASHSEED) chega ao mesmo número
+    codigo = "from fragmentos import fragmento; print([fragmento(f'site{i}.com', 7) for i in range(50)])"
+    saida = subprocess.run([sys.executable, "-c", codigo], cwd=PASTA, capture_output=True, text=True,
+                           env={**os.environ, "PYTHONHASHSEED": "123"}, check=True).stdout
+    assert saida.strip() == str(valores)
+
+def test_sites_voltam_para_o_processo_novo_depois_de_uma_queda(tmp_path):
+    sites = [f"site{indice}.com" for indice in range(8)]
+    resultados, coordenador = processar(sites, 2, tmp_path, cai_uma_vez={"site3.com"})
+    assert sorted(site for site, _, _ in resultados) == sites
+    assert all(resultado == site.upper() and erro is None for site, resultado, erro in resultados)
+    assert coordenador.reinicios == 1
+
+def test_site_que_sempre_derruba_fica_isolado(tmp_path):
+    sites = ["a.com", "ruim.com", "b.com", "c.com"]
+    resultados, coordenador = processar(sites, 1, tmp_path, derruba={"ruim.com"})
+    erros = {site: erro for site, _, erro in resultados}
+    assert sorted(erros) == sorted(sites)
+    assert "derrubou o trabalhador" in str(erros["ruim.com"])
+    assert all(erros[site] is None for site in ["a.com", "b.com", "c.com"])
+    # Caiu QUEDAS_ANTES_DE_ISOLAR vezes com o lote inteiro e mais uma com o site sozinho
+    assert coordenador.reinicios == QUEDAS_ANTES_DE_ISOLAR + 1
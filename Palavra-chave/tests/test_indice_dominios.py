@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from indice_dominios import STATUS_FALHA, STATUS_OK, FiltroBloom, IndiceProcessados, chave_site
+
+@pytest.mark.parametrize("site, chave", [
+    ("https://www.Exemplo.com/", "exemplo.com"),
+    ("exemplo.com", "exemplo.com"),
+    ("  http://exemplo.com  ", "exemplo.com"),
+    ("exemplo.com/a/", "exemplo.com/a"),
+    ("exemplo.com:8080/x?p=1", "exemplo.com:8080/x?p=1"),
+    ("exemplo.com:abc", "exemplo.com:abc"),
+    ("http://[::1", "http://[::1"),
+])
+def test_chave_site(site, chave):
+    assert chave_site(site) == chave
+
+def test_bloom_sem_falso_negativo_e_com_poucos_falsos_positivos(tmp_path):
+    filtro = FiltroBloom(str(tmp_path / "filtro.bloom"), 1000)
+    chaves = [f"site{indice}.com" for indice in range(1000)]
+    for chave in chaves:
+        filtro.adicionar(chave)
+    assert all(filtro.talvez_contem(chave) for chave in chaves)
+    falsos = sum(filtro.talvez_contem(f"outro{indice}.com") for indice in range(10000))
+    assert falsos < 300
+    filtro.fechar()
+
+def test_bloom_reaberto_pelo_mmap_mantem_os_bits(tmp_path):
+    caminho = str(tmp_path / "filtro.bloom")
+    filtro = FiltroBloom(caminho, 100)
+    filtro.adicionar("a.com")
+    filtro.marcar_ate(7)
+    filtro.fechar()
+
+    filtro = FiltroBloom(caminho, 100)
+    assert filtro.talvez_contem("a.com") and filtro.ultimo_id == 7
+    filtro.fechar()
+    # Outra capacidade: o arquivo não serve mais e o filtro recomeça vazio
+    filtro = FiltroBloom(caminho, 200)
+    assert not filtro.talvez_contem("a.com") and filtro.ultimo_id == 0
+    filtro.fechar()
+
+def test_indice_reaberto_completa_o_filtro_com_o_sqlite(tmp_path):
+    banco, bloom = str(tmp_path / "monitor.db"), str(tmp_path / "monitor.bloom")
+    indice = IndiceProcessados(banco, bloom, capacidade=100)
+    indice.registrar("https://www.a.com/")
+    indice.fechar()
+
+    # Um site gravado sem o filtro (ex.: outra versão do monitor) entra no filtro na próxima abertura
+    indice = IndiceProcessados(banco)
+    indice.registrar("b.com", STATUS_FALHA)
+    indice.fechar()
+
+    indice = IndiceProcessados(banco, bloom, capacidade=100)
+    assert indice.bloom.ultimo_id == 2
+    assert indice.contem("a.com") and indice.contem("http://b.com/") and not indice.contem("c.com")
+    assert indice.resumo() == {STATUS_OK: 1, STATUS_FALHA: 1}
+    indice.fechar()
+
+def test_filtro_cresce_quando_passa_da_capacidade(tmp_path):
+    bloom = str(tmp_path / "monitor.bloom")
+    indice = IndiceProcessados(str(tmp_path / "monitor.db"), bloom, capacidade=8)
+    sites = [f"site{indice}.com" for indice in range(20)]
+    indice.registrar_varios(sites)
+    assert indice.bloom.capacidade == 32
+    assert all(indice.contem(site) for site in sites)
+    indice.fechar()
+    assert os.path.getsize(bloom) == FiltroBloom.CABECALHO.size + (indice.bloom.bits + 7) // 8
+
+def test_importar_diario_le_so_o_acrescentado(tmp_path):
+    diario = tmp_path / "processados.txt"
+    diario.write_text("a.com\nb.com\nc.c", encoding="utf-8")
+    indice = IndiceProcessados(str(tmp_path / "monitor.db"), str(tmp_path / "monitor.bloom"), capacidade=100)
+    assert indice.importar_diario(str(diario)) == 2
+    assert indice.importar_diario(str(diario)) == 0
+    with open(diario, "a", encoding="utf-8") as arquivo:
+        arquivo.write("om\n")
+    assert indice.importar_diario(str(diario)) == 1
+    assert indice.contem("c.com") and indice.resumo() == {STATUS_OK: 3}
+    indice.fechar()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+
+from navegador import GerenciadorNavegador, rss_arvore_mb
+
+# Playwright falso: contextos e páginas que só registram o que foi fechado
+class PaginaFalsa:
+    def __init__(self):
+        self.fechada = False
+
+    def is_closed(self):
+        return self.fechada
+
+    async def close(self):
+        self.fechada = True
+
+    def on(self, evento, funcao):
+        pass
+
+class ContextoFalso:
+    def __init__(self):
+        self.fechado = False
+
+    async def new_page(self):
+        return PaginaFalsa()
+
+    async def close(self):
+        self.fechado = True
+
+class NavegadorFalso:
+    def __init__(self):
+        self.conectado = True
+        self.contextos = []
+
+    def is_connected(self):
+        return self.conectado
+
+    async def new_context(self):
+        self.contextos.append(ContextoFalso())
+        return self.contextos[-1]
+
+class PlaywrightFalso:
+    def __init__(self):
+        self.navegadores = []
+        self.chromium = self
+
+    async def launch(self, headless=True):
+        self.navegadores.append(NavegadorFalso())
+        return self.navegadores[-1]
+
+def test_recicla_o_contexto_e_fecha_o_antigo_quando_a_ultima_pagina_volta():
+    playwright = PlaywrightFalso()
+    gerenciador = GerenciadorNavegador(playwright, paginas_por_contexto=2, limite_rss_mb=0)
+
+    async def rodar():
+        pagina_a = await gerenciador.obter_pagina()
+        pagina_b = await gerenciador.obter_pagina()
+        assert await gerenciador.obter_pagina(pagina_a) is pagina_a
+        await gerenciador.pagina_usada(pagina_a)
+        await gerenciador.pagina_usada(pagina_b)
+        primeiro, segundo = playwright.navegadores[0].contextos
+        assert gerenciador.reciclagens == 1 and gerenciador.geracao == 2
+        # As páginas do contexto antigo são trocadas por páginas do novo
+        nova_a = await gerenciador.obter_pagina(pagina_a)
+        assert nova_a is not pagina_a and pagina_a.fechada and not primeiro.fechado
+        await gerenciador.devolver(pagina_b)
+        assert primeiro.fechado and not segundo.fechado and gerenciador.antigos == []
+
+    asyncio.run(rodar())
+
+def test_relanca_o_navegador_que_caiu():
+    playwright = PlaywrightFalso()
+    gerenciador = GerenciadorNavegador(playwright, limite_rss_mb=0)
+
+    async def rodar():
+        pagina = await gerenciador.obter_pagina()
+        playwright.navegadores[0].conectado = False
+        nova = await gerenciador.obter_pagina(pagina)
+        assert nova is not pagina
+        assert len(playwright.navegadores) == 2 and gerenciador.relancamentos == 1
+
+    asyncio.run(rodar())
+
+def test_rss_da_arvore_de_processos():
+    if os.path.isdir("/proc"):
+        assert rss_arvore_mb() > 0
+    else:
+        assert rss_arvore_mb() is None
@@ -0,0 +1,67 @@
+import asyncio
+
+from pool_paginas import PoolPaginas, chave_host
+
+# Gerenciador do navegador: cada obter_pagina sem página anterior abre uma nova
+class NavegadorFalso:
+    def __init__(self):
+        self.abertas = 0
+        self.devolvidas = []
+        self.usos = 0
+
+    async def obter_pagina(self, page):
+        if page is None:
+            self.abertas += 1
+            page = f"pagina-{self.abertas}"
+        return page
+
+    async def pagina_usada(self, page):
+        self.usos += 1
+
+    async def devolver(self, page):
+        self.devolvidas.append(page)
+
+def processar(sites, tarefa, **opcoes):
+    navegador = NavegadorFalso()
+
+    async def rodar():
+        return [item async for item in PoolPaginas(navegador, **opcoes).processar(sites, tarefa)]
+
+    return asyncio.run(rodar()), navegador
+
+def test_chave_host():
+    assert chave_host("https://www.Exemplo.com/x") == chave_host("exemplo.com") == "exemplo.com"
+    assert chave_host("http://[::1") == "http://[::1"
+
+def test_limite_por_host():
+    em_andamento = {}
+    maximo = {}
+
+    async def tarefa(abrir_pagina, site):
+        host = chave_host(site)
+        em_andamento[host] = em_andamento.get(host, 0) + 1
+        maximo[host] = max(maximo.get(host, 0), em_andamento[host])
+        await asyncio.sleep(0.01)
+        em_andamento[host] -= 1
+        return host
+
+    sites = [f"https://a.com/{indice}" for indice in range(6)] + [f"b.com/{indice}" for indice in range(3)] + ["c.com"]
+    resultados, _ = processar(sites, tarefa, paginas=5, por_host=2)
+    assert sorted(site for site, _, _ in resultados) == sorted(sites)
+    assert maximo == {"a.com": 2, "b.com": 2, "c.com": 1}
+
+def test_erro_da_tarefa_e_devolvido_e_paginas_sao_devolvidas():
+    async def tarefa(abrir_pagina, site):
+        await abrir_pagina()
+        await asyncio.sleep(0.01)
+        if site == "ruim.com":
+            raise ValueError(site)
+        return site
+
+    resultados, navegador = processar(["a.com", "ruim.com", "b.com", "c.com"], tarefa, paginas=2)
+    erros = {site: erro for site, _, erro in resultados}
+    assert isinstance(erros.pop("ruim.com"), ValueError)
+    assert set(erros) == {"a.com", "b.com", "c.com"} and not any(erros.values())
+    # Cada trabalhador abre uma página só e a devolve no fim
+    assert navegador.abertas == 2 and sorted(navegador.devolvidas) == ["pagina-1", "pagina-2"]
+    assert navegador.usos == 4
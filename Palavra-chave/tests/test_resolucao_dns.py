@@ -0,0 +1,55 @@
+import asyncio
+
+from resolucao_dns import (INCERTO, INEXISTENTE, PROTOCOLOS, RESOLVIDO, FiltroDns, MemoriaDns, host_do_site,
+                           ordem_protocolos)
+
+# Resolvedor que responde por uma tabela host -> situação e conta as consultas
+class ResolvedorFalso:
+    def __init__(self, situacoes):
+        self.situacoes = situacoes
+        self.consultas = []
+
+    async def resolver(self, host):
+        self.consultas.append(host)
+        return self.situacoes.get(host, RESOLVIDO)
+
+def test_host_do_site():
+    assert host_do_site("https://www.Exemplo.com./x") == "www.exemplo.com"
+    assert host_do_site("exemplo.com/contato") == "exemplo.com"
+    assert host_do_site("http://[::1") == "http://[::1"
+
+def test_separa_mortos_e_consulta_cada_host_uma_vez(tmp_path):
+    memoria = MemoriaDns(str(tmp_path / "monitor.db"))
+    resolvedor = ResolvedorFalso({"morto.com": INEXISTENTE, "lento.com": INCERTO})
+    filtro = FiltroDns(resolvedor, memoria)
+    sites = ["vivo.com", "morto.com/a", "https://morto.com/b", "lento.com", "http://10.0.0.1/", "vivo.com/x"]
+    vivos, mortos = asyncio.run(filtro.separar(sites))
+    assert vivos == ["vivo.com", "lento.com", "http://10.0.0.1/", "vivo.com/x"]
+    assert mortos == ["morto.com/a", "https://morto.com/b"]
+    assert sorted(resolvedor.consultas) == ["lento.com", "morto.com", "vivo.com"]
+
+    # O NXDOMAIN fica no cache negativo: na próxima vez o host nem é consultado
+    resolvedor.consultas.clear()
+    vivos, mortos = asyncio.run(filtro.separar(["morto.com", "vivo.com"]))
+    assert (vivos, mortos) == (["vivo.com"], ["morto.com"])
+    assert resolvedor.consultas == ["vivo.com"]
+    memoria.fechar()
+
+def test_cache_negativo_expira(tmp_path):
+    memoria = MemoriaDns(str(tmp_path / "monitor.db"))
+    memoria.registrar_negativo("a.com", 60)
+    memoria.registrar_negativo("b.com", -1)
+    assert memoria.negativo("a.com") and not memoria.negativo("b.com")
+    memoria.fechar()
+
+def test_sem_resolvedor_todos_sao_vivos():
+    assert asyncio.run(FiltroDns(None, None).separar(["a.com", "b.com"])) == (["a.com", "b.com"], [])
+
+def test_ordem_dos_protocolos_segue_o_que_respondeu(tmp_path):
+    memoria = MemoriaDns(str(tmp_path / "monitor.db"))
+    assert ordem_protocolos(memoria, "exemplo.com") == PROTOCOLOS
+    memoria.registrar_esquema("exemplo.com", "https://exemplo.com/")
+    assert ordem_protocolos(memoria, "exemplo.com/contato") == ["https://", "http://"]
+    assert ordem_protocolos(memoria, "http://exemplo.com") == [""]
+    assert ordem_protocolos(None, "exemplo.com") == PROTOCOLOS
+    memoria.fechar()